@@ -0,0 +1,500 @@
+import os
+import sys
+import logging
+import random
+import sqlite3
+import tempfile
+from bisect import bisect_left
+from pathlib import Path
+
+from src.hashing import get_hasher, read_into
+from src.scanner import DirectoryScanner
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("chunking")
+
+# Optionale Abhängigkeit für die vektorisierte Suche nach Schnittpunkten
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Standardgrenzen der inhaltsdefinierten Blöcke in Bytes
+DEFAULT_MIN_CHUNK = 2 * 1024
+DEFAULT_AVG_CHUNK = 8 * 1024
+DEFAULT_MAX_CHUNK = 64 * 1024
+
+# Größe der Lesevorgänge beim Zerlegen in Bytes
+READ_SIZE = 1024 * 1024
+
+# Anzahl der Bytes, von denen der rollende Hash abhängt
+WINDOW_SIZE = 64
+
+# Anzahl der Blöcke, die gemeinsam in den Index geschrieben werden
+INSERT_BATCH = 10000
+
+# Blöcke in mehr Dateien gehen nicht in die Auswertung je Dateipaar ein
+MAX_PAIR_FANOUT = 64
+
+MASK32 = (1 << 32) - 1
+
+# Feste Zufallstabelle des rollenden Hashes, damit Schnittpunkte reproduzierbar sind
+_window_random = random.Random(0x67656172)
+WINDOW_TABLE = [_window_random.getrandbits(32) for _ in range(256)]
+_WINDOW_ARRAY = np.asarray(WINDOW_TABLE, dtype=np.uint32) if np is not None else None
+
+def _cut_mask(bits):
+    """
+    Erstellt eine Bitmaske aus den obersten Bits des rollenden Hashes.
+
+    Args:
+        bits (int): Anzahl der Bits; im Mittel trifft die Maske alle 2 ** bits Bytes.
+
+    Returns:
+        int: Bitmaske.
+    """
+    bits = min(32, max(1, bits))
+    return ((1 << bits) - 1) << (32 - bits)
+
+def _cut_masks(avg_size):
+    """
+    Erstellt die Schnittmasken des normalisierten Chunkings (FastCDC).
+
+    Vor der angestrebten Blockgröße gilt eine strengere Maske mit zwei zusätzlichen
+    Bits, danach eine lockerere mit zwei Bits weniger. Dadurch liegen die Blockgrößen
+    enger um avg_size. Die strenge Maske enthält alle Bits der lockeren, ein
+    strenger Treffer ist also immer auch ein lockerer.
+
+    Args:
+        avg_size (int): Angestrebte mittlere Blockgröße (Zweierpotenz).
+
+    Returns:
+        tuple: (strenge Maske, lockere Maske).
+    """
+    bits = max(1, avg_size.bit_length() - 1)
+    return _cut_mask(bits + 2), _cut_mask(bits - 2)
+
+def _select_cuts(length, strict, loose, min_size, avg_size, max_size, final):
+    """
+    Wählt die Blockgrenzen aus den Treffern beider Masken.
+
+    Args:
+        length (int): Anzahl der Bytes im Puffer.
+        strict (list): Aufsteigende Positionen mit strengem Treffer.
+        loose (list): Aufsteigende Positionen mit lockerem Treffer.
+        min_size (int): Mindestgröße eines Blocks.
+        avg_size (int): Angestrebte mittlere Blockgröße.
+        max_size (int): Maximale Größe eines Blocks.
+        final (bool): Ob der Puffer bis zum Dateiende reicht.
+
+    Returns:
+        list: Endpositionen der Blöcke im Puffer.
+    """
+    cuts = []
+    start = 0
+    while start < length:
+        # Ohne Dateiende wird nur geschnitten, solange ein ganzer Maximalblock im Puffer liegt
+        if not final and length - start < max_size:
+            break
+        index = bisect_left(strict, start + min_size - 1)
+        if index < len(strict) and strict[index] < start + avg_size - 1:
+            end = strict[index] + 1
+        else:
+            index = bisect_left(loose, start + max(min_size, avg_size) - 1)
+            if index < len(loose) and loose[index] < start + max_size:
+                end = loose[index] + 1
+            else:
+                end = min(length, start + max_size)
+        cuts.append(end)
+        start = end
+    return cuts
+
+def _find_cuts_numpy(view, min_size, avg_size, max_size, masks, final):
+    """
+    Bestimmt die Blockgrenzen mit NumPy.
+
+    Der rollende Hash an Position i ist die Summe von WINDOW_TABLE über die Bytes
+    i - 63 bis i (modulo 2 ** 32). Er ergibt sich als Differenz zweier Präfixsummen,
+    sodass je Byte nur ein Tabellenzugriff, eine Addition und eine Subtraktion in
+    32 Bit anfallen.
+
+    Args:
+        view (memoryview): Zu zerlegende Daten.
+        min_size (int): Mindestgröße eines Blocks.
+        avg_size (int): Angestrebte mittlere Blockgröße.
+        max_size (int): Maximale Größe eines Blocks.
+        masks (tuple): (strenge Maske, lockere Maske).
+        final (bool): Ob der Puffer bis zum Dateiende reicht.
+
+    Returns:
+        list: Endpositionen der Blöcke im Puffer.
+    """
+    strict_mask, loose_mask = masks
+    sums = np.zeros(len(view) + 1, dtype=np.uint32)
+    np.cumsum(_WINDOW_ARRAY[np.frombuffer(view, dtype=np.uint8)], dtype=np.uint32, out=sums[1:])
+    window = sums[WINDOW_SIZE:] - sums[:-WINDOW_SIZE] if len(view) >= WINDOW_SIZE else sums[:0]
+    del sums
+
+    loose = np.flatnonzero((window & np.uint32(loose_mask)) == 0)
+    strict = loose[(window[loose] & np.uint32(strict_mask)) == 0]
+    # window[k] gehört zum Fenster, das an Position k + WINDOW_SIZE - 1 endet
+    return _select_cuts(
+        len(view), (strict + WINDOW_SIZE - 1).tolist(), (loose + WINDOW_SIZE - 1).tolist(),
+        min_size, avg_size, max_size, final
+    )
+
+def _find_cuts_python(view, min_size, avg_size, max_size, masks, final):
+    """
+    Bestimmt die Blockgrenzen byteweise ohne NumPy.
+
+    Wie bei FastCDC werden die ersten min_size - 64 Bytes jedes Blocks übersprungen;
+    die Grenzen stimmen mit _find_cuts_numpy überein.
+
+    Args:
+        view (memoryview): Zu zerlegende Daten.
+        min_size (int): Mindestgröße eines Blocks.
+        avg_size (int): Angestrebte mittlere Blockgröße.
+        max_size (int): Maximale Größe eines Blocks.
+        masks (tuple): (strenge Maske, lockere Maske).
+        final (bool): Ob der Puffer bis zum Dateiende reicht.
+
+    Returns:
+        list: Endpositionen der Blöcke im Puffer.
+    """
+    strict_mask, loose_mask = masks
+    table = WINDOW_TABLE
+    length = len(view)
+    cuts = []
+    start = 0
+    while start < length:
+        if not final and length - start < max_size:
+            break
+        limit = min(length, start + max_size)
+        end = limit
+        position = start + min_size - 1
+        if position < limit:
+            # Ohne Modulo gerechnet bleibt die Summe exakt; die Masken betreffen nur die unteren 32 Bit
+            value = sum(table[byte] for byte in view[position - WINDOW_SIZE + 1:position + 1])
+            normal = start + avg_size - 1
+            if not value & (strict_mask if position < normal else loose_mask):
+                end = position + 1
+            else:
+                for mask, stop in ((strict_mask, min(normal, limit)), (loose_mask, limit)):
+                    first = position + 1
+                    pairs = zip(view[first:stop], view[first - WINDOW_SIZE:stop - WINDOW_SIZE])
+                    for position, (incoming, outgoing) in enumerate(pairs, first):
+                        value += table[incoming] - table[outgoing]
+                        if not value & mask:
+                            end = position + 1
+                            break
+                    if end < limit or first >= limit:
+                        break
+        cuts.append(end)
+        start = end
+    return cuts
+
+def iter_chunks(file_path, min_size=DEFAULT_MIN_CHUNK, avg_size=DEFAULT_AVG_CHUNK, max_size=DEFAULT_MAX_CHUNK,
+                algorithm="blake2b"):
+    """
+    Zerlegt eine Datei in inhaltsdefinierte Blöcke (normalisiertes FastCDC).
+
+    Ein Schnitt erfolgt frühestens nach min_size und spätestens nach max_size Bytes,
+    dazwischen an der ersten Position, an der ein rollender Hash über die letzten
+    64 Bytes die Maske erfüllt (vor avg_size eine strengere, danach eine lockerere).
+    Da der Hash nur von diesen 64 Bytes abhängt, verschieben Einfügungen nur
+    die Schnittpunkte in ihrer Nähe. Gelesen wird in einen festen Puffer von
+    READ_SIZE + max_size Bytes; die Blöcke werden ohne Kopie aus dem Puffer gehasht.
+    Mit NumPy werden die Schnittpunkte vektorisiert gesucht.
+
+    Args:
+        file_path (str): Pfad zur Datei.
+        min_size (int): Mindestgröße eines Blocks (mindestens 64 Bytes).
+        avg_size (int): Angestrebte mittlere Blockgröße.
+        max_size (int): Maximale Größe eines Blocks.
+        algorithm (str): Hash-Algorithmus für die Block-Digests.
+
+    Yields:
+        tuple: (Offset, Länge, Digest als Bytes) je Block.
+    """
+    if not WINDOW_SIZE <= min_size <= max_size:
+        raise ValueError(f"Es muss {WINDOW_SIZE} <= min_size <= max_size gelten")
+    masks = _cut_masks(avg_size)
+    find_cuts = _find_cuts_numpy if np is not None else _find_cuts_python
+
+    with open(file_path, 'rb', buffering=0) as f:
+        remaining = os.fstat(f.fileno()).st_size
+        buffer = bytearray(min(remaining, READ_SIZE) + max_size)
+        view = memoryview(buffer)
+        offset = 0
+        length = 0
+        while True:
+            # Puffer bis zur Dateigröße füllen, ohne einen leeren Lesevorgang am Ende
+            while remaining > 0 and length < len(buffer):
+                bytes_read = read_into(f, view[length:length + min(remaining, len(buffer) - length)])
+                if not bytes_read:
+                    remaining = 0
+                    break
+                length += bytes_read
+                remaining -= bytes_read
+            final = remaining == 0
+
+            start = 0
+            for end in find_cuts(view[:length], min_size, avg_size, max_size, masks, final):
+                hasher = get_hasher(algorithm)
+                hasher.update(view[start:end])
+                yield offset + start, end - start, hasher.digest()
+                start = end
+            if final:
+                return
+
+            # Den angefangenen Block an den Pufferanfang verschieben
+            buffer[:length - start] = buffer[start:length]
+            offset += start
+            length -= start
+
+class ChunkAnalyzer:
+    """
+    Schätzt die Einsparung durch Deduplizierung auf Blockebene.
+
+    Fast identische Dateien (VM-Images, Datenbank-Dumps, Videoschnitte) werden in
+    inhaltsdefinierte Blöcke zerlegt. Die Digests landen in einem SQLite-Index auf
+    der Festplatte, dessen Seitencache durch memory_budget begrenzt ist. Ausgewertet
+    werden der gemeinsame Anteil insgesamt und je Dateipaar.
+    """
+    def __init__(self, min_size=DEFAULT_MIN_CHUNK, avg_size=DEFAULT_AVG_CHUNK, max_size=DEFAULT_MAX_CHUNK,
+                 algorithm="blake2b", index_path=None, memory_budget=64 * 1024 * 1024):
+        """
+        Initialisiert den ChunkAnalyzer.
+
+        Args:
+            min_size (int): Mindestgröße eines Blocks in Bytes.
+            avg_size (int): Angestrebte mittlere Blockgröße in Bytes.
+            max_size (int): Maximale Größe eines Blocks in Bytes.
+            algorithm (str): Hash-Algorithmus für die Block-Digests.
+            index_path (str, optional): Pfad des Block-Index; standardmäßig eine temporäre Datei.
+            memory_budget (int): Maximaler Seitencache des Index in Bytes.
+        """
+        self.logger = logger
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        self.algorithm = algorithm
+        self.index_path = index_path
+        self.memory_budget = memory_budget
+        self.scanner = DirectoryScanner(symlinks="skip")
+
+    def analyze(self, directory_path, recursive=True, min_file_size=0, top_pairs=20):
+        """
+        Zerlegt alle Dateien und berechnet die gemeinsam genutzten Bytes.
+
+        Args:
+            directory_path (str | list): Verzeichnis, Liste von Verzeichnissen oder Dateien.
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            min_file_size (int): Kleinere Dateien werden übersprungen.
+            top_pairs (int): Anzahl der gemeldeten Dateipaare mit den meisten gemeinsamen Bytes.
+
+        Returns:
+            dict: Gesamtzahlen ("total_bytes", "unique_bytes", "shared_bytes",
+                "dedup_ratio", Blockzahlen) und "file_pairs" mit den gemeinsamen
+                Bytes je Dateipaar (ohne die "pair_skipped_chunks" Blöcke mit
+                mehr als MAX_PAIR_FANOUT Dateien).
+        """
+        result = {
+            "total_files": 0,
+            "total_bytes": 0,
+            "unique_bytes": 0,
+            "shared_bytes": 0,
+            "dedup_ratio": 1.0,
+            "total_chunks": 0,
+            "unique_chunks": 0,
+            "pair_skipped_chunks": 0,
+            "file_pairs": [],
+            "errors": []
+        }
+
+        with tempfile.TemporaryDirectory(prefix="chunks-") as temp_dir:
+            index_path = self.index_path or os.path.join(temp_dir, "chunks.sqlite3")
+            connection = sqlite3.connect(str(index_path))
+            try:
+                self._build_index(connection, self._iter_files(directory_path, recursive, min_file_size), result)
+                self._evaluate(connection, result, top_pairs)
+            finally:
+                connection.close()
+
+        self.logger.info(
+            f"Blockanalyse abgeschlossen: {self._format_size(result['shared_bytes'])} von "
+            f"{self._format_size(result['total_bytes'])} auf Blockebene gemeinsam genutzt"
+        )
+        return result
+
+    def _iter_files(self, directory_path, recursive, min_file_size):
+        """
+        Liefert die zu analysierenden Dateien.
+
+        Args:
+            directory_path (str | list): Verzeichnis, Liste von Verzeichnissen oder Dateien.
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            min_file_size (int): Mindestgröße in Bytes.
+
+        Yields:
+            Path: Dateipfad.
+        """
+        if isinstance(directory_path, (str, os.PathLike)):
+            directory_path = [directory_path]
+
+        for path in map(Path, directory_path):
+            if path.is_file():
+                if not path.is_symlink() and path.stat().st_size >= min_file_size:
+                    yield path
+            elif path.is_dir():
+                for entry in self.scanner.iter_files(path, recursive):
+                    if entry.size >= min_file_size:
+                        yield entry.file_path
+            else:
+                self.logger.error(f"Pfad existiert nicht: {path}")
+
+    def _build_index(self, connection, files, result):
+        """
+        Zerlegt die Dateien und schreibt alle Block-Digests in den Index.
+
+        Args:
+            connection (sqlite3.Connection): Verbindung zum Index.
+            files (iterable): Dateipfade.
+            result (dict): Ergebnis; Dateizahl und Fehler werden ergänzt.
+        """
+        connection.execute(f"PRAGMA cache_size = -{max(1024, self.memory_budget // 1024)}")
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("DROP TABLE IF EXISTS files")
+        connection.execute("DROP TABLE IF EXISTS chunks")
+        connection.execute("CREATE TABLE files (id INTEGER PRIMARY KEY, path BLOB NOT NULL, size INTEGER NOT NULL)")
+        connection.execute("CREATE TABLE chunks (digest BLOB NOT NULL, file_id INTEGER NOT NULL, size INTEGER NOT NULL)")
+
+        pending = []
+        for file_id, file_path in enumerate(files):
+            try:
+                file_size = 0
+                for _, length, digest in iter_chunks(file_path, self.min_size, self.avg_size,
+                                                     self.max_size, self.algorithm):
+                    pending.append((digest, file_id, length))
+                    file_size += length
+                    if len(pending) >= INSERT_BATCH:
+                        connection.executemany("INSERT INTO chunks VALUES (?, ?, ?)", pending)
+                        pending = []
+            except OSError as e:
+                error_msg = f"Fehler beim Zerlegen von {file_path}: {e}"
+                self.logger.error(error_msg)
+                result["errors"].append(error_msg)
+                continue
+            connection.execute("INSERT INTO files VALUES (?, ?, ?)", (file_id, os.fsencode(file_path), file_size))
+            result["total_files"] += 1
+
+        if pending:
+            connection.executemany("INSERT INTO chunks VALUES (?, ?, ?)", pending)
+        # Blöcke abgebrochener Dateien entfernen
+        connection.execute("DELETE FROM chunks WHERE file_id NOT IN (SELECT id FROM files)")
+        connection.execute("CREATE INDEX chunks_digest ON chunks (digest, file_id)")
+        connection.commit()
+
+    def _evaluate(self, connection, result, top_pairs):
+        """
+        Berechnet Gesamtwerte und die gemeinsamen Bytes je Dateipaar.
+
+        Ein Block zählt je Dateipaar einmal, auch wenn er in einer Datei mehrfach vorkommt.
+        Blöcke, die in mehr als MAX_PAIR_FANOUT Dateien vorkommen (z. B. Nullblöcke),
+        gehen nur in die Gesamtwerte ein, da jeder von ihnen quadratisch viele
+        Dateipaare erzeugen würde; ihre Anzahl steht in "pair_skipped_chunks".
+
+        Args:
+            connection (sqlite3.Connection): Verbindung zum Index.
+            result (dict): Ergebnis; wird ergänzt.
+            top_pairs (int): Anzahl der gemeldeten Dateipaare.
+        """
+        total_chunks, total_bytes = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chunks").fetchone()
+        unique_chunks, unique_bytes = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM chunks GROUP BY digest)"
+        ).fetchone()
+
+        result["total_chunks"] = total_chunks
+        result["unique_chunks"] = unique_chunks
+        result["total_bytes"] = total_bytes
+        result["unique_bytes"] = unique_bytes
+        result["shared_bytes"] = total_bytes - unique_bytes
+        result["dedup_ratio"] = total_bytes / unique_bytes if unique_bytes else 1.0
+
+        sizes = dict(connection.execute("SELECT id, size FROM files"))
+        paths = {file_id: os.fsdecode(path) for file_id, path in connection.execute("SELECT id, path FROM files")}
+
+        # Nur Blöcke, die in mindestens zwei und höchstens MAX_PAIR_FANOUT Dateien vorkommen
+        connection.execute("DROP TABLE IF EXISTS pair_chunks")
+        connection.execute(
+            """
+            CREATE TEMP TABLE pair_chunks AS
+            SELECT digest, file_id, MAX(size) AS size FROM chunks
+            WHERE digest IN (
+                SELECT digest FROM chunks GROUP BY digest HAVING COUNT(DISTINCT file_id) BETWEEN 2 AND ?
+            )
+            GROUP BY digest, file_id
+            """,
+            (MAX_PAIR_FANOUT,)
+        )
+        connection.execute("CREATE INDEX pair_chunks_digest ON pair_chunks (digest, file_id)")
+        result["pair_skipped_chunks"] = connection.execute(
+            "SELECT COUNT(*) FROM (SELECT digest FROM chunks GROUP BY digest HAVING COUNT(DISTINCT file_id) > ?)",
+            (MAX_PAIR_FANOUT,)
+        ).fetchone()[0]
+
+        rows = connection.execute(
+            """
+            SELECT a.file_id, b.file_id, SUM(a.size) AS shared
+            FROM pair_chunks a JOIN pair_chunks b ON a.digest = b.digest AND a.file_id < b.file_id
+            GROUP BY a.file_id, b.file_id
+            ORDER BY shared DESC
+            LIMIT ?
+            """,
+            (top_pairs,)
+        ).fetchall()
+        for file1, file2, shared in rows:
+            result["file_pairs"].append({
+                "file1": paths[file1],
+                "file2": paths[file2],
+                "shared_bytes": shared,
+                "shared_ratio": shared / max(1, min(sizes[file1], sizes[file2]))
+            })
+
+    def _format_size(self, size_bytes):
+        """
+        Formatiert eine Größe in Bytes in eine lesbare Form.
+
+        Args:
+            size_bytes (int): Größe in Bytes.
+
+        Returns:
+            str: Formatierte Größe.
+        """
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if size_bytes < 1024 or unit == 'TB':
+                return f"{size_bytes:.2f} {unit}"
+            size_bytes /= 1024
+
+# Beispiel für die Verwendung
+if __name__ == "__main__":
+    analyzer = ChunkAnalyzer()
+
+    if len(sys.argv) > 1:
+        result = analyzer.analyze(sys.argv[1:])
+        print(f"Dateien: {result['total_files']}")
+        print(f"Gesamt: {analyzer._format_size(result['total_bytes'])}")
+        print(f"Eindeutig: {analyzer._format_size(result['unique_bytes'])} (Faktor {result['dedup_ratio']:.2f})")
+        for pair in result["file_pairs"]:
+            print(f"  {pair['shared_ratio']:.0%} gemeinsam: {pair['file1']} <-> {pair['file2']}")
+    else:
+        print("Bitte geben Sie ein Verzeichnis als Argument an.")
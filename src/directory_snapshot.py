@@ -0,0 +1,251 @@
+import os
+import sys
+import logging
+import sqlite3
+import struct
+import threading
+from pathlib import Path
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("directory_snapshot")
+
+# Standardpfad des Snapshots im Benutzerverzeichnis
+DEFAULT_SNAPSHOT_PATH = Path.home() / ".file_organizer" / "directory_snapshot.sqlite3"
+
+# Zeitfenster in Nanosekunden, in dem eine Änderung noch dieselbe mtime erhalten kann.
+# Verzeichnisse, deren mtime so kurz vor dem Lesen lag, werden beim nächsten Mal neu gelesen.
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+# Version des gespeicherten Formats; Snapshots älterer Formate werden verworfen
+SNAPSHOT_FORMAT = "3"
+
+# Größe, mtime, Gerät und Inode einer Datei in der Spalte file_stats
+FILE_STAT_RECORD = struct.Struct("<QdQQ")
+
+def _join_names(names):
+    """
+    Fasst Namen als Bytes (os.fsencode) durch Nullbytes getrennt zusammen.
+
+    Args:
+        names (iterable): Datei- oder Verzeichnisnamen.
+
+    Returns:
+        bytes: Zusammengefasste Namen.
+    """
+    return b"\0".join(os.fsencode(name) for name in names)
+
+def _split_names(data):
+    """
+    Zerlegt mit _join_names() zusammengefasste Namen.
+
+    Args:
+        data (bytes): Zusammengefasste Namen.
+
+    Returns:
+        list: Namen als str (os.fsdecode).
+    """
+    return [os.fsdecode(name) for name in data.split(b"\0")] if data else []
+
+class DirectorySnapshot:
+    """
+    Persistenter Snapshot eines Verzeichnisbaums für inkrementelle Scans.
+
+    Je Verzeichnis werden mtime_ns, die Namen der Unterverzeichnisse, die Dateien
+    mit Größe, Änderungszeit, Gerät und Inode sowie die Namen der vom Scanner
+    übersprungenen Einträge gespeichert. Die mtime eines
+    Verzeichnisses ändert sich nur, wenn Einträge angelegt, gelöscht oder umbenannt
+    werden; bei unveränderter mtime muss das Verzeichnis daher nicht erneut gelesen
+    werden. Änderungen am Inhalt einer Datei ändern die mtime des Verzeichnisses
+    nicht, deshalb prüft der Scanner standardmäßig die bekannten Dateien weiterhin
+    per stat().
+
+    Pfade und Namen werden als Bytes (os.fsencode) gespeichert, die Dateiattribute
+    als feste Datensätze (FILE_STAT_RECORD), sodass auch Namen ohne gültiges UTF-8
+    erhalten bleiben.
+    """
+    def __init__(self, snapshot_path=None, commit_interval=1000):
+        """
+        Öffnet oder erstellt einen Snapshot.
+
+        Args:
+            snapshot_path (str, optional): Pfad zur Snapshot-Datei (SQLite).
+                Standardmäßig ~/.file_organizer/directory_snapshot.sqlite3.
+            commit_interval (int): Anzahl gespeicherter Verzeichnisse, nach der
+                automatisch geschrieben wird.
+        """
+        self.logger = logger
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else DEFAULT_SNAPSHOT_PATH
+        self.commit_interval = commit_interval
+        self._pending = 0
+        self.reused_directories = 0
+        self.scanned_directories = 0
+
+        # Der parallele Scanner liest Verzeichnisse in mehreren Threads
+        self.lock = threading.Lock()
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.snapshot_path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        if row is None or row[0] != SNAPSHOT_FORMAT:
+            self.connection.execute("DROP TABLE IF EXISTS directories")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('format', ?)", (SNAPSHOT_FORMAT,)
+            )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS directories (
+                path BLOB PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                scanned_ns INTEGER NOT NULL,
+                subdirectories BLOB NOT NULL,
+                file_names BLOB NOT NULL,
+                file_stats BLOB NOT NULL,
+                skipped_names BLOB NOT NULL
+            )
+            """
+        )
+        self.connection.commit()
+
+    def prepare(self, symlinks):
+        """
+        Verwirft den Snapshot, wenn er mit einer anderen Link-Behandlung erstellt wurde.
+
+        Args:
+            symlinks (str): Link-Behandlung des Scanners.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'symlinks'").fetchone()
+            if row is not None and row[0] == symlinks:
+                return
+            if row is not None:
+                self.logger.info(f"Snapshot wurde mit symlinks={row[0]} erstellt und wird verworfen")
+            self.connection.execute("DELETE FROM directories")
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('symlinks', ?)", (symlinks,))
+            self.connection.commit()
+
+    def get(self, directory, mtime_ns):
+        """
+        Liefert den gespeicherten Inhalt eines Verzeichnisses, sofern es unverändert ist.
+
+        Args:
+            directory (str): Pfad des Verzeichnisses.
+            mtime_ns (int): Aktuelle mtime_ns des Verzeichnisses.
+
+        Returns:
+            tuple: (Namen der Unterverzeichnisse, Liste von (Name, Größe, mtime, Gerät, Inode),
+                Namen der übersprungenen Einträge) oder None, wenn das Verzeichnis neu
+                gelesen werden muss.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT mtime_ns, scanned_ns, subdirectories, file_names, file_stats, skipped_names "
+                "FROM directories WHERE path = ?",
+                (os.fsencode(directory),)
+            ).fetchone()
+            if row is None or row[0] != mtime_ns or row[0] >= row[1] - RACY_WINDOW_NS:
+                return None
+            self.reused_directories += 1
+        files = [
+            (name, *stats) for name, stats in zip(_split_names(row[3]), FILE_STAT_RECORD.iter_unpack(row[4]))
+        ]
+        return _split_names(row[2]), files, _split_names(row[5])
+
+    def put(self, directory, mtime_ns, scanned_ns, subdirectories, files, skipped=()):
+        """
+        Speichert den Inhalt eines gerade gelesenen Verzeichnisses.
+
+        Args:
+            directory (str): Pfad des Verzeichnisses.
+            mtime_ns (int): mtime_ns des Verzeichnisses vor dem Lesen.
+            scanned_ns (int): Zeitpunkt des Lesens in Nanosekunden.
+            subdirectories (list): Namen der Unterverzeichnisse.
+            files (list): (Name, Größe, mtime, Gerät, Inode) je Datei.
+            skipped (list): Namen der vom Scanner übersprungenen Einträge.
+        """
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO directories "
+                "(path, mtime_ns, scanned_ns, subdirectories, file_names, file_stats, skipped_names) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    os.fsencode(directory), mtime_ns, scanned_ns, _join_names(subdirectories),
+                    _join_names(name for name, *_ in files),
+                    b"".join(FILE_STAT_RECORD.pack(*stats) for _, *stats in files),
+                    _join_names(skipped)
+                )
+            )
+            self.scanned_directories += 1
+            self._pending += 1
+            if self._pending >= self.commit_interval:
+                self.connection.commit()
+                self._pending = 0
+
+    def invalidate(self, directory):
+        """
+        Entfernt ein einzelnes Verzeichnis, sodass es beim nächsten Scan neu gelesen wird.
+
+        Nötig, wenn sich eine Datei geändert hat, ohne dass sich die mtime des
+        Verzeichnisses ändert (z. B. neuer Inhalt einer bestehenden Datei).
+
+        Args:
+            directory (str): Pfad des Verzeichnisses.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM directories WHERE path = ?", (os.fsencode(directory),))
+            self._pending += 1
+
+    def prune(self, root, seen):
+        """
+        Entfernt Verzeichnisse unterhalb von root, die beim letzten Scan nicht mehr vorkamen.
+
+        Args:
+            root (str): Wurzelverzeichnis des Scans.
+            seen (set): Beim Scan gelesene Verzeichnisse.
+        """
+        prefix = os.fsencode(root.rstrip(os.sep) + os.sep)
+        with self.lock:
+            stale = [
+                (path,) for (path,) in self.connection.execute(
+                    "SELECT path FROM directories WHERE path = ? OR substr(path, 1, ?) = ?",
+                    (os.fsencode(root), len(prefix), prefix)
+                )
+                if os.fsdecode(path) not in seen
+            ]
+            self.connection.executemany("DELETE FROM directories WHERE path = ?", stale)
+            self._pending += len(stale)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM directories").fetchone()[0]
+
+    def flush(self):
+        """
+        Schreibt ausstehende Einträge auf die Festplatte.
+        """
+        with self.lock:
+            if self._pending:
+                self.connection.commit()
+                self._pending = 0
+
+    def close(self):
+        """
+        Schreibt ausstehende Einträge und schließt den Snapshot.
+        """
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
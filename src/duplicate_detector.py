@@ -1,8 +1,28 @@
 import os
 import sys
 import logging
+import shutil
 from pathlib import Path
-import hashlib
+import time
+import heapq
+import struct
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from src.hashing import (
+    DEFAULT_HASH_ALGORITHM, MAX_CHUNK_SIZE, get_hasher, hash_file, hash_file_ranges, is_cryptographic,
+    read_block, read_throttle
+)
+from src.hash_manifest import HashManifest
+from src.scan_checkpoint import ScanCheckpoint
+from src.io_throttle import configure_worker
+from src.file_index import FileIndex
+from src.scanner import DirectoryScanner
 
 # Konfiguration des Logging-Systems
 logging.basicConfig(
@@ -15,24 +35,410 @@ logging.basicConfig(
 
 logger = logging.getLogger("duplicate_detector")
 
+# Größe der Stichproben (Anfang, Mitte, Ende) für die Vorfilterung in Bytes
+DEFAULT_SAMPLE_SIZE = 16 * 1024
+
+# Verfügbare Ausführungsarten für die Hash-Berechnung
+EXECUTORS = ("serial", "thread", "process")
+
+# Maximale Anzahl von Dateien, die gemeinsam gehasht werden, bevor Gruppen ausgegeben werden
+DEFAULT_BATCH_SIZE = 4096
+
+# Reihenfolge, in der Größengruppen gehasht werden: wie gefunden oder größte Einsparung zuerst
+SCHEDULES = ("scan", "reclaim")
+
+# Verfügbare Vergleichsstrategien für Kandidatengruppen
+COMPARE_STRATEGIES = ("auto", "hash", "lockstep")
+
+# Grenzen, ab denen "auto" Dateien blockweise statt per Hash vergleicht
+LOCKSTEP_MAX_FILES = 4
+LOCKSTEP_MIN_SIZE = 1024 * 1024
+
+# Erster Block des blockweisen Vergleichs; jeder weitere ist doppelt so groß
+LOCKSTEP_FIRST_BLOCK = 64 * 1024
+
+# Maximale Anzahl gleichzeitig geöffneter Dateien je blockweisem Vergleich; größere
+# Gruppen werden gehasht, damit auch parallele Vergleiche unter dem Limit offener Dateien bleiben
+LOCKSTEP_MAX_OPEN_FILES = 16
+
+# Mögliche Aktionen für Duplikate in remove_duplicates
+REMOVE_ACTIONS = ("delete", "hardlink", "reflink")
+
+# Maximale Anzahl von Versuchen, einen freien temporären Namen für einen Link zu finden
+TEMP_LINK_ATTEMPTS = 100
+
+# Kopf eines Datensatzes in den Sortierläufen: Größe, Gerät, Inode, Länge des Pfads
+RUN_RECORD_HEADER = struct.Struct("<QQQI")
+
+# Geschätzter Speicherbedarf eines Datensatzes im Arbeitsspeicher zusätzlich zum Pfad in Bytes
+RUN_RECORD_OVERHEAD = 200
+
+# Maximale Anzahl gleichzeitig zusammengeführter Sortierläufe
+MERGE_FAN_IN = 64
+
+# Anzahl der Dateien bzw. Größengruppen zwischen zwei Prüfungen des Zeitbudgets
+DEADLINE_CHECK_INTERVAL = 1024
+
+# Trennzeichen zwischen Archiv und Mitglied in den Pfaden virtueller Dateien
+ARCHIVE_MEMBER_SEPARATOR = "!/"
+
+# ioctl-Befehl zum Klonen einer Datei per Copy-on-Write (Linux, btrfs/XFS)
+FICLONE = 0x40049409
+
+def _calculate_sample_hash(file_path, size, sample_size, algorithm=DEFAULT_HASH_ALGORITHM):
+    """
+    Berechnet den Hash über Anfang, Mitte und Ende einer Datei.
+    
+    Modulweite Funktion, damit sie auch in einem ProcessPoolExecutor ausgeführt werden kann.
+    
+    Args:
+        file_path (Path): Pfad zur Datei.
+        size (int): Dateigröße in Bytes (mindestens drei Stichproben groß).
+        sample_size (int): Größe jeder Stichprobe in Bytes.
+        algorithm (str): Name des Hash-Algorithmus aus der Registry.
+        
+    Returns:
+        str: Hexadezimaler Hash-Wert der Stichproben.
+    """
+    offsets = (0, (size - sample_size) // 2, size - sample_size)
+    return hash_file_ranges(file_path, [(offset, sample_size) for offset in offsets], algorithm)
+
+def _calculate_file_hash(file_path, chunk_size=None, algorithm=DEFAULT_HASH_ALGORITHM):
+    """
+    Berechnet den Hash einer Datei.
+    
+    Modulweite Funktion, damit sie auch in einem ProcessPoolExecutor ausgeführt werden kann.
+    
+    Args:
+        file_path (Path): Pfad zur Datei.
+        chunk_size (int, optional): Größe der zu lesenden Chunks in Bytes; standardmäßig adaptiv.
+        algorithm (str): Name des Hash-Algorithmus aus der Registry.
+        
+    Returns:
+        str: Hexadezimaler Hash-Wert.
+    """
+    return hash_file(file_path, algorithm, chunk_size)
+
+def _read_exact(handle, size):
+    """
+    Liest genau size Bytes, sofern das Dateiende nicht vorher erreicht wird.
+    
+    Ungepufferte Lesevorgänge dürfen weniger Bytes liefern als angefordert;
+    dann wird bis zur gewünschten Länge weitergelesen.
+    
+    Args:
+        handle (file): Ungepuffert geöffnete Datei.
+        size (int): Anzahl zu lesender Bytes.
+        
+    Returns:
+        bytes: Gelesene Bytes; kürzer als size nur am Dateiende.
+    """
+    block = read_block(handle, size)
+    if len(block) == size or not block:
+        return block
+    
+    parts = [block]
+    remaining = size - len(block)
+    while remaining:
+        part = read_block(handle, remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b"".join(parts)
+
+def _compare_lockstep(file_paths, size, algorithm=DEFAULT_HASH_ALGORITHM):
+    """
+    Vergleicht gleich große Dateien blockweise im Gleichschritt.
+    
+    Alle Dateien werden parallel gelesen. Unterscheiden sich die Blöcke, wird die
+    Gruppe aufgeteilt; Teilgruppen mit nur einer Datei werden nicht weiter gelesen.
+    Die Blöcke beginnen klein und wachsen, damit früh abweichende Dateien kaum
+    gelesen werden. Für bestätigte Gruppen wird nebenbei der Hash des gemeinsamen
+    Inhalts berechnet. Dateien, deren aktuelle Größe nicht size entspricht oder die
+    vor size enden, gelten als abweichend.
+    
+    Modulweite Funktion, damit sie auch in einem ProcessPoolExecutor ausgeführt werden kann.
+    
+    Args:
+        file_paths (list): Pfade der zu vergleichenden Dateien.
+        size (int): Gemeinsame Dateigröße in Bytes.
+        algorithm (str): Name des Hash-Algorithmus für bestätigte Gruppen.
+        
+    Returns:
+        tuple: (Liste von (Hash, Indizes der identischen Dateien), gelesene Bytes).
+    """
+    handles = []
+    try:
+        for file_path in file_paths:
+            handles.append(open(file_path, 'rb', buffering=0))
+        
+        # Nur Dateien, die noch die erwartete Größe haben, nehmen am Vergleich teil
+        members = [index for index, handle in enumerate(handles) if os.fstat(handle.fileno()).st_size == size]
+        groups = [(get_hasher(algorithm), members)] if len(members) > 1 else []
+        bytes_read = 0
+        block_size = LOCKSTEP_FIRST_BLOCK
+        offset = 0
+        
+        while offset < size and groups:
+            length = min(block_size, size - offset)
+            next_groups = []
+            for hasher, members in groups:
+                # Teile die Gruppe nach dem Inhalt des aktuellen Blocks auf
+                splits = []
+                for index in members:
+                    block = _read_exact(handles[index], length)
+                    bytes_read += len(block)
+                    if len(block) != length:
+                        # Die Datei wurde seit der Gruppierung gekürzt
+                        continue
+                    for split_block, split_members in splits:
+                        if split_block == block:
+                            split_members.append(index)
+                            break
+                    else:
+                        splits.append((block, [index]))
+                
+                splits = [(block, split_members) for block, split_members in splits if len(split_members) > 1]
+                for position, (block, split_members) in enumerate(splits):
+                    split_hasher = hasher if position == len(splits) - 1 else hasher.copy()
+                    split_hasher.update(block)
+                    next_groups.append((split_hasher, split_members))
+            
+            groups = next_groups
+            offset += length
+            block_size = min(block_size * 2, MAX_CHUNK_SIZE)
+        
+        # Während des Vergleichs verlängerte Dateien stimmen nicht mehr überein
+        results = []
+        for hasher, members in groups:
+            members = [index for index in members if os.fstat(handles[index].fileno()).st_size == size]
+            if len(members) > 1:
+                results.append((hasher.hexdigest(), members))
+        return results, bytes_read
+    finally:
+        for handle in handles:
+            handle.close()
+
+def _write_run(run_path, records):
+    """
+    Sortiert Datensätze und schreibt sie als Sortierlauf auf die Festplatte.
+    
+    Args:
+        run_path (str): Pfad der Laufdatei.
+        records (list): (Größe, Gerät, Inode, Pfad als Bytes)-Tupel.
+        
+    Returns:
+        int: Geschriebene Bytes.
+    """
+    records.sort()
+    written = 0
+    with open(run_path, "wb") as f:
+        for size, device, inode, path in records:
+            f.write(RUN_RECORD_HEADER.pack(size, device, inode, len(path)))
+            f.write(path)
+            written += RUN_RECORD_HEADER.size + len(path)
+    return written
+
+def _read_run(run_path, buffer_size):
+    """
+    Liest die Datensätze eines Sortierlaufs der Reihe nach.
+    
+    Args:
+        run_path (str): Pfad der Laufdatei.
+        buffer_size (int): Größe des Lesepuffers in Bytes.
+        
+    Yields:
+        tuple: (Größe, Gerät, Inode, Pfad als Bytes).
+    """
+    with open(run_path, "rb", buffering=buffer_size) as f:
+        while True:
+            header = f.read(RUN_RECORD_HEADER.size)
+            if not header:
+                return
+            size, device, inode, path_length = RUN_RECORD_HEADER.unpack(header)
+            yield size, device, inode, f.read(path_length)
+
+def _hash_zip_members(archive_path, members, algorithm=DEFAULT_HASH_ALGORITHM):
+    """
+    Hasht einzelne Mitglieder eines ZIP-Archivs beim Entpacken im Arbeitsspeicher.
+    
+    Es werden nur die angegebenen Mitglieder blockweise dekomprimiert; das Archiv
+    wird weder vollständig gelesen noch auf die Festplatte entpackt.
+    
+    Modulweite Funktion, damit sie auch in einem ProcessPoolExecutor ausgeführt werden kann.
+    
+    Args:
+        archive_path (Path): Pfad zum Archiv.
+        members (list): Namen der Mitglieder.
+        algorithm (str): Name des Hash-Algorithmus aus der Registry.
+        
+    Returns:
+        list: Hexadezimaler Hash-Wert je Mitglied.
+    """
+    digests = []
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in members:
+            hasher = get_hasher(algorithm)
+            with archive.open(member) as f:
+                while True:
+                    block = read_block(f, MAX_CHUNK_SIZE)
+                    if not block:
+                        break
+                    hasher.update(block)
+            digests.append(hasher.hexdigest())
+    return digests
+
+def _reflink(source_path, target_path):
+    """
+    Legt target_path als Copy-on-Write-Klon von source_path an (FICLONE).
+    
+    Args:
+        source_path (Path): Quelldatei.
+        target_path (Path): Neu anzulegende Datei.
+    """
+    if fcntl is None:
+        raise OSError("Reflinks werden auf diesem System nicht unterstützt")
+    
+    with open(source_path, 'rb') as source, open(target_path, 'xb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.unlink(target_path)
+            raise
+
+def _link_to_temp(create, source_path, target_path):
+    """
+    Legt einen Link auf source_path unter einem freien, zufälligen Namen neben target_path an.
+    
+    Vorhandene Dateien werden nie überschrieben; ist ein Name bereits belegt, wird
+    ein neuer gewählt.
+    
+    Args:
+        create (callable): os.link oder _reflink; muss mit FileExistsError scheitern,
+            wenn das Ziel bereits existiert.
+        source_path (Path): Quelldatei.
+        target_path (Path): Datei, die später durch den Link ersetzt werden soll.
+        
+    Returns:
+        Path: Angelegte temporäre Datei.
+    """
+    for _ in range(TEMP_LINK_ATTEMPTS):
+        temp_path = Path(tempfile.mktemp(prefix=f".{target_path.name}.", suffix=".dedup-tmp",
+                                         dir=target_path.parent))
+        try:
+            create(source_path, temp_path)
+        except FileExistsError:
+            continue
+        return temp_path
+    raise FileExistsError(f"Kein freier temporärer Name neben {target_path} gefunden")
+
 class DuplicateDetector:
     """
     Klasse zur Erkennung von Duplikaten in Dateisystemen.
     """
-    def __init__(self):
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE, executor="serial", max_workers=None, hash_cache=None,
+                 batch_size=DEFAULT_BATCH_SIZE, compare_strategy="auto", memory_budget=None, spill_directory=None,
+                 io_throttle=None, nice_increment=None, io_class=None, schedule="scan", scanner=None):
         """
         Initialisiert den DuplicateDetector.
+        
+        Args:
+            sample_size (int): Größe jeder Stichprobe (Anfang, Mitte, Ende) in Bytes,
+                die vor dem vollständigen Hash verglichen wird.
+            executor (str): Ausführungsart der Hash-Berechnung: "serial", "thread"
+                (E/A-lastig, z. B. NVMe/RAID) oder "process" (CPU-lastig, Daten im Cache).
+            max_workers (int, optional): Maximale Anzahl paralleler Worker.
+            hash_cache (HashCache, optional): Persistenter Cache für bereits berechnete Hashes.
+            batch_size (int): Maximale Anzahl von Dateien je Hash-Stapel in iter_duplicates().
+            compare_strategy (str): Vergleich der Kandidatengruppen: "hash", "lockstep"
+                (blockweiser Vergleich ohne Hash) oder "auto" (lockstep für kleine
+                Gruppen großer Dateien). Gruppen mit mehr als LOCKSTEP_MAX_OPEN_FILES
+                Dateien werden immer gehasht.
+            memory_budget (int, optional): Speicherbudget in Bytes für die Größengruppierung.
+                Ist es gesetzt, werden die Dateien per externer Sortierung über Laufdateien
+                auf der Festplatte gruppiert statt vollständig im Arbeitsspeicher.
+            spill_directory (str, optional): Verzeichnis für die Laufdateien; standardmäßig
+                das temporäre Verzeichnis des Systems.
+            io_throttle (IOThrottle, optional): Begrenzung von Bandbreite und Lesevorgängen
+                beim Hashen. Im Prozesspool erhält jeder Prozess einen gleichen Anteil der Limits;
+                die Zähler in "io" erfassen dann nur Lesevorgänge des Hauptprozesses.
+            nice_increment (int, optional): Erhöhung des nice-Werts der Pool-Worker.
+            io_class (str, optional): E/A-Prioritätsklasse der Pool-Worker ("idle",
+                "best-effort" oder "realtime"; nur Linux).
+            schedule (str): Reihenfolge der Größengruppen: "scan" (wie gefunden) oder
+                "reclaim" (absteigend nach möglicher Einsparung Größe × (Anzahl − 1)).
+                "reclaim" hält alle Kandidatengruppen gleichzeitig im Speicher.
+            scanner (DirectoryScanner, optional): Scanner für die Verzeichnisbäume, z. B. mit
+                Tiefenbegrenzung oder Filtern; standardmäßig einer, der symbolischen Links
+                auf Dateien, aber nicht auf Verzeichnisse folgt.
         """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unbekannter Executor: {executor} (erlaubt: {', '.join(EXECUTORS)})")
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unbekannte Reihenfolge: {schedule} (erlaubt: {', '.join(SCHEDULES)})")
+        if compare_strategy not in COMPARE_STRATEGIES:
+            raise ValueError(
+                f"Unbekannte Vergleichsstrategie: {compare_strategy} (erlaubt: {', '.join(COMPARE_STRATEGIES)})"
+            )
+        
         self.logger = logger
+        self.sample_size = sample_size
+        self.executor = executor
+        self.max_workers = max_workers
+        self.hash_cache = hash_cache
+        self.batch_size = batch_size
+        self.compare_strategy = compare_strategy
+        self.memory_budget = memory_budget
+        self.spill_directory = spill_directory
+        self.io_throttle = io_throttle
+        self.nice_increment = nice_increment
+        self.io_class = io_class
+        self.schedule = schedule
+        self.scanner = scanner or DirectoryScanner()
+        
+        if executor == "serial" and (nice_increment or io_class):
+            self.logger.warning("Prioritäten gelten nur für Pool-Worker (executor 'thread' oder 'process')")
     
-    def find_duplicates(self, directory_path, use_content_hash=True, recursive=True):
+    def find_duplicates(self, directory_path, use_content_hash=True, recursive=True,
+                        hash_algorithm=DEFAULT_HASH_ALGORITHM, confirm_algorithm=None, reference_paths=None,
+                        checkpoint_path=None, resume=False, compare_directories=False, scan_archives=False,
+                        time_budget=None):
         """
-        Findet Duplikate in einem Verzeichnis.
+        Findet Duplikate in einem oder mehreren Verzeichnissen.
+        
+        Sammelt alle Gruppen aus iter_duplicates() und ergänzt die Summen. Mit
+        Referenzverzeichnissen zählen nur die Dateien aus directory_path als Duplikate.
+        Mit einem Checkpoint wird der Fortschritt nach jedem Stapel gespeichert und die
+        Checkpoint-Datei nach erfolgreichem Abschluss gelöscht.
+        
+        Mit compare_directories werden zusätzlich vollständig identische Verzeichnisse
+        gemeldet (größte zuerst); Dateigruppen innerhalb ihrer überzähligen Kopien
+        werden aus duplicate_groups entfernt. total_duplicates und wasted_space
+        zählen weiterhin alle Dateien.
+        
+        Mit scan_archives werden Mitglieder von ZIP-Archiven als virtuelle Dateien
+        ("archiv.zip!/pfad/datei") in die Duplikatgruppen aufgenommen und in
+        total_duplicates und wasted_space mit ihrer unkomprimierten Größe gezählt.
         
         Args:
-            directory_path (str): Pfad zum zu analysierenden Verzeichnis.
+            directory_path (str | list): Pfad oder Liste von Pfaden der zu analysierenden Verzeichnisse.
             use_content_hash (bool): Ob der Inhalt der Dateien für den Vergleich gehasht werden soll.
             recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            hash_algorithm (str): Hash-Algorithmus aus der Registry (z. B. "sha256",
+                "blake2b" oder ein schneller Vorfilter wie "crc32"/"xxh64").
+            confirm_algorithm (str, optional): Starker Algorithmus, mit dem Gruppen des
+                Vorfilters abschließend bestätigt werden.
+            reference_paths (list, optional): Referenzverzeichnisse (z. B. ein Archiv). Es werden
+                nur Gruppen gemeldet, deren Dateien in directory_path bereits in einer Referenz existieren.
+            checkpoint_path (str, optional): Pfad zur Checkpoint-Datei. Ist er angegeben (oder
+                resume gesetzt), wird der Suchzustand laufend gespeichert.
+            resume (bool): Ob eine abgebrochene Suche mit denselben Parametern fortgesetzt werden
+                soll; ohne checkpoint_path wird der Standardpfad verwendet.
+            compare_directories (bool): Ob identische Verzeichnisse per Merkle-Hash erkannt werden.
+            scan_archives (bool): Ob ZIP-Archive über ihr zentrales Verzeichnis einbezogen werden.
+            time_budget (float, optional): Zeitbudget in Sekunden; siehe iter_duplicates().
             
         Returns:
             dict: Informationen über gefundene Duplikate.
@@ -42,126 +448,1478 @@ class DuplicateDetector:
         result = {
             "total_duplicates": 0,
             "duplicate_groups": [],
-            "wasted_space": 0
+            "wasted_space": 0,
+            **self._new_stats()
         }
         
+        checkpoint = None
+        if checkpoint_path is not None or resume:
+            checkpoint = ScanCheckpoint(checkpoint_path)
+        
+        inventory = None
+        if compare_directories:
+            result["duplicate_directories"] = []
+            result["collapsed_files"] = 0
+        if scan_archives:
+            result["archive_members"] = 0
+        if compare_directories or scan_archives:
+            if use_content_hash:
+                inventory = FileIndex()
+            else:
+                self.logger.warning(
+                    "Verzeichnisvergleich und Archivsuche benötigen Inhaltshashes (use_content_hash=True)"
+                )
+        
         try:
-            directory = Path(directory_path)
-            if not directory.exists() or not directory.is_dir():
-                self.logger.error(f"Verzeichnis existiert nicht oder ist kein Verzeichnis: {directory_path}")
-                return result
+            for group in self.iter_duplicates(directory_path, use_content_hash, recursive, hash_algorithm,
+                                              confirm_algorithm, stats=result, reference_paths=reference_paths,
+                                              checkpoint=checkpoint, resume=resume, inventory=inventory,
+                                              time_budget=time_budget):
+                result["duplicate_groups"].append(group)
+                # Zähle Duplikate (alle außer dem ersten bzw. alle Kandidaten in jeder Gruppe)
+                redundant = self._count_redundant(group)
+                result["total_duplicates"] += redundant
+                # Berechne verschwendeten Speicherplatz
+                result["wasted_space"] += group["size"] * redundant
             
-            # Sammle alle Dateien
-            files = []
-            if recursive:
-                for file_path in directory.glob("**/*"):
-                    if file_path.is_file():
-                        files.append(file_path)
+            # Nach erschöpftem Zeitbudget sind Dateiliste und Gruppen unvollständig
+            if inventory and not result["time_budget_exhausted"]:
+                if scan_archives:
+                    role_roots = None
+                    if reference_paths is not None:
+                        role_roots = self._normalize_roots(directory_path, reference_paths)[1]
+                    self._match_archive_members(
+                        inventory, result, hash_algorithm, confirm_algorithm or hash_algorithm, role_roots
+                    )
+                if compare_directories:
+                    self._compare_directories(directory_path, reference_paths, inventory, result, hash_algorithm)
+            
+            self.logger.info(f"Duplikatsuche abgeschlossen: {result['total_duplicates']} Duplikate gefunden")
+            self.logger.info(f"Verschwendeter Speicherplatz: {self._format_size(result['wasted_space'])}")
+            self.logger.info(
+                f"Gelesene Daten: {self._format_size(result['bytes_read']['sample_hash'])} (Stichproben), "
+                f"{self._format_size(result['bytes_read']['full_hash'])} (vollständige Hashes), "
+                f"{self._format_size(result['bytes_read']['confirm_hash'])} (Bestätigung), "
+                f"{self._format_size(result['bytes_read']['lockstep'])} (blockweiser Vergleich)"
+            )
+            self.logger.info(
+                f"Durchsatz: {result['throughput']['files_per_second']:.1f} Dateien/s, "
+                f"{result['throughput']['mb_per_second']:.1f} MB/s"
+            )
+            if result["io"]:
+                self.logger.info(
+                    f"Drosselung: {result['io']['throttled_seconds']:.1f} s gewartet, "
+                    f"{result['io']['backoffs']} Mal adaptiv verringert"
+                )
+            
+            if result["time_budget_exhausted"]:
+                self.logger.warning("Zeitbudget erschöpft, nicht alle Größengruppen wurden verglichen")
+            elif checkpoint is not None:
+                checkpoint.remove()
+                checkpoint = None
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Fehler bei der Duplikatsuche: {e}")
+            return result
+        
+        finally:
+            # Nach einem Abbruch bleibt der Checkpoint für resume=True erhalten
+            if checkpoint is not None:
+                checkpoint.close()
+    
+    def iter_duplicates(self, directory_path, use_content_hash=True, recursive=True,
+                        hash_algorithm=DEFAULT_HASH_ALGORITHM, confirm_algorithm=None, stats=None,
+                        reference_paths=None, checkpoint=None, resume=False, inventory=None,
+                        time_budget=None):
+        """
+        Liefert Duplikatgruppen, sobald ihre Hashes bestätigt sind.
+        
+        Alle Verzeichnisse werden in einem Durchlauf gemeinsam nach Größe gruppiert,
+        sodass auch Kopien zwischen verschiedenen Verzeichnisbäumen gefunden werden
+        und jede Größenklasse nur einmal gelesen wird. Die Größengruppen werden in
+        Stapeln von höchstens batch_size Dateien gehasht. Nach jedem Stapel werden
+        dessen Gruppen ausgegeben, sodass Aufrufer bereits während der Hash-Phase
+        mit der Auswertung beginnen können und nur die Hash-Zustände eines Stapels
+        gleichzeitig im Speicher liegen.
+        
+        Die erste Gruppe entsteht erst nach dem vollständigen Verzeichnisdurchlauf:
+        Ob eine Datei eine gleich große Gegenstelle hat, steht erst fest, wenn alle
+        Dateien bekannt sind. Bis dahin wächst der Speicherbedarf mit der Anzahl der
+        Dateien (spaltenweise im FileIndex). Mit memory_budget wird die
+        Größengruppierung per externer Sortierung auf die Festplatte ausgelagert,
+        sodass der Speicher auch während des Durchlaufs begrenzt bleibt.
+        
+        Args:
+            directory_path (str | list): Pfad oder Liste von Pfaden der zu analysierenden Verzeichnisse.
+            use_content_hash (bool): Ob der Inhalt der Dateien für den Vergleich gehasht werden soll.
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            hash_algorithm (str): Hash-Algorithmus aus der Registry.
+            confirm_algorithm (str, optional): Starker Algorithmus für die Bestätigung.
+            stats (dict, optional): Wird laufend mit gelesenen Bytes, Durchsatz,
+                Cache-Treffern und Hardlink-Gruppen aktualisiert.
+            reference_paths (list, optional): Referenzverzeichnisse. Ist die Liste angegeben,
+                erhält jede Datei eine Rolle ("reference" oder "candidate"), und es werden nur
+                Gruppen mit mindestens einer Datei jeder Rolle gehasht und ausgegeben.
+            checkpoint (ScanCheckpoint, optional): Speichert Kandidatengruppen, Cursor,
+                ausgegebene Gruppen und Statistik nach jedem Stapel. Ohne eigenen Hash-Cache
+                werden die Hashes im Checkpoint zwischengespeichert.
+            resume (bool): Ob eine im Checkpoint gespeicherte Suche mit denselben Parametern
+                fortgesetzt wird. Die bereits ausgegebenen Gruppen werden zuerst erneut
+                ausgegeben, sodass das Ergebnis dem einer ununterbrochenen Suche entspricht.
+            inventory (FileIndex, optional): Erhält jede gefundene Datei, z. B. für den
+                Vergleich ganzer Verzeichnisse.
+            time_budget (float, optional): Zeitbudget in Sekunden ab Beginn der Suche. Es wird
+                auch während des Verzeichnisdurchlaufs, der Größengruppierung und der
+                Sortierung geprüft. Ist es erschöpft, wird abgebrochen und
+                stats["time_budget_exhausted"] gesetzt. In der Hash-Phase geschieht das nach
+                dem laufenden Stapel, und ein Checkpoint bleibt erhalten; vorher sind die
+                Kandidatengruppen unvollständig und werden nicht gespeichert. Zusammen mit
+                schedule="reclaim" findet auch eine kurze Suche den größten Teil des
+                verschwendeten Speichers; innerhalb eines Stapels werden die Gruppen dann
+                nach ihrer tatsächlichen Einsparung ausgegeben.
+            
+        Yields:
+            dict: Duplikatgruppe mit "hash" (bei Inhaltsvergleich), "size" und "files".
+        """
+        if stats is None:
+            stats = self._new_stats()
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        
+        if use_content_hash and not is_cryptographic(hash_algorithm) and confirm_algorithm is None:
+            self.logger.warning(
+                f"{hash_algorithm} ist nicht kollisionsresistent; Gruppen werden nicht bestätigt "
+                f"(confirm_algorithm setzen, z. B. 'sha256')"
+            )
+        
+        scan_roots, role_roots = self._normalize_roots(directory_path, reference_paths)
+        if not scan_roots:
+            return
+        
+        # Ohne Inhaltsvergleich gibt es keinen Fortschritt, der gesichert werden müsste
+        if not use_content_hash:
+            checkpoint = None
+        
+        parameters = {
+            "roots": [str(directory) for directory in scan_roots],
+            "reference_paths": [str(path) for path in reference_paths] if reference_paths is not None else None,
+            "recursive": recursive,
+            "hash_algorithm": hash_algorithm,
+            "confirm_algorithm": confirm_algorithm,
+            "sample_size": self.sample_size
+        }
+        resumed = checkpoint is not None and resume and checkpoint.matches(parameters)
+        
+        roles = None
+        if resumed:
+            self.logger.info("Setze abgebrochene Duplikatsuche fort")
+            stats.update(checkpoint.load_stats() or {})
+            stats["time_budget_exhausted"] = False
+            if inventory is not None:
+                # Die Dateiliste wird nicht im Checkpoint gespeichert und erneut eingelesen
+                self._collect_files(scan_roots, recursive, inventory, stats, deadline)
+            for group in checkpoint.iter_completed_groups():
+                yield group
+            candidate_groups = checkpoint.iter_pending_groups()
+            if reference_paths is not None:
+                roles = {}
+                candidate_groups = self._filter_by_roles(candidate_groups, roles, role_roots)
+        else:
+            # Finde Gruppen mit mehr als einer Datei gleicher Größe
+            if self.memory_budget is None:
+                index = self._collect_files(scan_roots, recursive, inventory, stats, deadline)
+                if stats["time_budget_exhausted"]:
+                    return
+                candidate_groups = self._iter_size_groups(index, stats)
             else:
-                for file_path in directory.glob("*"):
-                    if file_path.is_file():
-                        files.append(file_path)
+                candidate_groups = self._iter_external_size_groups(
+                    scan_roots, recursive, stats, inventory, deadline
+                )
+            if deadline is not None:
+                candidate_groups = self._until_deadline(candidate_groups, deadline, stats)
             
-            self.logger.info(f"Gefundene Dateien: {len(files)}")
+            # Mit Referenzverzeichnissen genügen Gruppen, die beide Rollen enthalten
+            if reference_paths is not None:
+                roles = {}
+                candidate_groups = self._filter_by_roles(candidate_groups, roles, role_roots)
             
-            # Gruppiere Dateien nach Größe (erster Schritt zur Duplikaterkennung)
-            size_groups = {}
-            for file_path in files:
-                size = file_path.stat().st_size
-                if size == 0:  # Überspringe leere Dateien
+            # Größte mögliche Einsparung zuerst
+            if self.schedule == "reclaim":
+                candidate_groups = sorted(
+                    candidate_groups, key=lambda group: group[0] * (len(group[1]) - 1), reverse=True
+                )
+                if stats["time_budget_exhausted"]:
+                    return
+            
+            if checkpoint is not None:
+                # Die beim Gruppieren ergänzten Werte (z. B. Hardlink-Gruppen) werden sofort
+                # gesichert, damit sie auch ohne erledigten Stapel fortgesetzt werden
+                checkpoint.start(parameters, candidate_groups, {key: stats[key] for key in self._new_stats()})
+                if stats["time_budget_exhausted"]:
+                    # Unvollständige Kandidatengruppen dürfen nicht fortgesetzt werden
+                    checkpoint.discard()
+                    return
+                candidate_groups = checkpoint.iter_pending_groups()
+        
+        if not use_content_hash:
+            # Betrachte alle Dateien mit gleicher Größe als potenzielle Duplikate
+            for size, size_files in candidate_groups:
+                yield self._make_duplicate_group(size_files, size, roles=roles)
+            return
+        
+        # Ohne eigenen Hash-Cache werden die Hashes im Checkpoint zwischengespeichert;
+        # die Vergleichsstrategie richtet sich weiterhin nur nach self.hash_cache
+        hash_cache = self.hash_cache
+        if checkpoint is not None and hash_cache is None:
+            hash_cache = checkpoint.hash_cache
+        
+        # Gruppiere Dateien stapelweise nach Inhaltshash (Stichprobe, dann vollständig)
+        start_time = time.perf_counter()
+        previous_elapsed = stats["throughput"]["elapsed_seconds"]
+        with self._create_executor() as executor:
+            for batch in self._iter_batches(candidate_groups):
+                if self._deadline_passed(deadline, stats):
+                    break
+                
+                hash_groups = self._group_by_content(
+                    batch, stats, executor, hash_algorithm, confirm_algorithm, hash_cache
+                )
+                if self.schedule == "reclaim":
+                    # Nach dem Hashen ist die tatsächliche Einsparung jeder Gruppe bekannt
+                    hash_groups.sort(key=lambda group: group[0] * (len(group[2]) - 1), reverse=True)
+                self._update_throughput(stats, previous_elapsed + time.perf_counter() - start_time)
+                if hash_cache is not None:
+                    hash_cache.flush()
+                
+                emitted = []
+                for size, file_hash, hash_files in hash_groups:
+                    if roles is not None and not self._has_both_roles(hash_files, roles):
+                        continue
+                    group = self._make_duplicate_group(hash_files, size, file_hash, roles)
+                    emitted.append(group)
+                    yield group
+                
+                # Der Stapel gilt erst als erledigt, wenn der Aufrufer alle Gruppen erhalten hat
+                if checkpoint is not None:
+                    checkpoint.complete_batch(
+                        len(batch), emitted, {key: stats[key] for key in self._new_stats()}
+                    )
+    
+    def _match_archive_members(self, inventory, result, hash_algorithm, group_algorithm, role_roots=None):
+        """
+        Findet Duplikate zwischen losen Dateien und Mitgliedern von ZIP-Archiven.
+        
+        Größe und CRC-32 der Mitglieder stammen aus dem zentralen Verzeichnis der
+        Archive. Lose Dateien passender Größe werden per CRC-32 verglichen; nur bei
+        übereinstimmender Größe und CRC werden die betroffenen Mitglieder dekomprimiert
+        und wie die losen Dateien mit dem Algorithmus der Duplikatgruppen gehasht.
+        Dateien vorhandener Duplikatgruppen werden nicht erneut gelesen: Ihr Hash
+        steht in der Gruppe, und für die CRC genügt eine Datei je Gruppe.
+        Bestätigte Mitglieder werden vorhandenen Gruppen mit gleichem Hash hinzugefügt
+        oder bilden neue Gruppen. total_duplicates und wasted_space werden um die
+        hinzugekommenen Dateien ergänzt; Mitglieder zählen dabei mit ihrer
+        unkomprimierten Größe.
+        
+        Args:
+            inventory (FileIndex): Alle Dateien der Suche.
+            result (dict): Ergebnis von find_duplicates; wird ergänzt.
+            hash_algorithm (str): Algorithmus, mit dem lose Dateien bereits gehasht wurden.
+            group_algorithm (str): Algorithmus der Hash-Werte in den Duplikatgruppen.
+            role_roots (list, optional): (Verzeichnis, Rolle)-Paare der Suche mit
+                Referenzverzeichnissen; Mitglieder erhalten die Rolle ihres Archivs, und
+                neue Gruppen werden wie in iter_duplicates nur mit beiden Rollen gebildet.
+        """
+        # Zentrale Verzeichnisse lesen: (Größe, CRC) -> Mitglieder
+        members = {}
+        for archive_path, _ in inventory:
+            if archive_path.suffix.lower() != ".zip":
+                continue
+            try:
+                with zipfile.ZipFile(archive_path) as archive:
+                    infos = archive.infolist()
+            except (zipfile.BadZipFile, OSError) as e:
+                self.logger.error(f"Fehler beim Lesen des Archivs {archive_path}: {e}")
+                continue
+            for info in infos:
+                if info.is_dir() or info.file_size == 0:
                     continue
-                    
-                if size in size_groups:
-                    size_groups[size].append(file_path)
-                else:
-                    size_groups[size] = [file_path]
+                members.setdefault((info.file_size, f"{info.CRC:08x}"), []).append((archive_path, info.filename))
+        
+        if not members:
+            return
+        
+        # Vorhandene Gruppen passender Größe; ihre Dateien sind bereits gehasht
+        member_sizes = {size for size, _ in members}
+        groups = [
+            group for group in result["duplicate_groups"]
+            if group["size"] in member_sizes and group.get("hash") is not None
+        ]
+        grouped = {f["path"] for group in groups for f in group["files"]}
+        
+        # Übrige lose Dateien passender Größe (Hardlinks nur einmal)
+        hardlinked = {f["path"] for group in result["hardlink_groups"] for f in group["files"][1:]}
+        loose = [
+            (file_path, size) for file_path, size in inventory
+            if size in member_sizes and str(file_path) not in hardlinked and str(file_path) not in grouped
+        ]
+        
+        with self._create_executor() as executor:
+            # CRC-32 der übrigen losen Dateien und einer Datei je Gruppe
+            if group_algorithm == "crc32":
+                group_crcs = [group["hash"] for group in groups]
+                crc_files = loose
+            else:
+                group_crcs = None
+                crc_files = loose + [(Path(group["files"][0]["path"]), group["size"]) for group in groups]
+            jobs = [(file_path, None, "crc32") for file_path, _ in crc_files]
+            crcs, computed = self._map_hashes(_calculate_file_hash, jobs, executor, "crc32", self.hash_cache)
+            self._count_hashed(result, computed, self.hash_cache)
+            result["bytes_read"]["full_hash"] += sum(
+                size for (_, size), was_computed in zip(crc_files, computed) if was_computed
+            )
+            if group_crcs is None:
+                group_crcs = crcs[len(loose):]
             
-            # Finde Gruppen mit mehr als einer Datei gleicher Größe
-            for size, size_files in size_groups.items():
-                if len(size_files) > 1:
-                    if use_content_hash:
-                        # Gruppiere Dateien nach Inhaltshash
-                        hash_groups = self._group_by_hash(size_files)
-                        
-                        # Füge Duplikatgruppen hinzu
-                        for file_hash, hash_files in hash_groups.items():
-                            if len(hash_files) > 1:
-                                duplicate_files = [{"path": str(f), "name": f.name, "size": size} for f in hash_files]
-                                result["duplicate_groups"].append({
-                                    "hash": file_hash,
-                                    "size": size,
-                                    "files": duplicate_files
-                                })
-                                # Zähle Duplikate (alle außer dem ersten in jeder Gruppe)
-                                result["total_duplicates"] += len(hash_files) - 1
-                                # Berechne verschwendeten Speicherplatz
-                                result["wasted_space"] += size * (len(hash_files) - 1)
-                    else:
-                        # Betrachte alle Dateien mit gleicher Größe als potenzielle Duplikate
-                        duplicate_files = [{"path": str(f), "name": f.name, "size": size} for f in size_files]
-                        result["duplicate_groups"].append({
-                            "size": size,
-                            "files": duplicate_files
-                        })
-                        # Zähle Duplikate (alle außer dem ersten in jeder Gruppe)
-                        result["total_duplicates"] += len(size_files) - 1
-                        # Berechne verschwendeten Speicherplatz
-                        result["wasted_space"] += size * (len(size_files) - 1)
+            loose_by_key = {}
+            for (file_path, size), crc in zip(loose, crcs):
+                if crc is not None and (size, crc) in members:
+                    loose_by_key.setdefault((size, crc), []).append(file_path)
+            group_keys = {(group["size"], crc) for group, crc in zip(groups, group_crcs) if crc is not None}
             
-            self.logger.info(f"Duplikatsuche abgeschlossen: {result['total_duplicates']} Duplikate gefunden")
-            self.logger.info(f"Verschwendeter Speicherplatz: {self._format_size(result['wasted_space'])}")
+            colliding = [
+                (key, key_members) for key, key_members in members.items()
+                if len(key_members) > 1 or key in loose_by_key or key in group_keys
+            ]
+            
+            # Nur kollidierende Mitglieder dekomprimieren, je Archiv in einem Auftrag
+            by_archive = {}
+            for (size, _), key_members in colliding:
+                for archive_path, member in key_members:
+                    by_archive.setdefault(archive_path, []).append((member, size))
+            archive_jobs = [
+                (archive_path, [member for member, _ in entries], group_algorithm)
+                for archive_path, entries in by_archive.items()
+            ]
+            outcomes = self._run_jobs(_hash_zip_members, archive_jobs, executor)
+            
+            member_digests = {}
+            for (archive_path, entries), outcome in zip(by_archive.items(), outcomes):
+                if isinstance(outcome, Exception):
+                    self.logger.error(f"Fehler beim Entpacken aus {archive_path}: {outcome}")
+                    continue
+                for (member, size), digest in zip(entries, outcome):
+                    member_digests[(archive_path, member)] = digest
+                    result["bytes_read"]["archive"] += size
+            
+            # Nur lose Dateien außerhalb vorhandener Gruppen mit dem Algorithmus der Gruppen hashen
+            loose_files = [(file_path, key[0]) for key, _ in colliding for file_path in loose_by_key.get(key, [])]
+            jobs = [(file_path, None, group_algorithm) for file_path, _ in loose_files]
+            digests, computed = self._map_hashes(
+                _calculate_file_hash, jobs, executor, group_algorithm, self.hash_cache
+            )
+            self._count_hashed(result, computed, self.hash_cache)
+            result["bytes_read"]["full_hash"] += sum(
+                size for (_, size), was_computed in zip(loose_files, computed) if was_computed
+            )
+        
+        # Nach (Größe, Hash) gruppieren und mit vorhandenen Gruppen zusammenführen
+        candidates = {}
+        for (file_path, size), digest in zip(loose_files, digests):
+            if digest is not None:
+                candidates.setdefault((size, digest), ([], []))[0].append(file_path)
+        for (size, _), key_members in colliding:
+            for archive_path, member in key_members:
+                digest = member_digests.get((archive_path, member))
+                if digest is not None:
+                    candidates.setdefault((size, digest), ([], []))[1].append((archive_path, member))
+        
+        roles = None
+        if role_roots is not None:
+            roles = {file_path: self._resolve_role(file_path, role_roots) for file_path, _ in loose_files}
+        
+        existing = {(group["size"], group["hash"]): group for group in groups}
+        for (size, digest), (loose_paths, archive_members) in candidates.items():
+            if not archive_members:
+                continue
+            member_entries = []
+            for archive_path, member in archive_members:
+                entry = {
+                    "path": f"{archive_path}{ARCHIVE_MEMBER_SEPARATOR}{member}",
+                    "name": Path(member).name,
+                    "size": size,
+                    "archive": str(archive_path),
+                    "member": member
+                }
+                if role_roots is not None:
+                    entry["role"] = self._resolve_role(archive_path, role_roots)
+                member_entries.append(entry)
+            
+            group = existing.get((size, digest))
+            if group is None:
+                if len(loose_paths) + len(member_entries) < 2:
+                    continue
+                group = self._make_duplicate_group(loose_paths, size, digest, roles)
+                group["files"].extend(member_entries)
+                if roles is not None and len({f["role"] for f in group["files"]}) < 2:
+                    continue
+                redundant_before = 0
+                result["duplicate_groups"].append(group)
+            else:
+                redundant_before = self._count_redundant(group)
+                group["files"].extend(self._make_duplicate_group(loose_paths, size, roles=roles)["files"])
+                group["files"].extend(member_entries)
+            
+            redundant = self._count_redundant(group) - redundant_before
+            result["total_duplicates"] += redundant
+            result["wasted_space"] += size * redundant
+            result["archive_members"] += len(member_entries)
+        
+        self.logger.info(f"Archivmitglieder in Duplikatgruppen: {result['archive_members']}")
+    
+    def _compare_directories(self, directory_path, reference_paths, inventory, result, hash_algorithm):
+        """
+        Erkennt vollständig identische Verzeichnisse über Merkle-Hashes.
+        
+        Der Hash eines Verzeichnisses entsteht in einem Durchlauf von unten nach oben
+        aus Namen, Größen und Inhaltshashes seiner Dateien und den Hashes seiner
+        Unterverzeichnisse. Inhaltshashes stammen aus den Duplikatgruppen; eine
+        Datei ohne Gruppe ist einzigartig und macht damit auch alle übergeordneten
+        Verzeichnisse einzigartig. Es wird also keine Datei zusätzlich gelesen.
+        Verzeichnisse ohne Dateien werden nicht berücksichtigt.
+        
+        Gemeldet werden nur die obersten identischen Verzeichnisse: Eine Gruppe entfällt,
+        wenn alle ihre Verzeichnisse in ebenfalls identischen Elternverzeichnissen liegen.
+        
+        Args:
+            directory_path (str | list): Durchsuchte Verzeichnisse.
+            reference_paths (list, optional): Durchsuchte Referenzverzeichnisse.
+            inventory (FileIndex): Alle Dateien der Suche.
+            result (dict): Ergebnis von find_duplicates; wird ergänzt.
+            hash_algorithm (str): Algorithmus für die Verzeichnis-Hashes.
+        """
+        scan_roots, _ = self._normalize_roots(directory_path, reference_paths)
+        roots = set(scan_roots)
+        
+        # Inhalt jeder Datei als Digest: Gruppen-Hash, gemeinsame Inode bei Hardlinks, None wenn einzigartig
+        content = {}
+        for group in result["duplicate_groups"]:
+            digest = bytes.fromhex(group["hash"])
+            for file_info in group["files"]:
+                content[file_info["path"]] = digest
+        for group in result["hardlink_groups"]:
+            primary = group["files"][0]["path"]
+            content.setdefault(primary, f"inode:{group['device']}:{group['inode']}".encode())
+            for file_info in group["files"][1:]:
+                content[file_info["path"]] = content[primary]
+        
+        # Einträge je Verzeichnis sammeln: (Art, Name, Größe, Inhalt)
+        entries = {}
+        for file_path, size in inventory:
+            file_content = b"" if size == 0 else content.get(str(file_path))
+            entries.setdefault(file_path.parent, []).append(("f", file_path.name, size, file_content))
+        
+        directories = set(entries)
+        for directory in list(directories):
+            while directory not in roots and directory.parent != directory:
+                directory = directory.parent
+                directories.add(directory)
+        
+        # Von unten nach oben hashen
+        hashes = {}
+        totals = {}
+        for directory in sorted(directories, key=lambda d: len(d.parts), reverse=True):
+            children = entries.get(directory, [])
+            size = sum(child[2] for child in children if child[0] == "f")
+            file_count = sum(1 for child in children if child[0] == "f")
+            for child in children:
+                if child[0] == "d":
+                    size += totals[child[4]][0]
+                    file_count += totals[child[4]][1]
+            totals[directory] = (size, file_count)
+            
+            if any(child[3] is None for child in children):
+                dir_hash = None
+            else:
+                hasher = get_hasher(hash_algorithm)
+                for kind, name, child_size, child_hash, *_ in sorted(children):
+                    hasher.update(f"{kind}\0{name}\0{child_size}\0".encode("utf-8", "surrogateescape"))
+                    hasher.update(child_hash + b"\n")
+                dir_hash = hasher.digest()
+            hashes[directory] = dir_hash
+            
+            if directory not in roots:
+                entries.setdefault(directory.parent, []).append(("d", directory.name, 0, dir_hash, directory))
+        
+        hash_groups = {}
+        for directory, dir_hash in hashes.items():
+            if dir_hash is not None and totals[directory][1] > 0:
+                hash_groups.setdefault(dir_hash, []).append(directory)
+        duplicated = {directory for group in hash_groups.values() if len(group) > 1 for directory in group}
+        
+        redundant = set()
+        for dir_hash, group in hash_groups.items():
+            if len(group) < 2 or all(directory.parent in duplicated for directory in group):
+                continue
+            group.sort()
+            size, file_count = totals[group[0]]
+            result["duplicate_directories"].append({
+                "hash": dir_hash.hex(),
+                "size": size,
+                "file_count": file_count,
+                "wasted_space": size * (len(group) - 1),
+                "directories": [{"path": str(directory), "name": directory.name} for directory in group]
+            })
+            redundant.update(group[1:])
+        result["duplicate_directories"].sort(key=lambda group: (group["wasted_space"], group["size"]), reverse=True)
+        
+        # Dateigruppen innerhalb überzähliger Verzeichniskopien zusammenfassen
+        def in_redundant_copy(path):
+            return any(parent in redundant for parent in Path(path).parents)
+        
+        collapsed_groups = []
+        for group in result["duplicate_groups"]:
+            files = [file_info for file_info in group["files"] if not in_redundant_copy(file_info["path"])]
+            result["collapsed_files"] += len(group["files"]) - len(files)
+            if len(files) > 1:
+                collapsed_groups.append({**group, "files": files})
+        result["duplicate_groups"] = collapsed_groups
+        
+        self.logger.info(
+            f"Identische Verzeichnisse: {len(result['duplicate_directories'])} Gruppen, "
+            f"{result['collapsed_files']} Dateien zusammengefasst"
+        )
+    
+    def export_manifest(self, directory_path, manifest_path, recursive=True,
+                        hash_algorithm=DEFAULT_HASH_ALGORITHM):
+        """
+        Hasht alle Dateien eines Verzeichnisbaums und speichert sie als Manifest.
+        
+        Das Manifest dient später als Referenz für match_manifest(), ohne dass der
+        Referenzbaum erneut gelesen werden muss. Ein konfigurierter Hash-Cache wird
+        genutzt, sodass wiederholte Exporte nur geänderte Dateien lesen. Vorhandene
+        Einträge der exportierten Verzeichnisse werden ersetzt, sodass gelöschte
+        Dateien nicht im Manifest verbleiben; Einträge anderer Verzeichnisse bleiben erhalten.
+        
+        Args:
+            directory_path (str | list): Pfad oder Liste von Pfaden der zu erfassenden Verzeichnisse.
+            manifest_path (str): Pfad zur Manifest-Datei.
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            hash_algorithm (str): Hash-Algorithmus aus der Registry.
+            
+        Returns:
+            dict: Anzahl erfasster Dateien sowie die Statistikfelder der Duplikatsuche.
+        """
+        self.logger.info(f"Erstelle Manifest für: {directory_path}")
+        result = {"total_files": 0, **self._new_stats()}
+        
+        scan_roots, _ = self._normalize_roots(directory_path)
+        if not scan_roots:
             return result
+        
+        index = self._collect_files(scan_roots, recursive)
+        size_groups = self._iter_size_groups(index, result, min_count=1, sort_by_size=True)
+        
+        start_time = time.perf_counter()
+        with HashManifest(manifest_path, hash_algorithm) as manifest, self._create_executor() as executor:
+            removed = sum(manifest.remove_tree(str(directory)) for directory in scan_roots)
+            if removed:
+                self.logger.info(f"Bisherige Manifest-Einträge der Verzeichnisse ersetzt: {removed}")
             
-        except Exception as e:
-            self.logger.error(f"Fehler bei der Duplikatsuche: {e}")
+            for batch in self._iter_batches(size_groups):
+                jobs = [(file_path, None, hash_algorithm) for _, files in batch for file_path in files]
+                hashes, computed = self._map_hashes(
+                    _calculate_file_hash, jobs, executor, hash_algorithm, self.hash_cache
+                )
+                self._count_hashed(result, computed, self.hash_cache)
+                
+                hashes = iter(hashes)
+                computed = iter(computed)
+                
+                for size, files in batch:
+                    for file_path in files:
+                        file_hash = next(hashes)
+                        result["bytes_read"]["full_hash"] += size * next(computed)
+                        if file_hash is not None:
+                            manifest.add(file_path, size, file_hash)
+                            result["total_files"] += 1
+                
+                self._update_throughput(result, time.perf_counter() - start_time)
+                if self.hash_cache is not None:
+                    self.hash_cache.flush()
+        
+        self.logger.info(f"Manifest erstellt: {result['total_files']} Dateien in {manifest_path}")
+        return result
+    
+    def match_manifest(self, directory_path, manifest_path, recursive=True):
+        """
+        Vergleicht einen Verzeichnisbaum mit einem gespeicherten Manifest.
+        
+        Zuerst wird für jede vorkommende Dateigröße geprüft, ob das Manifest Dateien
+        dieser Größe enthält. Nur diese Dateien werden gehasht und ihre Digests mit
+        einem In-Memory-Index der passenden Manifest-Einträge verglichen. Der
+        Referenzbaum selbst wird dabei nicht gelesen.
+        
+        Args:
+            directory_path (str | list): Pfad oder Liste von Pfaden der neuen Verzeichnisse.
+            manifest_path (str): Pfad zur Manifest-Datei aus export_manifest().
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            
+        Returns:
+            dict: "matched_files" (Dateien mit Treffern im Manifest und deren Pfade im
+                Manifest), "unmatched_files" (Anzahl ohne Treffer), "total_files" sowie
+                die Statistikfelder der Duplikatsuche.
+        """
+        self.logger.info(f"Vergleiche {directory_path} mit Manifest: {manifest_path}")
+        result = {
+            "total_files": 0,
+            "matched_files": [],
+            "unmatched_files": 0,
+            **self._new_stats()
+        }
+        
+        if not Path(manifest_path).is_file():
+            self.logger.error(f"Manifest existiert nicht: {manifest_path}")
+            return result
+        
+        scan_roots, _ = self._normalize_roots(directory_path)
+        if not scan_roots:
             return result
+        
+        index = self._collect_files(scan_roots, recursive)
+        
+        start_time = time.perf_counter()
+        with HashManifest(manifest_path) as manifest, self._create_executor() as executor:
+            algorithm = manifest.algorithm
+            
+            # Stufe 1: Nur Größen, die auch im Manifest vorkommen, werden gehasht
+            candidate_groups = []
+            for size, files in self._iter_size_groups(index, result, min_count=1, sort_by_size=True):
+                result["total_files"] += len(files)
+                if manifest.has_size(size):
+                    candidate_groups.append((size, files))
+            
+            # Stufe 2: Digests mit dem Index der Manifest-Einträge gleicher Größe vergleichen
+            for batch in self._iter_batches(candidate_groups):
+                jobs = [(file_path, None, algorithm) for _, files in batch for file_path in files]
+                hashes, computed = self._map_hashes(_calculate_file_hash, jobs, executor, algorithm, self.hash_cache)
+                self._count_hashed(result, computed, self.hash_cache)
+                hashes = iter(hashes)
+                computed = iter(computed)
+                
+                for size, files in batch:
+                    index = manifest.lookup_size(size)
+                    for file_path in files:
+                        file_hash = next(hashes)
+                        result["bytes_read"]["full_hash"] += size * next(computed)
+                        if file_hash is not None and file_hash in index:
+                            result["matched_files"].append({
+                                "path": str(file_path),
+                                "name": file_path.name,
+                                "size": size,
+                                "hash": file_hash,
+                                "manifest_paths": index[file_hash]
+                            })
+                
+                self._update_throughput(result, time.perf_counter() - start_time)
+                if self.hash_cache is not None:
+                    self.hash_cache.flush()
+        
+        result["unmatched_files"] = result["total_files"] - len(result["matched_files"])
+        self.logger.info(
+            f"Manifest-Vergleich abgeschlossen: {len(result['matched_files'])} von "
+            f"{result['total_files']} Dateien bereits vorhanden"
+        )
+        return result
+    
+    def _new_stats(self):
+        """
+        Erstellt die Statistikfelder einer Duplikatsuche.
+        
+        Returns:
+            dict: Leere Zähler für gelesene Bytes, Durchsatz, Cache, Hardlinks, Sortierläufe
+                und Drosselung.
+        """
+        return {
+            "bytes_read": {
+                "sample_hash": 0,
+                "full_hash": 0,
+                "confirm_hash": 0,
+                "lockstep": 0,
+                "archive": 0
+            },
+            "throughput": {
+                "files_hashed": 0,
+                "elapsed_seconds": 0.0,
+                "files_per_second": 0.0,
+                "mb_per_second": 0.0
+            },
+            "cache": {
+                "hits": 0,
+                "misses": 0
+            },
+            "hardlink_groups": [],
+            "spill": {
+                "runs": 0,
+                "records": 0,
+                "bytes": 0
+            },
+            "io": {},
+            "time_budget_exhausted": False
+        }
+    
+    def _normalize_roots(self, directory_path, reference_paths=None):
+        """
+        Bereinigt die Liste der zu durchsuchenden Verzeichnisse.
+        
+        Alle Verzeichnisse werden einmalig zu absoluten Pfaden ohne Symlinks
+        aufgelöst. Durchsucht werden die aufgelösten Pfade, sodass auch die
+        gefundenen Dateipfade aufgelöst sind und die Rollenzuordnung unabhängig
+        davon ist, ob ein Verzeichnis relativ, absolut oder über einen Symlink
+        angegeben wurde. Verzeichnisse, die bereits in einem anderen Verzeichnis
+        enthalten sind, werden nicht erneut durchsucht, bleiben aber für die
+        Rollenzuordnung erhalten.
+        
+        Args:
+            directory_path (str | list): Pfad oder Liste von Pfaden der Kandidatenverzeichnisse.
+            reference_paths (list, optional): Referenzverzeichnisse.
+            
+        Returns:
+            tuple: (zu durchsuchende Verzeichnisse, (Verzeichnis, Rolle)-Paare
+                    sortiert vom spezifischsten zum allgemeinsten Verzeichnis).
+        """
+        if isinstance(directory_path, (str, os.PathLike)):
+            directory_path = [directory_path]
+        
+        roots = []
+        for paths, role in ((reference_paths or [], "reference"), (directory_path, "candidate")):
+            for path in paths:
+                directory = Path(path)
+                if not directory.exists() or not directory.is_dir():
+                    self.logger.error(f"Verzeichnis existiert nicht oder ist kein Verzeichnis: {path}")
+                    continue
+                roots.append((directory.resolve(), role))
+        
+        # Überlappungen und Rollen werden anhand der aufgelösten Pfade erkannt
+        scan_roots = []
+        for directory, _ in sorted(roots, key=lambda root: len(root[0].parts)):
+            if not any(self._is_within(directory, other) for other in scan_roots):
+                scan_roots.append(directory)
+        
+        role_roots = sorted(roots, key=lambda root: len(root[0].parts), reverse=True)
+        return scan_roots, role_roots
+    
+    def _is_within(self, path, directory):
+        """
+        Prüft, ob ein Pfad einem Verzeichnis entspricht oder darin liegt.
+        
+        Args:
+            path (Path): Zu prüfender Pfad.
+            directory (Path): Verzeichnis.
+            
+        Returns:
+            bool: True, wenn path in directory liegt.
+        """
+        return path.parts[:len(directory.parts)] == directory.parts
+    
+    def _resolve_role(self, file_path, role_roots):
+        """
+        Bestimmt die Rolle einer Datei über das spezifischste enthaltende Verzeichnis.
+        
+        Args:
+            file_path (Path): Pfad zur Datei unterhalb eines aufgelösten Wurzelverzeichnisses.
+            role_roots (list): (Verzeichnis, Rolle)-Paare, spezifischste zuerst.
+            
+        Returns:
+            str: "reference" oder "candidate".
+        """
+        for directory, role in role_roots:
+            if self._is_within(file_path, directory):
+                return role
+        return "candidate"
+    
+    def _filter_by_roles(self, candidate_groups, roles, role_roots):
+        """
+        Ordnet den Dateien der Kandidatengruppen Rollen zu und behält nur gemischte Gruppen.
+        
+        Args:
+            candidate_groups (iterable): (Größe, Dateiliste)-Tupel.
+            roles (dict): Wird mit der Zuordnung Dateipfad -> Rolle gefüllt.
+            role_roots (list): (Verzeichnis, Rolle)-Paare, spezifischste zuerst.
+            
+        Yields:
+            tuple: (Größe, Dateiliste) jeder Gruppe mit beiden Rollen.
+        """
+        for size, size_files in candidate_groups:
+            for file_path in size_files:
+                roles[file_path] = self._resolve_role(file_path, role_roots)
+            if self._has_both_roles(size_files, roles):
+                yield size, size_files
+    
+    def _has_both_roles(self, files, roles):
+        """
+        Prüft, ob eine Gruppe Referenz- und Kandidatendateien enthält.
+        
+        Args:
+            files (list): Dateipfade der Gruppe.
+            roles (dict): Zuordnung Dateipfad -> Rolle.
+            
+        Returns:
+            bool: True, wenn beide Rollen vorkommen.
+        """
+        return len({roles[file_path] for file_path in files}) == 2
+    
+    def _count_redundant(self, group):
+        """
+        Zählt die überflüssigen Dateien einer Duplikatgruppe.
+        
+        Ohne Rollen sind das alle Dateien außer der ersten, mit Rollen alle Kandidaten.
+        
+        Args:
+            group (dict): Duplikatgruppe.
+            
+        Returns:
+            int: Anzahl überflüssiger Dateien.
+        """
+        if group["files"] and "role" in group["files"][0]:
+            return sum(1 for f in group["files"] if f["role"] == "candidate")
+        return len(group["files"]) - 1
+    
+    def _collect_files(self, directories, recursive, index=None, stats=None, deadline=None):
+        """
+        Sammelt alle Dateien mehrerer Verzeichnisse in einem gemeinsamen Index.
+        
+        Args:
+            directories (list): Zu durchsuchende Verzeichnisse.
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            index (FileIndex, optional): Zu ergänzender Index; standardmäßig ein neuer.
+            stats (dict, optional): Statistik der Duplikatsuche; nötig mit deadline.
+            deadline (float, optional): Zeitpunkt (time.monotonic), an dem der Durchlauf
+                abgebrochen und stats["time_budget_exhausted"] gesetzt wird.
+            
+        Returns:
+            FileIndex: Größe, Gerät, Inode und Pfad jeder Datei, auch leerer Dateien.
+        """
+        if index is None:
+            index = FileIndex()
+        
+        for count, entry in enumerate(self.scanner.iter_files(directories, recursive)):
+            if count % DEADLINE_CHECK_INTERVAL == 0 and self._deadline_passed(deadline, stats):
+                self.logger.warning(f"Zeitbudget während des Verzeichnisdurchlaufs erschöpft ({count} Dateien)")
+                break
+            index.add(entry.path, entry.size, entry.device, entry.inode)
+        
+        self.logger.info(f"Gefundene Dateien: {len(index)}")
+        return index
+    
+    def _deadline_passed(self, deadline, stats):
+        """
+        Prüft das Zeitbudget und vermerkt ein erschöpftes Budget in stats.
+        
+        Args:
+            deadline (float): Zeitpunkt (time.monotonic) oder None ohne Zeitbudget.
+            stats (dict): Statistik der Duplikatsuche.
+            
+        Returns:
+            bool: True, wenn das Zeitbudget erschöpft ist.
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            stats["time_budget_exhausted"] = True
+            return True
+        return False
+    
+    def _until_deadline(self, size_groups, deadline, stats):
+        """
+        Liefert Größengruppen, bis das Zeitbudget erschöpft ist.
+        
+        Args:
+            size_groups (iterable): (Größe, Dateiliste)-Tupel.
+            deadline (float): Zeitpunkt (time.monotonic) des Abbruchs.
+            stats (dict): Statistik der Duplikatsuche.
+            
+        Yields:
+            tuple: (Größe, Dateiliste).
+        """
+        for count, group in enumerate(size_groups):
+            if count % DEADLINE_CHECK_INTERVAL == 0 and self._deadline_passed(deadline, stats):
+                self.logger.warning(f"Zeitbudget während der Größengruppierung erschöpft ({count} Gruppen)")
+                return
+            yield group
     
-    def _group_by_hash(self, files, chunk_size=8192):
+    def _iter_size_groups(self, index, stats, min_count=2, sort_by_size=False):
         """
-        Gruppiert Dateien nach ihrem Inhaltshash.
+        Gruppiert die nicht leeren Dateien eines Index nach Größe.
+        
+        Mehrere Pfade auf dieselbe Inode (Hardlinks, verschachtelte Mounts) werden
+        nur einmal berücksichtigt und als Hardlink-Gruppe in stats gemeldet. Path-
+        Objekte werden nur für die gelieferten Gruppen erzeugt.
+        
+        Args:
+            index (FileIndex): Index aus _collect_files().
+            stats (dict): Statistik der Duplikatsuche.
+            min_count (int): Mindestanzahl verschiedener Dateien einer Gruppe.
+            sort_by_size (bool): Aufsteigend nach Größe statt in der Reihenfolge des Fundes.
+            
+        Yields:
+            tuple: (Größe, Dateiliste).
+        """
+        for size, positions in index.iter_size_groups(min_count, sort_by_size=sort_by_size):
+            files = []
+            inode_paths = {}
+            hardlinks = {}
+            for position in positions:
+                file_path = index.path(position)
+                if index.inodes[position]:
+                    inode = (index.devices[position], index.inodes[position])
+                    if inode in inode_paths:
+                        hardlinks.setdefault(inode, (size, [inode_paths[inode]]))[1].append(file_path)
+                        continue
+                    inode_paths[inode] = file_path
+                files.append(file_path)
+            
+            self._add_hardlink_groups(stats, hardlinks)
+            if len(files) >= min_count:
+                yield size, files
+    
+    def _iter_external_size_groups(self, directories, recursive, stats, inventory=None, deadline=None):
+        """
+        Findet Größenkollisionen mit externer Sortierung bei begrenztem Speicher.
+        
+        Für jede Datei wird ein Datensatz (Größe, Gerät, Inode, Pfad) gepuffert.
+        Erreicht der Puffer memory_budget, wird er sortiert als Lauf auf die
+        Festplatte geschrieben. Anschließend werden die Läufe (höchstens MERGE_FAN_IN
+        gleichzeitig) zusammengeführt; gleich große Dateien liegen danach
+        nebeneinander, Hardlinks derselben Inode ebenfalls. Im Speicher liegt jeweils
+        nur eine Größengruppe.
+        
+        Args:
+            directories (list): Zu durchsuchende Verzeichnisse.
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            stats (dict): Statistik der Duplikatsuche; "spill" wird aktualisiert.
+            inventory (FileIndex, optional): Erhält jede Datei.
+            deadline (float, optional): Zeitpunkt (time.monotonic), an dem Durchlauf und
+                Zusammenführen abgebrochen werden; es werden dann keine Gruppen geliefert.
+            
+        Yields:
+            tuple: (Größe, Dateiliste) jeder Größe mit mehr als einer Datei, aufsteigend nach Größe.
+        """
+        with tempfile.TemporaryDirectory(prefix="duplicates-", dir=self.spill_directory) as spill_dir:
+            runs = self._spill_runs(directories, recursive, spill_dir, stats, inventory, deadline)
+            buffer_size = max(4096, self.memory_budget // (2 * MERGE_FAN_IN))
+            
+            # Mehrstufiges Zusammenführen, solange es mehr Läufe als MERGE_FAN_IN gibt
+            while len(runs) > MERGE_FAN_IN:
+                if stats["time_budget_exhausted"] or self._deadline_passed(deadline, stats):
+                    return
+                merged_runs = []
+                for start in range(0, len(runs), MERGE_FAN_IN):
+                    group = runs[start:start + MERGE_FAN_IN]
+                    merged_path = os.path.join(spill_dir, f"run-{stats['spill']['runs']}")
+                    stats["spill"]["runs"] += 1
+                    with open(merged_path, "wb") as f:
+                        for size, device, inode, path in heapq.merge(*(_read_run(run, buffer_size) for run in group)):
+                            f.write(RUN_RECORD_HEADER.pack(size, device, inode, len(path)))
+                            f.write(path)
+                    for run in group:
+                        os.unlink(run)
+                    merged_runs.append(merged_path)
+                runs = merged_runs
+            
+            if stats["time_budget_exhausted"]:
+                return
+            records = heapq.merge(*(_read_run(run, buffer_size) for run in runs))
+            
+            current_size = None
+            files = []
+            hardlinks = {}
+            last_inode = None
+            for size, device, inode, path in records:
+                if size != current_size:
+                    if len(files) > 1:
+                        yield current_size, files
+                    self._add_hardlink_groups(stats, hardlinks)
+                    current_size = size
+                    files = []
+                    hardlinks = {}
+                    last_inode = None
+                
+                file_path = Path(os.fsdecode(path))
+                if inode and (device, inode) == last_inode:
+                    hardlinks.setdefault(last_inode, (size, [files[-1]]))[1].append(file_path)
+                    continue
+                last_inode = (device, inode)
+                files.append(file_path)
+            
+            if len(files) > 1:
+                yield current_size, files
+            self._add_hardlink_groups(stats, hardlinks)
+    
+    def _spill_runs(self, directories, recursive, spill_dir, stats, inventory=None, deadline=None):
+        """
+        Schreibt die Dateien der Verzeichnisse als sortierte Läufe auf die Festplatte.
+        
+        Args:
+            directories (list): Zu durchsuchende Verzeichnisse.
+            recursive (bool): Ob Unterverzeichnisse rekursiv durchsucht werden sollen.
+            spill_dir (str): Verzeichnis für die Laufdateien.
+            stats (dict): Statistik der Duplikatsuche.
+            inventory (FileIndex, optional): Erhält jede Datei.
+            deadline (float, optional): Zeitpunkt (time.monotonic), an dem der Durchlauf
+                abgebrochen und stats["time_budget_exhausted"] gesetzt wird.
+            
+        Returns:
+            list: Pfade der geschriebenen Läufe.
+        """
+        runs = []
+        records = []
+        buffered = 0
+        total_files = 0
+        
+        def flush_run():
+            run_path = os.path.join(spill_dir, f"run-{stats['spill']['runs']}")
+            stats["spill"]["runs"] += 1
+            stats["spill"]["bytes"] += _write_run(run_path, records)
+            runs.append(run_path)
+        
+        for entry in self.scanner.iter_files(directories, recursive):
+            if total_files % DEADLINE_CHECK_INTERVAL == 0 and self._deadline_passed(deadline, stats):
+                self.logger.warning(f"Zeitbudget während des Verzeichnisdurchlaufs erschöpft ({total_files} Dateien)")
+                break
+            total_files += 1
+            if inventory is not None:
+                inventory.add(entry.path, entry.size, entry.device, entry.inode)
+            if entry.size == 0:  # Überspringe leere Dateien
+                continue
+            
+            path = os.fsencode(entry.path)
+            records.append((entry.size, entry.device, entry.inode, path))
+            stats["spill"]["records"] += 1
+            buffered += RUN_RECORD_OVERHEAD + len(path)
+            if buffered >= self.memory_budget:
+                flush_run()
+                records = []
+                buffered = 0
+        
+        if records:
+            flush_run()
+        
+        self.logger.info(f"Gefundene Dateien: {total_files} ({len(runs)} Sortierläufe)")
+        return runs
+    
+    def _iter_batches(self, size_groups):
+        """
+        Teilt Größengruppen in Stapel von höchstens batch_size Dateien auf.
+        
+        Eine einzelne Größengruppe wird nie geteilt; ist sie größer als batch_size,
+        bildet sie einen eigenen Stapel.
+        
+        Args:
+            size_groups (iterable): (Größe, Dateiliste)-Tupel.
+            
+        Yields:
+            list: Stapel von (Größe, Dateiliste)-Tupeln.
+        """
+        batch = []
+        batch_files = 0
+        for size, files in size_groups:
+            if batch and batch_files + len(files) > self.batch_size:
+                yield batch
+                batch = []
+                batch_files = 0
+            batch.append((size, files))
+            batch_files += len(files)
+        if batch:
+            yield batch
+    
+    @contextmanager
+    def _create_executor(self):
+        """
+        Erstellt den Executor für die Hash-Berechnung.
+        
+        Pool-Worker werden mit gesenkter Priorität und der Drosselung dieses Detektors
+        gestartet; Threads teilen sich io_throttle, Prozesse erhalten eine eigene
+        Drosselung mit anteiligen Limits. Die serielle Ausführung setzt die Drosselung
+        je Aufruf in _run_jobs, sodass sie nicht in andere Detektoren oder Threads gelangt.
+        
+        Yields:
+            Executor oder None (serielle Ausführung).
+        """
+        if self.executor == "thread":
+            with ThreadPoolExecutor(max_workers=self.max_workers, initializer=configure_worker,
+                                    initargs=(self.io_throttle, self.nice_increment, self.io_class)) as executor:
+                yield executor
+        elif self.executor == "process":
+            workers = self.max_workers or os.cpu_count() or 1
+            throttle = self.io_throttle.scaled(1 / workers) if self.io_throttle is not None else None
+            with ProcessPoolExecutor(max_workers=workers, initializer=configure_worker,
+                                     initargs=(throttle, self.nice_increment, self.io_class)) as executor:
+                yield executor
+        else:
+            yield None
+    
+    def _map_hashes(self, func, jobs, executor, kind=None, hash_cache=None):
+        """
+        Führt eine Hash-Funktion für mehrere Dateien aus, seriell oder im Pool.
+        
+        Ist ein Hash-Cache angegeben, werden gültige Einträge direkt übernommen und
+        nur die übrigen Dateien gelesen. Die Ergebnisse werden in der Reihenfolge der
+        Aufträge zurückgegeben, sodass parallele und serielle Ausführung dieselben
+        Gruppen liefern.
+        
+        Args:
+            func (callable): Modulweite Hash-Funktion, deren erstes Argument der Dateipfad ist.
+            jobs (list): Liste von Argument-Tupeln für func.
+            executor (Executor): Executor oder None für serielle Ausführung.
+            kind (str, optional): Art des Hashes als Schlüssel im Hash-Cache.
+            hash_cache (HashCache, optional): Hash-Cache für diese Aufträge.
+            
+        Returns:
+            tuple: (Hash-Werte je Auftrag oder None bei Fehlern,
+                    Flags je Auftrag, ob der Hash tatsächlich berechnet wurde).
+        """
+        hashes = [None] * len(jobs)
+        computed = [False] * len(jobs)
+        file_stats = [None] * len(jobs)
+        pending = []
+        
+        for index, job in enumerate(jobs):
+            if hash_cache is not None and kind is not None:
+                try:
+                    file_stats[index] = os.stat(job[0])
+                except OSError as e:
+                    self.logger.error(f"Fehler beim Lesen der Dateiinformationen von {job[0]}: {e}")
+                    continue
+                cached_hash = hash_cache.get(job[0], kind, file_stats[index])
+                if cached_hash is not None:
+                    hashes[index] = cached_hash
+                    continue
+            pending.append(index)
+        
+        outcomes = self._run_jobs(func, [jobs[index] for index in pending], executor)
+        
+        for index, outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(f"Fehler beim Berechnen des Hashes für {jobs[index][0]}: {outcome}")
+                continue
+            hashes[index] = outcome
+            computed[index] = True
+            if hash_cache is not None and kind is not None:
+                hash_cache.put(jobs[index][0], kind, outcome, file_stats[index])
+        
+        return hashes, computed
+    
+    def _run_jobs(self, func, jobs, executor):
+        """
+        Führt eine modulweite Funktion für mehrere Aufträge aus, seriell oder im Pool.
+        
+        Args:
+            func (callable): Auszuführende Funktion.
+            jobs (list): Liste von Argument-Tupeln für func.
+            executor (Executor): Executor oder None für serielle Ausführung.
+            
+        Returns:
+            list: Ergebnis oder aufgetretene Ausnahme je Auftrag, in Auftragsreihenfolge.
+        """
+        outcomes = []
+        if executor is None:
+            with read_throttle(self.io_throttle):
+                for job in jobs:
+                    try:
+                        outcomes.append(func(*job))
+                    except Exception as e:
+                        outcomes.append(e)
+        else:
+            futures = [executor.submit(func, *job) for job in jobs]
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+        return outcomes
+    
+    def _group_by_content(self, size_groups, stats, executor=None,
+                          hash_algorithm=DEFAULT_HASH_ALGORITHM, confirm_algorithm=None, hash_cache=None):
+        """
+        Gruppiert gleich große Dateien mehrstufig nach ihrem Inhalt.
+        
+        Zuerst werden Stichproben vom Anfang, aus der Mitte und vom Ende jeder Datei
+        gehasht. Nur Dateien, deren Stichproben übereinstimmen, werden anschließend
+        vollständig gehasht. Kleine Dateien, die vollständig in die Stichproben passen,
+        werden direkt vollständig gehasht. Ist ein Bestätigungsalgorithmus angegeben,
+        werden die verbleibenden Gruppen zusätzlich mit diesem gehasht. Jede Stufe
+        wird für alle Größengruppen eines Stapels gemeinsam ausgeführt, damit ein Pool
+        ausgelastet wird.
+        
+        Args:
+            size_groups (list): Liste von (Größe, Dateiliste)-Tupeln.
+            stats (dict): Statistik der Duplikatsuche; "bytes_read" und "throughput"
+                werden aktualisiert.
+            executor (Executor, optional): Executor für die Hash-Berechnung.
+            hash_algorithm (str): Algorithmus für Stichproben und vollständige Hashes.
+            confirm_algorithm (str, optional): Algorithmus für die Bestätigungsstufe.
+            hash_cache (HashCache, optional): Hash-Cache für Stichproben und vollständige Hashes.
+            
+        Returns:
+            list: (Größe, Hash, Dateiliste)-Tupel aller Gruppen mit mehr als einer Datei
+                in der Reihenfolge der Größengruppen.
+        """
+        # Stufe 1: Stichproben-Hashes für große Dateien
+        sample_jobs = [
+            (file_path, size, self.sample_size, hash_algorithm)
+            for size, files in size_groups if size > 3 * self.sample_size
+            for file_path in files
+        ]
+        sample_hashes, computed = self._map_hashes(
+            _calculate_sample_hash, sample_jobs, executor, f"{hash_algorithm}-sample-{self.sample_size}", hash_cache
+        )
+        self._count_hashed(stats, computed, hash_cache)
+        stats["bytes_read"]["sample_hash"] += sum(computed) * 3 * self.sample_size
+        sample_hashes = iter(sample_hashes)
+        
+        candidates = []
+        for size, files in size_groups:
+            if size > 3 * self.sample_size:
+                sample_groups = self._group_paths(files, [next(sample_hashes) for _ in files])
+                candidates.extend((size, group) for group in sample_groups.values() if len(group) > 1)
+            else:
+                candidates.append((size, files))
+        
+        # Kleine Gruppen großer Dateien werden ohne Hash blockweise verglichen
+        lockstep_candidates = [(size, files) for size, files in candidates if self._use_lockstep(size, files)]
+        candidates = [(size, files) for size, files in candidates if not self._use_lockstep(size, files)]
+        
+        # Stufe 2: Vollständige Hashes nur für Kandidaten
+        hash_groups = self._hash_stage(candidates, stats, executor, hash_algorithm, "full_hash", hash_cache)
+        
+        # Stufe 3: Bestätigung mit einem starken Hash
+        if confirm_algorithm is not None and confirm_algorithm != hash_algorithm:
+            candidates = [(size, files) for size, _, files in hash_groups]
+            hash_groups = self._hash_stage(candidates, stats, executor, confirm_algorithm, "confirm_hash", hash_cache)
+        
+        # Der blockweise Vergleich ist exakt; sein Hash entspricht dem der Bestätigungsstufe
+        hash_groups.extend(self._lockstep_stage(
+            lockstep_candidates, stats, executor, confirm_algorithm or hash_algorithm
+        ))
+        
+        # Unabhängig von der Vergleichsstrategie bleibt die Reihenfolge der Größengruppen
+        # (z. B. die des Zeitplans "reclaim") erhalten
+        positions = {
+            file_path: position
+            for position, file_path in enumerate(file_path for _, files in size_groups for file_path in files)
+        }
+        hash_groups.sort(key=lambda group: positions[group[2][0]])
+        return hash_groups
+    
+    def _use_lockstep(self, size, files):
+        """
+        Entscheidet, ob eine Kandidatengruppe blockweise statt per Hash verglichen wird.
+        
+        Der Vergleich lohnt sich für kleine Gruppen großer Dateien, weil er beim ersten
+        abweichenden Block abbricht. Mit Hash-Cache wird gehasht, damit die Ergebnisse
+        bei der nächsten Suche wiederverwendet werden können. Da alle Dateien einer
+        Gruppe gleichzeitig geöffnet sind, werden Gruppen mit mehr als
+        LOCKSTEP_MAX_OPEN_FILES Dateien immer gehasht.
+        
+        Args:
+            size (int): Dateigröße in Bytes.
+            files (list): Dateipfade der Gruppe.
+            
+        Returns:
+            bool: True für den blockweisen Vergleich.
+        """
+        if self.compare_strategy == "hash" or len(files) > LOCKSTEP_MAX_OPEN_FILES:
+            return False
+        if self.compare_strategy == "lockstep":
+            return True
+        return (
+            self.hash_cache is None
+            and len(files) <= LOCKSTEP_MAX_FILES
+            and size >= LOCKSTEP_MIN_SIZE
+        )
+    
+    def _lockstep_stage(self, candidates, stats, executor, algorithm):
+        """
+        Vergleicht Kandidatengruppen blockweise und teilt sie bei Abweichungen auf.
+        
+        Args:
+            candidates (list): Liste von (Größe, Dateiliste)-Tupeln.
+            stats (dict): Statistik der Duplikatsuche.
+            executor (Executor, optional): Executor für die Vergleiche.
+            algorithm (str): Algorithmus für den Hash der bestätigten Gruppen.
+            
+        Returns:
+            list: (Größe, Hash, Dateiliste)-Tupel aller Gruppen mit mehr als einer Datei.
+        """
+        jobs = [(files, size, algorithm) for size, files in candidates]
+        outcomes = self._run_jobs(_compare_lockstep, jobs, executor)
+        
+        hash_groups = []
+        for (size, files), outcome in zip(candidates, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(f"Fehler beim blockweisen Vergleich von {len(files)} Dateien ({files[0]}, ...): {outcome}")
+                continue
+            groups, bytes_read = outcome
+            stats["bytes_read"]["lockstep"] += bytes_read
+            for file_hash, members in groups:
+                hash_groups.append((size, file_hash, [files[index] for index in members]))
+        
+        return hash_groups
+    
+    def _hash_stage(self, candidates, stats, executor, algorithm, stage, hash_cache=None):
+        """
+        Hasht Kandidatengruppen vollständig und teilt sie nach Hash-Werten auf.
+        
+        Args:
+            candidates (list): Liste von (Größe, Dateiliste)-Tupeln.
+            stats (dict): Statistik der Duplikatsuche.
+            executor (Executor, optional): Executor für die Hash-Berechnung.
+            algorithm (str): Name des Hash-Algorithmus.
+            stage (str): Schlüssel in stats["bytes_read"] für diese Stufe.
+            hash_cache (HashCache, optional): Hash-Cache für die vollständigen Hashes.
+            
+        Returns:
+            list: (Größe, Hash, Dateiliste)-Tupel aller Gruppen mit mehr als einer Datei.
+        """
+        jobs = [(file_path, None, algorithm) for _, files in candidates for file_path in files]
+        hashes, computed = self._map_hashes(_calculate_file_hash, jobs, executor, algorithm, hash_cache)
+        self._count_hashed(stats, computed, hash_cache)
+        hashes = iter(hashes)
+        computed = iter(computed)
+        
+        hash_groups = []
+        for size, files in candidates:
+            stats["bytes_read"][stage] += size * sum(next(computed) for _ in files)
+            groups = self._group_paths(files, [next(hashes) for _ in files])
+            for file_hash, hash_files in groups.items():
+                if len(hash_files) > 1:
+                    hash_groups.append((size, file_hash, hash_files))
+        
+        return hash_groups
+    
+    def _count_hashed(self, stats, computed, hash_cache=None):
+        """
+        Zählt berechnete Hashes und Cache-Treffer im Ergebnis.
+        
+        Args:
+            stats (dict): Statistik der Duplikatsuche.
+            computed (list): Flags je Auftrag, ob der Hash berechnet wurde.
+            hash_cache (HashCache, optional): Verwendeter Hash-Cache.
+        """
+        hashed = sum(computed)
+        stats["throughput"]["files_hashed"] += hashed
+        if hash_cache is not None:
+            stats["cache"]["hits"] += len(computed) - hashed
+            stats["cache"]["misses"] += hashed
+    
+    def _group_paths(self, files, hashes):
+        """
+        Gruppiert Dateien nach zuvor berechneten Hash-Werten.
         
         Args:
             files (list): Liste von Dateipfaden.
-            chunk_size (int): Größe der zu lesenden Chunks in Bytes.
+            hashes (list): Hash-Werte in derselben Reihenfolge, None bei Fehlern.
             
         Returns:
             dict: Gruppierte Dateien nach Hash.
         """
         hash_groups = {}
+        for file_path, file_hash in zip(files, hashes):
+            if file_hash is None:
+                continue
+            if file_hash in hash_groups:
+                hash_groups[file_hash].append(file_path)
+            else:
+                hash_groups[file_hash] = [file_path]
+        return hash_groups
+    
+    def _make_duplicate_group(self, files, size, file_hash=None, roles=None):
+        """
+        Erstellt den Eintrag einer Duplikatgruppe.
         
-        for file_path in files:
-            try:
-                file_hash = self._calculate_file_hash(file_path, chunk_size)
-                if file_hash in hash_groups:
-                    hash_groups[file_hash].append(file_path)
-                else:
-                    hash_groups[file_hash] = [file_path]
-            except Exception as e:
-                self.logger.error(f"Fehler beim Berechnen des Hashes für {file_path}: {e}")
+        Args:
+            files (list): Dateipfade der Gruppe.
+            size (int): Dateigröße in Bytes.
+            file_hash (str, optional): Inhaltshash der Gruppe.
+            roles (dict, optional): Zuordnung Dateipfad -> Rolle ("reference"/"candidate").
+            
+        Returns:
+            dict: Duplikatgruppe.
+        """
+        group = {
+            "size": size,
+            "files": [{"path": str(f), "name": f.name, "size": size} for f in files]
+        }
+        if roles is not None:
+            for file_info, file_path in zip(group["files"], files):
+                file_info["role"] = roles[file_path]
+        if file_hash is not None:
+            group = {"hash": file_hash, **group}
+        return group
+    
+    def _add_hardlink_groups(self, stats, hardlinks):
+        """
+        Fügt Gruppen von Hardlinks zum Ergebnis hinzu.
         
-        return hash_groups
+        Hardlinks teilen sich eine physische Datei und belegen keinen zusätzlichen
+        Speicherplatz. Sie werden daher getrennt von echten Kopien gemeldet und nicht
+        zum verschwendeten Speicherplatz gezählt. In Duplikatgruppen erscheint nur
+        der erste gefundene Pfad jeder Inode.
+        
+        Args:
+            stats (dict): Statistik der Duplikatsuche.
+            hardlinks (dict): Zuordnung (Gerät, Inode) -> (Größe, Liste der Pfade).
+        """
+        for (device, inode), (size, paths) in hardlinks.items():
+            stats["hardlink_groups"].append({
+                "device": device,
+                "inode": inode,
+                "size": size,
+                "files": [{"path": str(f), "name": f.name, "size": size} for f in paths]
+            })
+    
+    def _update_throughput(self, stats, elapsed):
+        """
+        Berechnet die Durchsatzwerte der Hash-Berechnung und übernimmt die Zähler der Drosselung.
+        
+        Args:
+            stats (dict): Statistik der Duplikatsuche.
+            elapsed (float): Dauer der Hash-Berechnung in Sekunden.
+        """
+        throughput = stats["throughput"]
+        total_bytes = sum(stats["bytes_read"].values())
+        if self.io_throttle is not None:
+            stats["io"] = self.io_throttle.snapshot()
+        throughput["elapsed_seconds"] = elapsed
+        if elapsed > 0:
+            throughput["files_per_second"] = throughput["files_hashed"] / elapsed
+            throughput["mb_per_second"] = total_bytes / (1024 * 1024) / elapsed
     
-    def _calculate_file_hash(self, file_path, chunk_size=8192):
+    def _calculate_sample_hash(self, file_path, size, algorithm=DEFAULT_HASH_ALGORITHM):
         """
-        Berechnet den SHA-256-Hash einer Datei.
+        Berechnet den Hash über Anfang, Mitte und Ende einer Datei.
         
         Args:
             file_path (Path): Pfad zur Datei.
-            chunk_size (int): Größe der zu lesenden Chunks in Bytes.
+            size (int): Dateigröße in Bytes (mindestens drei Stichproben groß).
+            algorithm (str): Name des Hash-Algorithmus.
             
         Returns:
-            str: Hexadezimaler Hash-Wert.
+            str: Hexadezimaler Hash-Wert der Stichproben.
         """
-        hasher = hashlib.sha256()
-        
-        with open(file_path, 'rb') as f:
-            while True:
-                chunk = f.read(chunk_size)
-                if not chunk:
-                    break
-                hasher.update(chunk)
+        return _calculate_sample_hash(file_path, size, self.sample_size, algorithm)
+    
+    def _calculate_file_hash(self, file_path, chunk_size=None, algorithm=DEFAULT_HASH_ALGORITHM):
+        """
+        Berechnet den Hash einer Datei.
         
-        return hasher.hexdigest()
+        Args:
+            file_path (Path): Pfad zur Datei.
+            chunk_size (int, optional): Größe der zu lesenden Chunks in Bytes; standardmäßig adaptiv.
+            algorithm (str): Name des Hash-Algorithmus.
+            
+        Returns:
+            str: Hexadezimaler Hash-Wert.
+        """
+        return _calculate_file_hash(file_path, chunk_size, algorithm)
     
     def _format_size(self, size_bytes):
         """
@@ -178,62 +1936,219 @@ class DuplicateDetector:
                 return f"{size_bytes:.2f} {unit}"
             size_bytes /= 1024
     
-    def remove_duplicates(self, duplicate_groups, keep_strategy="first"):
+    def remove_duplicates(self, duplicate_groups, keep_strategy="first", action="delete", verify=None):
         """
         Entfernt Duplikate basierend auf einer Strategie.
         
+        Statt zu löschen, können Duplikate durch einen Hardlink oder einen
+        Copy-on-Write-Reflink (FICLONE, z. B. btrfs/XFS) auf die behaltene Datei ersetzt
+        werden; alle Pfade bleiben dann erhalten. Duplikate, deren Größe von der
+        behaltenen Datei abweicht, werden immer übersprungen. Vor dem Ersetzen wird der
+        Inhalt bis zum Dateiende blockweise mit der behaltenen Datei verglichen. Die
+        Gruppen werden stapelweise verarbeitet, die Vergleiche eines Stapels laufen im
+        konfigurierten Executor.
+        
         Args:
             duplicate_groups (list): Liste von Duplikatgruppen.
             keep_strategy (str): Strategie zum Behalten von Dateien ("first", "newest", "oldest").
+            action (str): Umgang mit Duplikaten ("delete", "hardlink", "reflink").
+            verify (bool, optional): Ob der Inhalt vor der Aktion verglichen wird. Standardmäßig
+                nur beim Ersetzen durch Links.
             
         Returns:
             dict: Ergebnis der Entfernungsoperation.
         """
-        self.logger.info(f"Entferne Duplikate mit Strategie: {keep_strategy}")
+        if action not in REMOVE_ACTIONS:
+            raise ValueError(f"Unbekannte Aktion: {action} (erlaubt: {', '.join(REMOVE_ACTIONS)})")
+        if verify is None:
+            verify = action != "delete"
+        
+        self.logger.info(f"Entferne Duplikate mit Strategie: {keep_strategy}, Aktion: {action}")
         
         result = {
             "removed_files": 0,
+            "linked_files": 0,
             "freed_space": 0,
             "errors": []
         }
         
+        with self._create_executor() as executor:
+            for batch in self._iter_group_batches(duplicate_groups):
+                # Bestimme je Gruppe die behaltene Datei und die Duplikate (ein stat() je Datei)
+                pairs = []
+                for group in batch:
+                    for keep_path, keep_stat, file_path, file_stat in self._plan_group_removal(group, keep_strategy, result):
+                        # Unterschiedlich große Dateien können keine Duplikate sein (z. B. ein Präfix)
+                        if keep_stat.st_size != file_stat.st_size:
+                            error_msg = (
+                                f"Größe von {file_path} ({file_stat.st_size} Bytes) weicht von "
+                                f"{keep_path} ({keep_stat.st_size} Bytes) ab, übersprungen"
+                            )
+                            self.logger.error(error_msg)
+                            result["errors"].append(error_msg)
+                            continue
+                        pairs.append((keep_path, keep_stat, file_path, file_stat))
+                
+                # Vergleiche alle Paare des Stapels vor der Aktion
+                if verify:
+                    jobs = [([keep_path, file_path], file_stat.st_size) for keep_path, _, file_path, file_stat in pairs]
+                    outcomes = self._run_jobs(_compare_lockstep, jobs, executor)
+                else:
+                    outcomes = [None] * len(pairs)
+                
+                for (keep_path, keep_stat, file_path, file_stat), outcome in zip(pairs, outcomes):
+                    if isinstance(outcome, Exception):
+                        error_msg = f"Fehler beim Vergleich von {file_path} mit {keep_path}, übersprungen: {outcome}"
+                        self.logger.error(error_msg)
+                        result["errors"].append(error_msg)
+                        continue
+                    if verify and not outcome[0]:
+                        error_msg = f"Inhalt von {file_path} stimmt nicht mit {keep_path} überein, übersprungen"
+                        self.logger.error(error_msg)
+                        result["errors"].append(error_msg)
+                        continue
+                    self._apply_removal(action, keep_path, keep_stat, file_path, file_stat, result)
+        
+        self.logger.info(
+            f"Duplikatentfernung abgeschlossen: {result['removed_files']} Dateien entfernt, "
+            f"{result['linked_files']} Dateien verlinkt"
+        )
+        self.logger.info(f"Freigegebener Speicherplatz: {self._format_size(result['freed_space'])}")
+        return result
+    
+    def _iter_group_batches(self, duplicate_groups):
+        """
+        Teilt Duplikatgruppen in Stapel von höchstens batch_size Dateien auf.
+        
+        Args:
+            duplicate_groups (list): Liste von Duplikatgruppen.
+            
+        Yields:
+            list: Stapel von Duplikatgruppen.
+        """
+        batch = []
+        batch_files = 0
         for group in duplicate_groups:
             files = group.get("files", [])
-            if len(files) <= 1:
-                continue
+            if batch and batch_files + len(files) > self.batch_size:
+                yield batch
+                batch = []
+                batch_files = 0
+            batch.append(group)
+            batch_files += len(files)
+        if batch:
+            yield batch
+    
+    def _plan_group_removal(self, group, keep_strategy, result):
+        """
+        Bestimmt die zu behaltende Datei einer Gruppe und die zu ersetzenden Duplikate.
+        
+        Jede Datei wird dabei genau einmal mit stat() abgefragt. Tragen die Dateien
+        Rollen (Suche mit reference_paths), wird stets eine Referenz behalten, und
+        nur Kandidaten werden ersetzt.
+        
+        Args:
+            group (dict): Duplikatgruppe.
+            keep_strategy (str): Strategie zum Behalten von Dateien ("first", "newest", "oldest").
+            result (dict): Ergebnis der Entfernungsoperation; Fehler werden ergänzt.
             
-            # Bestimme, welche Datei behalten werden soll
-            files_to_keep = []
-            files_to_remove = []
-            
-            if keep_strategy == "first":
-                files_to_keep = [files[0]]
-                files_to_remove = files[1:]
-            elif keep_strategy == "newest" or keep_strategy == "oldest":
-                # Sortiere Dateien nach Änderungszeit
-                sorted_files = sorted(files, key=lambda f: Path(f["path"]).stat().st_mtime, reverse=(keep_strategy == "newest"))
-                files_to_keep = [sorted_files[0]]
-                files_to_remove = sorted_files[1:]
-            
-            # Entferne Duplikate
-            for file_info in files_to_remove:
-                try:
-                    file_path = Path(file_info["path"])
-                    file_size = file_info["size"]
-                    
-                    self.logger.info(f"Entferne Duplikat: {file_path}")
-                    file_path.unlink()
-                    
-                    result["removed_files"] += 1
-                    result["freed_space"] += file_size
-                except Exception as e:
-                    error_msg = f"Fehler beim Entfernen von {file_info['path']}: {e}"
-                    self.logger.error(error_msg)
-                    result["errors"].append(error_msg)
+        Returns:
+            list: (Behaltene Datei, deren stat, Duplikat, dessen stat)-Tupel.
+        """
+        # Mitglieder von Archiven können weder gelöscht noch verlinkt werden
+        files = [file_info for file_info in group.get("files", []) if "member" not in file_info]
+        if len(files) <= 1:
+            return []
         
-        self.logger.info(f"Duplikatentfernung abgeschlossen: {result['removed_files']} Dateien entfernt")
-        self.logger.info(f"Freigegebener Speicherplatz: {self._format_size(result['freed_space'])}")
-        return result
+        entries = []
+        for file_info in files:
+            file_path = Path(file_info["path"])
+            try:
+                entries.append((file_path, file_path.stat()))
+            except OSError as e:
+                error_msg = f"Fehler beim Lesen der Dateiinformationen von {file_path}: {e}"
+                self.logger.error(error_msg)
+                result["errors"].append(error_msg)
+        
+        if len(entries) <= 1:
+            return []
+        
+        if "role" in files[0]:
+            # Mit Referenzverzeichnissen wird immer eine Referenz behalten, und nur
+            # Kandidaten werden entfernt; die Strategie wählt unter den Referenzen
+            roles = {Path(file_info["path"]): file_info["role"] for file_info in files}
+            keep_entries = [entry for entry in entries if roles[entry[0]] == "reference"]
+            remove_entries = [entry for entry in entries if roles[entry[0]] == "candidate"]
+            if not keep_entries or not remove_entries:
+                return []
+        else:
+            keep_entries = entries
+            remove_entries = None
+        
+        if keep_strategy == "newest" or keep_strategy == "oldest":
+            # Sortiere Dateien nach Änderungszeit
+            keep_entries.sort(key=lambda entry: entry[1].st_mtime, reverse=(keep_strategy == "newest"))
+        
+        keep_path, keep_stat = keep_entries[0]
+        if remove_entries is None:
+            remove_entries = keep_entries[1:]
+        return [(keep_path, keep_stat, file_path, file_stat) for file_path, file_stat in remove_entries]
+    
+    def _apply_removal(self, action, keep_path, keep_stat, file_path, file_stat, result):
+        """
+        Löscht ein Duplikat oder ersetzt es durch einen Link auf die behaltene Datei.
+        
+        Beim Ersetzen wird der Link zunächst unter einem freien, zufälligen Namen
+        angelegt und dann atomar über das Duplikat verschoben. Bei einem Fehler wird
+        nur eine selbst angelegte temporäre Datei entfernt.
+        
+        Args:
+            action (str): "delete", "hardlink" oder "reflink".
+            keep_path (Path): Behaltene Datei.
+            keep_stat (os.stat_result): Dateiinformationen der behaltenen Datei.
+            file_path (Path): Zu ersetzendes Duplikat.
+            file_stat (os.stat_result): Dateiinformationen des Duplikats.
+            result (dict): Ergebnis der Entfernungsoperation.
+        """
+        temp_path = None
+        try:
+            if action == "delete":
+                self.logger.info(f"Entferne Duplikat: {file_path}")
+                file_path.unlink()
+                result["removed_files"] += 1
+                # Speicher wird nur frei, wenn kein weiterer Hardlink auf das Duplikat zeigt
+                if file_stat.st_nlink <= 1:
+                    result["freed_space"] += file_stat.st_size
+                return
+            
+            if (keep_stat.st_dev, keep_stat.st_ino) == (file_stat.st_dev, file_stat.st_ino):
+                return  # Bereits dieselbe physische Datei
+            
+            if action == "hardlink":
+                if keep_stat.st_dev != file_stat.st_dev:
+                    raise OSError("Hardlinks sind nur innerhalb eines Dateisystems möglich")
+                self.logger.info(f"Ersetze Duplikat durch Hardlink: {file_path} -> {keep_path}")
+                temp_path = _link_to_temp(os.link, keep_path, file_path)
+            else:
+                self.logger.info(f"Ersetze Duplikat durch Reflink: {file_path} -> {keep_path}")
+                temp_path = _link_to_temp(_reflink, keep_path, file_path)
+                shutil.copystat(file_path, temp_path)
+            
+            os.replace(temp_path, file_path)
+            temp_path = None
+            result["linked_files"] += 1
+            # Speicher wird nur frei, wenn kein weiterer Hardlink auf das Duplikat zeigt
+            if file_stat.st_nlink <= 1:
+                result["freed_space"] += file_stat.st_size
+        except Exception as e:
+            if temp_path is not None:
+                try:
+                    temp_path.unlink()
+                except OSError:
+                    pass
+            error_msg = f"Fehler beim Entfernen von {file_path}: {e}"
+            self.logger.error(error_msg)
+            result["errors"].append(error_msg)
 
 # Beispiel für die Verwendung
 if __name__ == "__main__":
@@ -0,0 +1,461 @@
+import os
+import sys
+import logging
+import tracemalloc
+from array import array
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("file_catalog")
+
+# Spalten des Katalogs; kategoriale Spalten speichern Nummern statt Zeichenketten
+COLUMNS = ("size", "modified", "extension", "type", "directory")
+CATEGORICAL_COLUMNS = ("extension", "type", "directory")
+
+# NumPy-Datentypen der Arrays je Typcode
+_DTYPES = {"Q": "uint64", "d": "float64", "I": "uint32"}
+
+class FileCatalog:
+    """
+    Spaltenweise gespeicherter Dateikatalog als Ergebnis von FileOrganizer.analyze_directory.
+
+    Größe und Änderungszeit liegen in typisierten Arrays, Erweiterung, Dateityp und
+    Verzeichnis als Nummern in Kategorienlisten, in denen jede Zeichenkette nur einmal
+    gespeichert wird; die Dateinamen liegen hintereinander in einem Bytepuffer.
+    Gruppierungen und Filter arbeiten mit NumPy vektorisiert, ohne NumPy mit
+    einfachen Schleifen.
+
+    Für bestehenden Code verhält sich der Katalog wie die frühere Liste von
+    Dictionaries: Iteration, Indexzugriff und len() liefern bzw. zählen Einträge mit
+    den Schlüsseln path, name, size, modified, extension und type. Diese entstehen
+    erst beim Zugriff; to_records() liefert alle auf einmal. Slices liefern wie bei
+    einer Liste eine Liste von Dictionaries (einen Teilkatalog liefert take()), und
+    ein Vergleich mit == gelingt gegen Listen und andere Kataloge. Für json.dumps
+    wird json_default als default übergeben.
+    """
+    __slots__ = ("sizes", "mtimes", "extension_codes", "type_codes", "directory_ids",
+                 "categories", "_lookups", "_names", "_name_offsets")
+
+    def __init__(self, categories=None):
+        """
+        Initialisiert einen leeren Katalog.
+
+        Args:
+            categories (dict, optional): Kategorienlisten je kategorialer Spalte, die
+                übernommen werden sollen, z. B. von einem anderen Katalog.
+        """
+        self.sizes = array("Q")
+        self.mtimes = array("d")
+        self.extension_codes = array("I")
+        self.type_codes = array("I")
+        self.directory_ids = array("I")
+        self.categories = {column: list(categories[column]) if categories else []
+                           for column in CATEGORICAL_COLUMNS}
+        self._lookups = {column: {value: code for code, value in enumerate(values)}
+                         for column, values in self.categories.items()}
+        self._names = bytearray()
+        self._name_offsets = array("Q", [0])
+
+    def add(self, file_path, size, modified, extension, file_type):
+        """
+        Fügt eine Datei hinzu.
+
+        Args:
+            file_path (str): Pfad zur Datei.
+            size (int): Dateigröße in Bytes.
+            modified (float): Änderungszeit (st_mtime).
+            extension (str): Dateierweiterung in Kleinbuchstaben.
+            file_type (str): Dateityp.
+        """
+        directory, name = os.path.split(os.fspath(file_path))
+        self.sizes.append(size)
+        self.mtimes.append(modified)
+        self.extension_codes.append(self._code("extension", extension))
+        self.type_codes.append(self._code("type", file_type))
+        self.directory_ids.append(self._code("directory", directory))
+        self._names += os.fsencode(name)
+        self._name_offsets.append(len(self._names))
+
+    def _code(self, column, value):
+        """
+        Liefert die Nummer eines Werts in einer Kategorienliste und legt ihn bei Bedarf an.
+
+        Args:
+            column (str): Kategoriale Spalte.
+            value (str): Wert.
+
+        Returns:
+            int: Nummer des Werts.
+        """
+        lookup = self._lookups[column]
+        code = lookup.get(value)
+        if code is None:
+            code = len(self.categories[column])
+            lookup[value] = code
+            self.categories[column].append(value)
+        return code
+
+    def name(self, index):
+        """
+        Liefert den Dateinamen einer Datei.
+
+        Args:
+            index (int): Position der Datei im Katalog.
+
+        Returns:
+            str: Dateiname.
+        """
+        return os.fsdecode(bytes(self._names[self._name_offsets[index]:self._name_offsets[index + 1]]))
+
+    def path(self, index):
+        """
+        Liefert den Pfad einer Datei.
+
+        Args:
+            index (int): Position der Datei im Katalog.
+
+        Returns:
+            str: Pfad zur Datei.
+        """
+        return os.path.join(self.categories["directory"][self.directory_ids[index]], self.name(index))
+
+    def record(self, index):
+        """
+        Liefert die Angaben zu einer Datei im Format von FileOrganizer._analyze_file.
+
+        Args:
+            index (int): Position der Datei im Katalog.
+
+        Returns:
+            dict: path, name, size, modified, extension und type der Datei.
+        """
+        name = self.name(index)
+        return {
+            "path": os.path.join(self.categories["directory"][self.directory_ids[index]], name),
+            "name": name,
+            "size": self.sizes[index],
+            "modified": self.mtimes[index],
+            "extension": self.categories["extension"][self.extension_codes[index]],
+            "type": self.categories["type"][self.type_codes[index]]
+        }
+
+    def to_records(self):
+        """
+        Liefert alle Dateien als Liste von Dictionaries wie vor der spaltenweisen Speicherung.
+
+        Returns:
+            list: Ein Dictionary je Datei.
+        """
+        return [self.record(index) for index in range(len(self))]
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __iter__(self):
+        for index in range(len(self.sizes)):
+            yield self.record(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Index außerhalb des Katalogs")
+        return self.record(index)
+
+    def __eq__(self, other):
+        if isinstance(other, FileCatalog):
+            return len(self) == len(other) and self.to_records() == other.to_records()
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and self.to_records() == list(other)
+        return NotImplemented
+
+    # Veränderlich wie eine Liste und daher nicht hashbar
+    __hash__ = None
+
+    def __repr__(self):
+        return f"FileCatalog({len(self)} Dateien)"
+
+    def _array(self, column):
+        """
+        Liefert das interne Array einer Spalte.
+
+        Args:
+            column (str): Name der Spalte.
+
+        Returns:
+            array: Werte oder Nummern der Spalte.
+        """
+        if column not in COLUMNS:
+            raise ValueError(f"Unbekannte Spalte: {column}")
+        return {
+            "size": self.sizes,
+            "modified": self.mtimes,
+            "extension": self.extension_codes,
+            "type": self.type_codes,
+            "directory": self.directory_ids
+        }[column]
+
+    def column(self, column):
+        """
+        Liefert eine Kopie einer Spalte; kategoriale Spalten als Nummern in categories[column].
+
+        Args:
+            column (str): "size", "modified", "extension", "type" oder "directory".
+
+        Returns:
+            numpy.ndarray | array: NumPy-Array, ohne NumPy ein array.array.
+        """
+        values = self._array(column)
+        if np is None:
+            return array(values.typecode, values)
+        return np.array(values, dtype=_DTYPES[values.typecode])
+
+    def take(self, indices):
+        """
+        Erstellt einen Katalog aus ausgewählten Dateien mit denselben Kategorienlisten.
+
+        Args:
+            indices (iterable): Positionen der Dateien in der gewünschten Reihenfolge.
+
+        Returns:
+            FileCatalog: Neuer Katalog.
+        """
+        catalog = FileCatalog(self.categories)
+        if np is not None:
+            positions = np.fromiter(indices, dtype=np.int64)
+            for column in COLUMNS:
+                source = self._array(column)
+                if len(source):
+                    catalog._array(column).frombytes(
+                        np.frombuffer(source, dtype=_DTYPES[source.typecode])[positions].tobytes()
+                    )
+        else:
+            positions = list(indices)
+            for column in COLUMNS:
+                source = self._array(column)
+                catalog._array(column).extend(source[index] for index in positions)
+
+        for index in positions:
+            catalog._names += self._names[self._name_offsets[index]:self._name_offsets[index + 1]]
+            catalog._name_offsets.append(len(catalog._names))
+        return catalog
+
+    def _codes_for(self, column, values):
+        """
+        Übersetzt Werte einer kategorialen Spalte in ihre Nummern; unbekannte Werte entfallen.
+
+        Args:
+            column (str): Kategoriale Spalte.
+            values (str | list): Ein Wert oder mehrere Werte.
+
+        Returns:
+            list: Nummern der Werte.
+        """
+        if isinstance(values, str):
+            values = [values]
+        lookup = self._lookups[column]
+        return [lookup[value] for value in values if value in lookup]
+
+    def filter(self, file_types=None, extensions=None, min_size=None, max_size=None,
+               modified_after=None, modified_before=None):
+        """
+        Wählt Dateien anhand von Typ, Erweiterung, Größe und Änderungszeit aus.
+
+        Args:
+            file_types (str | list, optional): Zulässige Dateitypen.
+            extensions (str | list, optional): Zulässige Erweiterungen in Kleinbuchstaben.
+            min_size (int, optional): Mindestgröße in Bytes.
+            max_size (int, optional): Höchstgröße in Bytes.
+            modified_after (float, optional): Nur Dateien, die ab diesem Zeitpunkt geändert wurden.
+            modified_before (float, optional): Nur Dateien, die vor diesem Zeitpunkt geändert wurden.
+
+        Returns:
+            FileCatalog: Katalog der passenden Dateien in ursprünglicher Reihenfolge.
+        """
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            if len(self):
+                if file_types is not None:
+                    mask &= np.isin(self._view("type"), self._codes_for("type", file_types))
+                if extensions is not None:
+                    mask &= np.isin(self._view("extension"), self._codes_for("extension", extensions))
+                if min_size is not None:
+                    mask &= self._view("size") >= min_size
+                if max_size is not None:
+                    mask &= self._view("size") <= max_size
+                if modified_after is not None:
+                    mask &= self._view("modified") >= modified_after
+                if modified_before is not None:
+                    mask &= self._view("modified") < modified_before
+            return self.take(np.flatnonzero(mask))
+
+        type_codes = set(self._codes_for("type", file_types)) if file_types is not None else None
+        extension_codes = set(self._codes_for("extension", extensions)) if extensions is not None else None
+        return self.take(
+            index for index in range(len(self))
+            if (type_codes is None or self.type_codes[index] in type_codes)
+            and (extension_codes is None or self.extension_codes[index] in extension_codes)
+            and (min_size is None or self.sizes[index] >= min_size)
+            and (max_size is None or self.sizes[index] <= max_size)
+            and (modified_after is None or self.mtimes[index] >= modified_after)
+            and (modified_before is None or self.mtimes[index] < modified_before)
+        )
+
+    def _view(self, column):
+        """
+        Liefert eine NumPy-Ansicht einer Spalte ohne Kopie (nur kurzlebig verwenden,
+        da das Array während der Ansicht nicht wachsen kann).
+
+        Args:
+            column (str): Name der Spalte.
+
+        Returns:
+            numpy.ndarray: Ansicht der Spalte.
+        """
+        values = self._array(column)
+        return np.frombuffer(values, dtype=_DTYPES[values.typecode])
+
+    def group_by(self, column, min_count=1):
+        """
+        Gruppiert die Dateien nach den Werten einer Spalte.
+
+        Gruppen erscheinen in der Reihenfolge des ersten Vorkommens ihres Werts, die
+        Dateien einer Gruppe in der Reihenfolge des Katalogs.
+
+        Args:
+            column (str): "size", "modified", "extension", "type" oder "directory".
+            min_count (int): Mindestanzahl von Dateien einer Gruppe.
+
+        Yields:
+            tuple: (Wert, Liste der Positionen im Katalog).
+        """
+        if not len(self):
+            return
+        decode = self.categories[column].__getitem__ if column in CATEGORICAL_COLUMNS else None
+
+        if np is not None:
+            values = self._view(column)
+            order = np.argsort(values, kind="stable")
+            sorted_values = values[order]
+            starts = np.flatnonzero(np.concatenate(([True], sorted_values[1:] != sorted_values[:-1])))
+            ends = np.append(starts[1:], len(order))
+            keep = (ends - starts) >= min_count
+            starts = starts[keep]
+            ends = ends[keep]
+            first = np.argsort(order[starts], kind="stable")
+            for start, end in zip(starts[first].tolist(), ends[first].tolist()):
+                value = sorted_values[start].item()
+                yield decode(value) if decode else value, order[start:end].tolist()
+            return
+
+        groups = {}
+        for index, value in enumerate(self._array(column)):
+            groups.setdefault(value, []).append(index)
+        for value, indices in groups.items():
+            if len(indices) >= min_count:
+                yield decode(value) if decode else value, indices
+
+    def count_by(self, column):
+        """
+        Zählt die Dateien je Wert einer Spalte.
+
+        Args:
+            column (str): "size", "modified", "extension", "type" oder "directory".
+
+        Returns:
+            dict: Anzahl der Dateien je Wert in der Reihenfolge des ersten Vorkommens.
+        """
+        if np is not None and column in CATEGORICAL_COLUMNS and len(self):
+            # Kategorien werden beim ersten Vorkommen angelegt; Nummern folgen dieser Reihenfolge
+            counts = np.bincount(self._view(column), minlength=len(self.categories[column]))
+            return {value: int(count) for value, count in zip(self.categories[column], counts.tolist()) if count}
+        return {value: len(indices) for value, indices in self.group_by(column)}
+
+def json_default(obj):
+    """
+    Serialisierungshilfe für json.dumps(..., default=json_default), z. B. für das
+    Ergebnis von FileOrganizer.analyze_directory.
+
+    Args:
+        obj: Objekt, das json nicht selbst serialisieren kann.
+
+    Returns:
+        list: Einträge eines FileCatalog als Liste von Dictionaries.
+
+    Raises:
+        TypeError: Wenn das Objekt kein FileCatalog ist.
+    """
+    if isinstance(obj, FileCatalog):
+        return obj.to_records()
+    raise TypeError(f"Objekt vom Typ {type(obj).__name__} ist nicht JSON-serialisierbar")
+
+def benchmark_memory(file_count=100000, files_per_directory=100):
+    """
+    Vergleicht den Speicherbedarf je Datei von FileCatalog und der früheren Liste von Dictionaries.
+
+    Args:
+        file_count (int): Anzahl synthetischer Dateien.
+        files_per_directory (int): Dateien je Verzeichnis.
+
+    Returns:
+        dict: Bytes je Datei für beide Strukturen und ihr Verhältnis.
+    """
+    extensions = [(".txt", "text"), (".jpg", "image"), (".csv", "data"), (".log", "other")]
+
+    def synthetic_files():
+        for number in range(file_count):
+            extension, file_type = extensions[number % len(extensions)]
+            directory = f"/daten/archiv/ordner{number // files_per_directory:06d}"
+            name = f"datei{number:08d}{extension}"
+            yield f"{directory}/{name}", name, number * 7919 % 1000003, 1.7e9 + number, extension, file_type
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        records = [
+            {"path": path, "name": name, "size": size, "modified": modified,
+             "extension": extension, "type": file_type}
+            for path, name, size, modified, extension, file_type in synthetic_files()
+        ]
+        records_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        del records
+
+        baseline = tracemalloc.get_traced_memory()[0]
+        catalog = FileCatalog()
+        for path, _, size, modified, extension, file_type in synthetic_files():
+            catalog.add(path, size, modified, extension, file_type)
+        catalog_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        del catalog
+    finally:
+        tracemalloc.stop()
+
+    results = {
+        "records_bytes_per_file": records_bytes / file_count,
+        "catalog_bytes_per_file": catalog_bytes / file_count,
+        "ratio": records_bytes / catalog_bytes if catalog_bytes else float("inf")
+    }
+    logger.info(
+        f"Speicher je Datei: {results['records_bytes_per_file']:.0f} B (Dictionaries), "
+        f"{results['catalog_bytes_per_file']:.0f} B (FileCatalog)"
+    )
+    return results
+
+# Beispiel für die Verwendung
+if __name__ == "__main__":
+    results = benchmark_memory()
+    print(f"Liste von Dictionaries: {results['records_bytes_per_file']:.0f} Bytes je Datei")
+    print(f"FileCatalog:            {results['catalog_bytes_per_file']:.0f} Bytes je Datei")
+    print(f"Faktor:                 {results['ratio']:.1f}")
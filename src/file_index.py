@@ -0,0 +1,211 @@
+import os
+import sys
+import logging
+import tracemalloc
+from array import array
+from pathlib import Path
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("file_index")
+
+class FileIndex:
+    """
+    Spaltenweise gespeicherte Dateiliste für die Duplikatsuche.
+
+    Größe, Gerät, Inode und Verzeichnis jeder Datei liegen in typisierten Arrays,
+    die Dateinamen hintereinander in einem Bytepuffer. Jedes Verzeichnis wird nur
+    einmal gespeichert und über seine Nummer referenziert. Path-Objekte entstehen
+    erst beim Zugriff, z. B. nur für Dateien in Größenkollisionen. Gegenüber
+    Listen von Path-Objekten in einem Dictionary sinkt der Speicherbedarf je
+    Datei auf einen Bruchteil.
+    """
+    __slots__ = ("sizes", "devices", "inodes", "directory_ids", "directories",
+                 "_directory_lookup", "_names", "_name_offsets")
+
+    def __init__(self):
+        """
+        Initialisiert einen leeren Index.
+        """
+        self.sizes = array("Q")
+        self.devices = array("Q")
+        self.inodes = array("Q")
+        self.directory_ids = array("I")
+        self.directories = []
+        self._directory_lookup = {}
+        self._names = bytearray()
+        self._name_offsets = array("Q", [0])
+
+    def add(self, file_path, size, device=0, inode=0):
+        """
+        Fügt eine Datei hinzu.
+
+        Args:
+            file_path (Path): Pfad zur Datei.
+            size (int): Dateigröße in Bytes.
+            device (int): Gerätenummer (st_dev).
+            inode (int): Inode-Nummer (st_ino); 0, wenn das Dateisystem keine liefert.
+        """
+        directory, name = os.path.split(os.fspath(file_path))
+        directory_id = self._directory_lookup.get(directory)
+        if directory_id is None:
+            directory_id = len(self.directories)
+            self._directory_lookup[directory] = directory_id
+            self.directories.append(directory)
+
+        self.sizes.append(size)
+        self.devices.append(device)
+        self.inodes.append(inode)
+        self.directory_ids.append(directory_id)
+        self._names += os.fsencode(name)
+        self._name_offsets.append(len(self._names))
+
+    def path(self, index):
+        """
+        Liefert den Pfad einer Datei.
+
+        Args:
+            index (int): Position der Datei im Index.
+
+        Returns:
+            Path: Pfad zur Datei.
+        """
+        name = os.fsdecode(bytes(self._names[self._name_offsets[index]:self._name_offsets[index + 1]]))
+        return Path(self.directories[self.directory_ids[index]], name)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __iter__(self):
+        """
+        Liefert alle Dateien in der Reihenfolge des Hinzufügens.
+
+        Yields:
+            tuple: (Pfad, Größe).
+        """
+        for index in range(len(self.sizes)):
+            yield self.path(index), self.sizes[index]
+
+    def iter_size_groups(self, min_count=2, min_size=1, sort_by_size=False):
+        """
+        Gruppiert die Dateien nach Größe.
+
+        Mit NumPy wird stabil per argsort sortiert, sonst mit sorted(); die
+        Dateien einer Gruppe bleiben in der Reihenfolge des Hinzufügens.
+
+        Args:
+            min_count (int): Mindestanzahl von Dateien einer Gruppe.
+            min_size (int): Kleinere Dateien (standardmäßig leere) werden übersprungen.
+            sort_by_size (bool): Aufsteigend nach Größe statt in der Reihenfolge des
+                ersten Vorkommens jeder Größe.
+
+        Yields:
+            tuple: (Größe, Liste der Positionen im Index).
+        """
+        if not self.sizes:
+            return
+
+        if np is not None:
+            sizes = np.frombuffer(self.sizes, dtype=np.uint64)
+            order = np.argsort(sizes, kind="stable")
+            sorted_sizes = sizes[order]
+            starts = np.flatnonzero(np.concatenate(([True], sorted_sizes[1:] != sorted_sizes[:-1])))
+            ends = np.append(starts[1:], len(order))
+            keep = ((ends - starts) >= min_count) & (sorted_sizes[starts] >= min_size)
+            starts = starts[keep]
+            ends = ends[keep]
+            if not sort_by_size:
+                first = np.argsort(order[starts], kind="stable")
+                starts = starts[first]
+                ends = ends[first]
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                yield int(sorted_sizes[start]), order[start:end].tolist()
+            return
+
+        sizes = self.sizes
+        order = sorted(range(len(sizes)), key=sizes.__getitem__)
+        groups = []
+        start = 0
+        while start < len(order):
+            size = sizes[order[start]]
+            end = start + 1
+            while end < len(order) and sizes[order[end]] == size:
+                end += 1
+            if end - start >= min_count and size >= min_size:
+                groups.append((order[start], start, end))
+            start = end
+        if not sort_by_size:
+            groups.sort()
+        for _, start, end in groups:
+            yield sizes[order[start]], order[start:end]
+
+def benchmark_memory(file_count=100000, files_per_directory=100):
+    """
+    Vergleicht den Speicherbedarf je Datei von FileIndex und Listen von Path-Objekten.
+
+    Die Vergleichsstruktur entspricht der früheren Gruppierung: ein Dictionary
+    Größe -> Liste von Pfaden und ein Dictionary (Gerät, Inode) -> Pfad. Gemessen
+    wird mit tracemalloc der Speicher, der nach dem Aufbau belegt bleibt.
+
+    Args:
+        file_count (int): Anzahl synthetischer Dateien.
+        files_per_directory (int): Dateien je Verzeichnis.
+
+    Returns:
+        dict: Bytes je Datei für beide Strukturen und ihr Verhältnis.
+    """
+    def synthetic_files():
+        for number in range(file_count):
+            directory = f"/daten/archiv/ordner{number // files_per_directory:06d}"
+            yield f"{directory}/datei{number:08d}.dat", number * 7919 % max(1, file_count // 2), number + 1
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        size_groups = {}
+        inode_paths = {}
+        for path, size, inode in synthetic_files():
+            file_path = Path(path)
+            str(file_path)  # Den Pfad-String zwischenspeichern wie nach stat() in der Suche
+            inode_paths[(1, inode)] = file_path
+            size_groups.setdefault(size, []).append(file_path)
+        dict_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        del size_groups, inode_paths
+
+        baseline = tracemalloc.get_traced_memory()[0]
+        index = FileIndex()
+        for path, size, inode in synthetic_files():
+            index.add(path, size, 1, inode)
+        index_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        del index
+    finally:
+        tracemalloc.stop()
+
+    results = {
+        "dict_bytes_per_file": dict_bytes / file_count,
+        "index_bytes_per_file": index_bytes / file_count,
+        "ratio": dict_bytes / index_bytes if index_bytes else float("inf")
+    }
+    logger.info(
+        f"Speicher je Datei: {results['dict_bytes_per_file']:.0f} B (Dictionary), "
+        f"{results['index_bytes_per_file']:.0f} B (FileIndex)"
+    )
+    return results
+
+# Beispiel für die Verwendung
+if __name__ == "__main__":
+    results = benchmark_memory()
+    print(f"Listen von Path-Objekten: {results['dict_bytes_per_file']:.0f} Bytes je Datei")
+    print(f"FileIndex:                {results['index_bytes_per_file']:.0f} Bytes je Datei")
+    print(f"Faktor:                   {results['ratio']:.1f}")
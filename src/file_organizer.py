@@ -3,6 +3,9 @@ import sys
 import logging
 from pathlib import Path
 
+from src.scanner import DirectoryScanner
+from src.file_catalog import FileCatalog
+
 # Konfiguration des Logging-Systems
 logging.basicConfig(
     level=logging.INFO,
@@ -14,19 +17,37 @@ logging.basicConfig(
 
 logger = logging.getLogger("file_organizer")
 
+def _suffix(name):
+    """
+    Liefert die Erweiterung eines Dateinamens wie Path.suffix, ohne ein Path-Objekt zu erzeugen.
+    
+    Args:
+        name (str): Dateiname.
+        
+    Returns:
+        str: Erweiterung mit Punkt oder eine leere Zeichenkette.
+    """
+    index = name.rfind(".")
+    if 0 < index < len(name) - 1:
+        return name[index:]
+    return ""
+
 class FileOrganizer:
     """
     Hauptklasse für die KI-basierte Dateiverwaltungsanwendung.
     """
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, scanner=None):
         """
         Initialisiert die FileOrganizer-Instanz.
         
         Args:
             config_path (str, optional): Pfad zur Konfigurationsdatei.
+            scanner (DirectoryScanner, optional): Scanner für Verzeichnisbäume, z. B. parallel
+                oder mit Snapshot für inkrementelle Scans.
         """
         self.logger = logger
         self.logger.info("Initialisiere FileOrganizer")
+        self.scanner = scanner or DirectoryScanner()
         
         # Standardkonfiguration
         self.config = {
@@ -72,14 +93,18 @@ class FileOrganizer:
             directory_path (str): Pfad zum zu analysierenden Verzeichnis.
             
         Returns:
-            dict: Informationen über die Dateien im Verzeichnis.
+            dict: Informationen über die Dateien im Verzeichnis; "files" ist ein
+                FileCatalog, der sich bei Iteration, Indexzugriff, Slices und Vergleich
+                mit == wie eine Liste von Dictionaries verhält. Zum Serialisieren
+                json.dumps(result, default=json_default) aus src.file_catalog verwenden.
         """
         self.logger.info(f"Analysiere Verzeichnis: {directory_path}")
         
+        catalog = FileCatalog()
         result = {
             "total_files": 0,
             "file_types": {},
-            "files": []
+            "files": catalog
         }
         
         try:
@@ -88,19 +113,15 @@ class FileOrganizer:
                 self.logger.error(f"Verzeichnis existiert nicht oder ist kein Verzeichnis: {directory_path}")
                 return result
             
-            for file_path in directory.glob("**/*"):
-                if file_path.is_file():
-                    file_info = self._analyze_file(file_path)
-                    result["files"].append(file_info)
-                    
-                    # Zähle Dateitypen
-                    file_type = file_info["type"]
-                    if file_type in result["file_types"]:
-                        result["file_types"][file_type] += 1
-                    else:
-                        result["file_types"][file_type] = 1
-                    
-                    result["total_files"] += 1
+            extension_types = self._extension_types()
+            for entry in self.scanner.iter_files(directory):
+                extension = _suffix(entry.name).lower()
+                catalog.add(entry.path, entry.size, entry.mtime, extension,
+                            extension_types.get(extension, "unknown"))
+            
+            # Zähle Dateitypen
+            result["file_types"] = catalog.count_by("type")
+            result["total_files"] = len(catalog)
             
             self.logger.info(f"Analyse abgeschlossen: {result['total_files']} Dateien gefunden")
             return result
@@ -109,33 +130,50 @@ class FileOrganizer:
             self.logger.error(f"Fehler bei der Verzeichnisanalyse: {e}")
             return result
     
-    def _analyze_file(self, file_path):
+    def _analyze_file(self, file_path, entry=None):
         """
         Analysiert eine einzelne Datei und gibt Informationen darüber zurück.
         
         Args:
             file_path (Path): Pfad zur zu analysierenden Datei.
+            entry (ScanEntry, optional): Eintrag des Scanners; ohne ihn wird die Datei abgefragt.
             
         Returns:
             dict: Informationen über die Datei.
         """
+        if entry is None:
+            stat_result = file_path.stat()
+            size, modified = stat_result.st_size, stat_result.st_mtime
+        else:
+            size, modified = entry.size, entry.mtime
+        
         file_info = {
             "path": str(file_path),
             "name": file_path.name,
-            "size": file_path.stat().st_size,
-            "modified": file_path.stat().st_mtime,
+            "size": size,
+            "modified": modified,
             "extension": file_path.suffix.lower(),
             "type": "unknown"
         }
         
         # Bestimme Dateityp anhand der Erweiterung
-        for file_type, extensions in self.config["supported_extensions"].items():
-            if file_info["extension"] in extensions:
-                file_info["type"] = file_type
-                break
+        file_info["type"] = self._extension_types().get(file_info["extension"], "unknown")
         
         return file_info
     
+    def _extension_types(self):
+        """
+        Ordnet jeder unterstützten Erweiterung ihren Dateityp zu.
+        
+        Returns:
+            dict: Dateityp je Erweiterung; bei mehrfach genannten Erweiterungen gilt der erste Typ.
+        """
+        extension_types = {}
+        for file_type, extensions in self.config["supported_extensions"].items():
+            for extension in extensions:
+                extension_types.setdefault(extension, file_type)
+        return extension_types
+    
     def get_file_preview(self, file_path):
         """
         Erstellt eine Vorschau für eine Datei.
@@ -211,29 +249,30 @@ class FileOrganizer:
             
             # Organisiere nach Typ
             if organize_by == "type":
-                for file_info in analysis["files"]:
-                    file_path = Path(file_info["path"])
-                    file_type = file_info["type"]
-                    
+                files = analysis["files"]
+                for file_type, indices in files.group_by("type"):
                     # Erstelle Zielverzeichnis für diesen Dateityp
                     type_dir = target / file_type
                     if not type_dir.exists():
                         type_dir.mkdir(parents=True)
                     
-                    # Zieldatei
-                    target_file = type_dir / file_path.name
-                    
-                    # Überspringe, wenn Datei bereits im richtigen Verzeichnis ist
-                    if str(file_path.parent) == str(type_dir):
-                        result["skipped_files"] += 1
-                        continue
-                    
-                    try:
-                        # Verschiebe Datei
-                        file_path.rename(target_file)
-                        result["organized_files"] += 1
-                    except Exception as e:
-                        result["errors"].append(f"Fehler beim Verschieben von {file_path}: {e}")
+                    for index in indices:
+                        file_path = Path(files.path(index))
+                        
+                        # Zieldatei
+                        target_file = type_dir / file_path.name
+                        
+                        # Überspringe, wenn Datei bereits im richtigen Verzeichnis ist
+                        if str(file_path.parent) == str(type_dir):
+                            result["skipped_files"] += 1
+                            continue
+                        
+                        try:
+                            # Verschiebe Datei
+                            file_path.rename(target_file)
+                            result["organized_files"] += 1
+                        except Exception as e:
+                            result["errors"].append(f"Fehler beim Verschieben von {file_path}: {e}")
             
             self.logger.info(f"Organisation abgeschlossen: {result['organized_files']} Dateien organisiert")
             return result
@@ -264,25 +303,17 @@ class FileOrganizer:
             # Analysiere Verzeichnis
             analysis = self.analyze_directory(directory_path)
             
-            # Gruppiere Dateien nach Größe (erster Schritt zur Duplikaterkennung)
-            size_groups = {}
-            for file_info in analysis["files"]:
-                size = file_info["size"]
-                if size in size_groups:
-                    size_groups[size].append(file_info)
-                else:
-                    size_groups[size] = [file_info]
-            
-            # Finde Gruppen mit mehr als einer Datei gleicher Größe
-            for size, files in size_groups.items():
-                if len(files) > 1:
-                    # Hier würde ein genauerer Vergleich stattfinden (z.B. Inhalt, Hash)
-                    # Für dieses Beispiel nehmen wir an, dass Dateien mit gleicher Größe Duplikate sind
-                    result["duplicate_groups"].append({
-                        "size": size,
-                        "files": files
-                    })
-                    result["total_duplicates"] += len(files) - 1
+            # Gruppiere Dateien nach Größe (erster Schritt zur Duplikaterkennung);
+            # nur Gruppen mit mehr als einer Datei gleicher Größe werden gebildet
+            catalog = analysis["files"]
+            for size, indices in catalog.group_by("size", min_count=2):
+                # Hier würde ein genauerer Vergleich stattfinden (z.B. Inhalt, Hash)
+                # Für dieses Beispiel nehmen wir an, dass Dateien mit gleicher Größe Duplikate sind
+                result["duplicate_groups"].append({
+                    "size": size,
+                    "files": [catalog.record(index) for index in indices]
+                })
+                result["total_duplicates"] += len(indices) - 1
             
             self.logger.info(f"Duplikatsuche abgeschlossen: {result['total_duplicates']} Duplikate gefunden")
             return result
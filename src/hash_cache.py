@@ -0,0 +1,162 @@
+import os
+import sys
+import logging
+import sqlite3
+from pathlib import Path
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("hash_cache")
+
+# Standardpfad der Cache-Datenbank im Benutzerverzeichnis
+DEFAULT_CACHE_PATH = Path.home() / ".file_organizer" / "hash_cache.sqlite3"
+
+class HashCache:
+    """
+    Persistenter Cache für Inhaltshashes von Dateien.
+
+    Ein Eintrag gilt nur, solange Gerät, Inode, Größe und Änderungszeit (mtime_ns)
+    der Datei unverändert sind. Ändert sich eines dieser Merkmale, wird der
+    gespeicherte Hash ignoriert und beim nächsten Speichern überschrieben.
+    Pfade werden als Bytes (os.fsencode) gespeichert, damit auch Dateinamen, die
+    kein gültiges UTF-8 sind, zwischengespeichert werden können.
+    """
+    def __init__(self, db_path=None, commit_interval=1000):
+        """
+        Initialisiert den HashCache.
+
+        Args:
+            db_path (str, optional): Pfad zur SQLite-Datenbank. Standardmäßig
+                ~/.file_organizer/hash_cache.sqlite3.
+            commit_interval (int): Anzahl gespeicherter Hashes, nach der automatisch
+                auf die Festplatte geschrieben wird.
+        """
+        self.logger = logger
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_PATH
+        self.commit_interval = commit_interval
+        self._pending = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.db_path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path BLOB NOT NULL,
+                kind TEXT NOT NULL,
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (path, kind)
+            )
+            """
+        )
+        # Ältere Caches speichern Pfade als Text; diese werden in Bytes umgewandelt
+        self.connection.execute("UPDATE file_hashes SET path = CAST(path AS BLOB) WHERE typeof(path) = 'text'")
+        self.connection.commit()
+
+    def get(self, file_path, kind, stat_result=None):
+        """
+        Liefert einen gespeicherten Hash, sofern die Datei unverändert ist.
+
+        Args:
+            file_path (str): Pfad zur Datei.
+            kind (str): Art des Hashes (z. B. "sha256" oder "sha256-sample-16384").
+            stat_result (os.stat_result, optional): Bereits ermittelte Dateiinformationen.
+
+        Returns:
+            str: Gespeicherter Hash oder None, wenn kein gültiger Eintrag existiert.
+        """
+        try:
+            stat_result = stat_result or os.stat(file_path)
+        except OSError:
+            return None
+
+        row = self.connection.execute(
+            "SELECT device, inode, size, mtime_ns, digest FROM file_hashes WHERE path = ? AND kind = ?",
+            (os.fsencode(file_path), kind)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        device, inode, size, mtime_ns, digest = row
+        if (device, inode, size, mtime_ns) != (stat_result.st_dev, stat_result.st_ino,
+                                               stat_result.st_size, stat_result.st_mtime_ns):
+            return None
+
+        return digest
+
+    def put(self, file_path, kind, digest, stat_result=None):
+        """
+        Speichert den Hash einer Datei zusammen mit ihren Identitätsmerkmalen.
+
+        Args:
+            file_path (str): Pfad zur Datei.
+            kind (str): Art des Hashes.
+            digest (str): Hash-Wert.
+            stat_result (os.stat_result, optional): Dateiinformationen zum Zeitpunkt
+                vor der Hash-Berechnung.
+        """
+        try:
+            stat_result = stat_result or os.stat(file_path)
+        except OSError:
+            return
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO file_hashes (path, kind, device, inode, size, mtime_ns, digest) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (os.fsencode(file_path), kind, stat_result.st_dev, stat_result.st_ino,
+             stat_result.st_size, stat_result.st_mtime_ns, digest)
+        )
+
+        self._pending += 1
+        if self._pending >= self.commit_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Schreibt ausstehende Einträge auf die Festplatte.
+        """
+        if self._pending:
+            self.connection.commit()
+            self._pending = 0
+
+    def prune(self):
+        """
+        Entfernt Einträge für Dateien, die nicht mehr existieren.
+
+        Returns:
+            int: Anzahl entfernter Einträge.
+        """
+        stale = [
+            (path,) for (path,) in self.connection.execute("SELECT DISTINCT path FROM file_hashes")
+            if not os.path.exists(path)
+        ]
+        self.connection.executemany("DELETE FROM file_hashes WHERE path = ?", stale)
+        self.connection.commit()
+        self.logger.info(f"Veraltete Cache-Einträge entfernt: {len(stale)}")
+        return len(stale)
+
+    def close(self):
+        """
+        Schreibt ausstehende Einträge und schließt die Datenbank.
+        """
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
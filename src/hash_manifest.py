@@ -0,0 +1,158 @@
+import os
+import sys
+import logging
+import sqlite3
+from pathlib import Path
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("hash_manifest")
+
+class HashManifest:
+    """
+    Kompaktes Manifest (Größe, Digest, Pfad) eines gescannten Verzeichnisbaums.
+
+    Digests werden binär gespeichert, ein Index über (Größe, Digest) erlaubt es,
+    für eine Dateigröße sämtliche Digests des Archivs abzufragen, ohne das
+    gesamte Manifest in den Speicher zu laden. Pfade werden als Bytes
+    (os.fsencode) gespeichert, damit auch Dateinamen ohne gültiges UTF-8
+    aufgenommen werden können.
+    """
+    def __init__(self, manifest_path, algorithm=None, commit_interval=10000):
+        """
+        Öffnet oder erstellt ein Manifest.
+
+        Args:
+            manifest_path (str): Pfad zur Manifest-Datei (SQLite).
+            algorithm (str, optional): Hash-Algorithmus der Digests. Beim Erstellen
+                erforderlich; beim Öffnen wird er aus dem Manifest gelesen.
+            commit_interval (int): Anzahl Einträge, nach der automatisch geschrieben wird.
+        """
+        self.logger = logger
+        self.manifest_path = Path(manifest_path)
+        self.commit_interval = commit_interval
+        self._pending = 0
+
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.manifest_path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                path BLOB PRIMARY KEY,
+                size INTEGER NOT NULL,
+                digest BLOB NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_size_digest ON entries (size, digest)")
+        # Ältere Manifeste speichern Pfade als Text; diese werden in Bytes umgewandelt
+        self.connection.execute("UPDATE entries SET path = CAST(path AS BLOB) WHERE typeof(path) = 'text'")
+
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'algorithm'").fetchone()
+        if row is None:
+            if algorithm is None:
+                raise ValueError(f"Manifest enthält keinen Hash-Algorithmus: {manifest_path}")
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('algorithm', ?)", (algorithm,))
+        elif algorithm is not None and algorithm != row[0]:
+            raise ValueError(f"Manifest verwendet {row[0]}, nicht {algorithm}: {manifest_path}")
+        self.algorithm = algorithm or row[0]
+        self.connection.commit()
+
+    def add(self, file_path, size, digest):
+        """
+        Fügt eine Datei zum Manifest hinzu oder aktualisiert sie.
+
+        Args:
+            file_path (str): Pfad zur Datei.
+            size (int): Dateigröße in Bytes.
+            digest (str): Hexadezimaler Hash-Wert.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries (path, size, digest) VALUES (?, ?, ?)",
+            (os.fsencode(file_path), size, bytes.fromhex(digest))
+        )
+        self._pending += 1
+        if self._pending >= self.commit_interval:
+            self.flush()
+
+    def lookup_size(self, size):
+        """
+        Liefert alle Einträge einer Dateigröße als Index Digest -> Pfade.
+
+        Args:
+            size (int): Dateigröße in Bytes.
+
+        Returns:
+            dict: Zuordnung hexadezimaler Digest -> Liste der Pfade im Manifest.
+        """
+        index = {}
+        for digest, path in self.connection.execute(
+            "SELECT digest, path FROM entries WHERE size = ? ORDER BY digest, path", (size,)
+        ):
+            index.setdefault(digest.hex(), []).append(os.fsdecode(path))
+        return index
+
+    def remove_tree(self, directory):
+        """
+        Entfernt alle Einträge eines Verzeichnisses und seiner Unterverzeichnisse.
+
+        Args:
+            directory (str): Verzeichnis, dessen Einträge entfernt werden.
+
+        Returns:
+            int: Anzahl entfernter Einträge.
+        """
+        prefix = os.fsencode(os.path.join(directory, ""))
+        cursor = self.connection.execute(
+            "DELETE FROM entries WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+        )
+        self._pending += cursor.rowcount
+        return cursor.rowcount
+
+    def has_size(self, size):
+        """
+        Prüft, ob das Manifest Dateien einer Größe enthält.
+
+        Args:
+            size (int): Dateigröße in Bytes.
+
+        Returns:
+            bool: True, wenn mindestens ein Eintrag diese Größe hat.
+        """
+        return self.connection.execute(
+            "SELECT 1 FROM entries WHERE size = ? LIMIT 1", (size,)
+        ).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def flush(self):
+        """
+        Schreibt ausstehende Einträge auf die Festplatte.
+        """
+        if self._pending:
+            self.connection.commit()
+            self._pending = 0
+
+    def close(self):
+        """
+        Schreibt ausstehende Einträge und schließt das Manifest.
+        """
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,375 @@
+import os
+import sys
+import logging
+import hashlib
+import mmap
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("hashing")
+
+# Optionale Abhängigkeit für sehr schnelle nicht-kryptografische Hashes
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Standardalgorithmus für Duplikaterkennung und Hash-Cache
+DEFAULT_HASH_ALGORITHM = "sha256"
+
+# Grenzen für die adaptive Blockgröße beim Lesen in Bytes
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Ab dieser Dateigröße wird die Datei per mmap statt mit readinto gelesen
+MMAP_THRESHOLD = 256 * 1024 * 1024
+
+# Wiederverwendbare Lesepuffer je Thread
+_buffers = threading.local()
+
+# Drosselung der Lesevorgänge je Thread (siehe io_throttle.IOThrottle), ohne Eintrag ungedrosselt
+_read_throttle = threading.local()
+
+class _Crc32Hasher:
+    """
+    Hasher-Adapter für zlib.crc32 mit der Schnittstelle von hashlib.
+    """
+    def __init__(self):
+        self._value = 0
+
+    def update(self, data):
+        self._value = zlib.crc32(data, self._value)
+
+    def copy(self):
+        other = _Crc32Hasher()
+        other._value = self._value
+        return other
+
+    def digest(self):
+        return self._value.to_bytes(4, "big")
+
+    def hexdigest(self):
+        return f"{self._value:08x}"
+
+# Registrierte Hash-Algorithmen: Name -> Fabrikfunktion und Eignung für die Bestätigung
+HASH_ALGORITHMS = {}
+
+def register_hash_algorithm(name, factory, cryptographic):
+    """
+    Registriert einen Hash-Algorithmus.
+
+    Die Fabrikfunktion muss ein Objekt mit update(), copy(), digest() und
+    hexdigest() liefern. Algorithmen, die in einem ProcessPoolExecutor genutzt werden sollen,
+    müssen beim Import eines Moduls registriert werden.
+
+    Args:
+        name (str): Name des Algorithmus.
+        factory (callable): Erzeugt einen neuen Hasher.
+        cryptographic (bool): Ob der Algorithmus kollisionsresistent ist und damit
+            Duplikate ohne weitere Bestätigung nachweisen kann.
+    """
+    HASH_ALGORITHMS[name] = {
+        "factory": factory,
+        "cryptographic": cryptographic
+    }
+
+def get_hasher(name):
+    """
+    Erstellt einen neuen Hasher für einen registrierten Algorithmus.
+
+    Args:
+        name (str): Name des Algorithmus.
+
+    Returns:
+        object: Hasher mit update(), copy(), digest() und hexdigest().
+    """
+    if name not in HASH_ALGORITHMS:
+        raise ValueError(f"Unbekannter Hash-Algorithmus: {name} (verfügbar: {', '.join(HASH_ALGORITHMS)})")
+    return HASH_ALGORITHMS[name]["factory"]()
+
+def is_cryptographic(name):
+    """
+    Gibt zurück, ob ein Algorithmus als starker Hash gilt.
+
+    Args:
+        name (str): Name des Algorithmus.
+
+    Returns:
+        bool: True für kryptografische Algorithmen.
+    """
+    get_hasher(name)
+    return HASH_ALGORITHMS[name]["cryptographic"]
+
+def available_algorithms():
+    """
+    Gibt die Namen aller registrierten Algorithmen zurück.
+
+    Returns:
+        list: Namen der Algorithmen.
+    """
+    return list(HASH_ALGORITHMS)
+
+register_hash_algorithm("sha256", hashlib.sha256, True)
+register_hash_algorithm("blake2b", lambda: hashlib.blake2b(digest_size=32), True)
+register_hash_algorithm("md5", hashlib.md5, False)
+register_hash_algorithm("crc32", _Crc32Hasher, False)
+if xxhash is not None:
+    register_hash_algorithm("xxh64", xxhash.xxh64, False)
+    register_hash_algorithm("xxh3_128", xxhash.xxh3_128, False)
+
+def adaptive_chunk_size(file_size):
+    """
+    Bestimmt die Blockgröße zum Lesen einer Datei.
+
+    Kleine Dateien werden mit einem einzigen Aufruf gelesen, große in Blöcken von
+    höchstens MAX_CHUNK_SIZE, um die Anzahl der Systemaufrufe gering zu halten.
+
+    Args:
+        file_size (int): Dateigröße in Bytes.
+
+    Returns:
+        int: Blockgröße in Bytes.
+    """
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, file_size))
+
+def _get_buffer(size):
+    """
+    Liefert einen wiederverwendbaren Lesepuffer des aktuellen Threads.
+
+    Args:
+        size (int): Mindestgröße des Puffers in Bytes.
+
+    Returns:
+        memoryview: Sicht auf einen Puffer mit genau size Bytes.
+    """
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(size)
+        _buffers.buffer = buffer
+    return memoryview(buffer)[:size]
+
+def set_read_throttle(throttle):
+    """
+    Setzt die Drosselung für die Lesevorgänge beim Hashen im aktuellen Thread.
+
+    Andere Threads und andere Detektoren sind nicht betroffen; Pool-Worker erhalten
+    ihre Drosselung über io_throttle.configure_worker().
+
+    Args:
+        throttle: Objekt mit acquire(nbytes) und record(nbytes, latency) oder None.
+
+    Returns:
+        Die bisherige Drosselung des Threads.
+    """
+    previous = getattr(_read_throttle, "throttle", None)
+    _read_throttle.throttle = throttle
+    return previous
+
+def get_read_throttle():
+    """
+    Gibt die Drosselung der Lesevorgänge im aktuellen Thread zurück.
+
+    Returns:
+        Drosselung oder None.
+    """
+    return getattr(_read_throttle, "throttle", None)
+
+@contextmanager
+def read_throttle(throttle):
+    """
+    Setzt die Drosselung des aktuellen Threads für die Dauer eines with-Blocks.
+
+    Args:
+        throttle: Objekt mit acquire(nbytes) und record(nbytes, latency) oder None.
+    """
+    previous = set_read_throttle(throttle)
+    try:
+        yield throttle
+    finally:
+        set_read_throttle(previous)
+
+def _charge(throttle, nbytes, latency):
+    """
+    Verbucht einen abgeschlossenen Lesevorgang bei der Drosselung.
+
+    Berechnet werden die tatsächlich gelesenen Bytes; ein leerer Lesevorgang am
+    Dateiende zählt weder als Lesevorgang noch gegen die Bandbreite.
+
+    Args:
+        throttle: Drosselung.
+        nbytes (int): Gelesene Bytes.
+        latency (float): Dauer des Lesevorgangs in Sekunden.
+    """
+    if nbytes:
+        throttle.record(nbytes, latency)
+        throttle.acquire(nbytes)
+
+def read_into(f, buffer):
+    """
+    Liest in einen Puffer und beachtet dabei eine gesetzte Drosselung.
+
+    Args:
+        f: Im Binärmodus geöffnete Datei.
+        buffer (memoryview): Zielpuffer.
+
+    Returns:
+        int: Anzahl gelesener Bytes.
+    """
+    throttle = get_read_throttle()
+    if throttle is None:
+        return f.readinto(buffer)
+
+    start_time = time.perf_counter()
+    bytes_read = f.readinto(buffer)
+    _charge(throttle, bytes_read, time.perf_counter() - start_time)
+    return bytes_read
+
+def read_block(f, size):
+    """
+    Liest einen Block als bytes und beachtet dabei eine gesetzte Drosselung.
+
+    Args:
+        f: Im Binärmodus geöffnete Datei.
+        size (int): Maximale Anzahl zu lesender Bytes.
+
+    Returns:
+        bytes: Gelesene Daten.
+    """
+    throttle = get_read_throttle()
+    if throttle is None:
+        return f.read(size)
+
+    start_time = time.perf_counter()
+    block = f.read(size)
+    _charge(throttle, len(block), time.perf_counter() - start_time)
+    return block
+
+def hash_file(file_path, algorithm=DEFAULT_HASH_ALGORITHM, chunk_size=None):
+    """
+    Berechnet den Hash einer Datei ohne Zwischenkopien.
+
+    Gelesen wird mit readinto in einen je Thread wiederverwendeten Puffer, unter
+    Beachtung einer mit set_read_throttle() gesetzten Drosselung, und zwar genau
+    bis zur Dateigröße, sodass kein zusätzlicher leerer Lesevorgang anfällt. Sehr
+    große Dateien werden per mmap (mit MADV_SEQUENTIAL, sofern verfügbar) eingeblendet
+    und abschnittsweise direkt aus dem Seitencache gehasht.
+
+    Args:
+        file_path (str): Pfad zur Datei.
+        algorithm (str): Name des Hash-Algorithmus.
+        chunk_size (int, optional): Blockgröße in Bytes; standardmäßig adaptiv.
+
+    Returns:
+        str: Hexadezimaler Hash-Wert.
+    """
+    hasher = get_hasher(algorithm)
+
+    with open(file_path, 'rb', buffering=0) as f:
+        file_size = os.fstat(f.fileno()).st_size
+        chunk_size = chunk_size or adaptive_chunk_size(file_size)
+
+        if file_size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(mapped)
+                throttle = get_read_throttle()
+                try:
+                    for offset in range(0, len(view), MAX_CHUNK_SIZE):
+                        with view[offset:offset + MAX_CHUNK_SIZE] as block:
+                            if throttle is None:
+                                hasher.update(block)
+                                continue
+                            # Gelesen wird beim Zugriff auf die Seiten; gemessen wird daher update()
+                            start_time = time.perf_counter()
+                            hasher.update(block)
+                            _charge(throttle, len(block), time.perf_counter() - start_time)
+                finally:
+                    view.release()
+            return hasher.hexdigest()
+
+        buffer = _get_buffer(chunk_size)
+        remaining = file_size
+        while remaining > 0:
+            bytes_read = read_into(f, buffer[:min(chunk_size, remaining)])
+            if not bytes_read:
+                break
+            hasher.update(buffer[:bytes_read])
+            remaining -= bytes_read
+
+    return hasher.hexdigest()
+
+def hash_file_ranges(file_path, ranges, algorithm=DEFAULT_HASH_ALGORITHM):
+    """
+    Berechnet einen gemeinsamen Hash über mehrere Abschnitte einer Datei.
+
+    Args:
+        file_path (str): Pfad zur Datei.
+        ranges (list): Liste von (Offset, Länge)-Tupeln.
+        algorithm (str): Name des Hash-Algorithmus.
+
+    Returns:
+        str: Hexadezimaler Hash-Wert.
+    """
+    hasher = get_hasher(algorithm)
+
+    with open(file_path, 'rb', buffering=0) as f:
+        for offset, length in ranges:
+            buffer = _get_buffer(length)
+            f.seek(offset)
+            bytes_read = read_into(f, buffer)
+            hasher.update(buffer[:bytes_read])
+
+    return hasher.hexdigest()
+
+def benchmark_hash_algorithms(data_size=64 * 1024 * 1024, chunk_size=1024 * 1024, repeat=3):
+    """
+    Misst den Durchsatz aller registrierten Algorithmen auf diesem Rechner.
+
+    Gehasht werden Zufallsdaten im Arbeitsspeicher, gemessen wird also nur die
+    CPU-Leistung ohne Festplattenzugriffe. Es zählt der beste von mehreren Durchläufen.
+
+    Args:
+        data_size (int): Menge der zu hashenden Daten je Durchlauf in Bytes.
+        chunk_size (int): Größe der an update() übergebenen Blöcke in Bytes.
+        repeat (int): Anzahl der Durchläufe je Algorithmus.
+
+    Returns:
+        dict: Durchsatz in GB/s je Algorithmus.
+    """
+    chunk = memoryview(os.urandom(chunk_size))
+    chunks = max(1, data_size // chunk_size)
+    results = {}
+
+    for name in HASH_ALGORITHMS:
+        best = None
+        for _ in range(repeat):
+            hasher = get_hasher(name)
+            start_time = time.perf_counter()
+            for _ in range(chunks):
+                hasher.update(chunk)
+            hasher.digest()
+            elapsed = time.perf_counter() - start_time
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = chunks * chunk_size / (1024 ** 3) / best if best > 0 else float("inf")
+        logger.info(f"{name}: {results[name]:.2f} GB/s")
+
+    return results
+
+# Beispiel für die Verwendung
+if __name__ == "__main__":
+    print("Hash-Durchsatz auf diesem Rechner:")
+    for name, gb_per_second in sorted(benchmark_hash_algorithms().items(), key=lambda x: x[1], reverse=True):
+        kind = "kryptografisch" if is_cryptographic(name) else "Vorfilter"
+        print(f"  {name:10s} {gb_per_second:6.2f} GB/s ({kind})")
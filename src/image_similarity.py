@@ -0,0 +1,415 @@
+import os
+import sys
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from src.scanner import DirectoryScanner
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("image_similarity")
+
+# Optionale Abhängigkeiten für die Bildverarbeitung
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+# Verfügbare Wahrnehmungs-Hashes
+PERCEPTUAL_ALGORITHMS = ("ahash", "dhash", "phash")
+
+# Standardmäßige maximale Hamming-Distanz für ähnliche Bilder (bei 64 Bit)
+DEFAULT_MAX_DISTANCE = 8
+
+def image_similarity_available():
+    """
+    Prüft, ob Pillow und NumPy für Wahrnehmungs-Hashes verfügbar sind.
+
+    Returns:
+        bool: True, wenn beide Bibliotheken importiert werden konnten.
+    """
+    return np is not None and Image is not None
+
+def _dct_matrix(size):
+    """
+    Erstellt die Matrix der eindimensionalen DCT-II.
+
+    Args:
+        size (int): Kantenlänge.
+
+    Returns:
+        numpy.ndarray: DCT-Matrix der Form (size, size).
+    """
+    k = np.arange(size).reshape(-1, 1)
+    n = np.arange(size).reshape(1, -1)
+    return np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+
+def _bits_to_int(bits):
+    """
+    Packt ein boolesches Array in eine Ganzzahl.
+
+    Args:
+        bits (numpy.ndarray): Boolesche Werte.
+
+    Returns:
+        int: Ganzzahl mit einem Bit je Wert.
+    """
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+def compute_perceptual_hash(file_path, algorithm="phash", hash_size=8):
+    """
+    Berechnet einen Wahrnehmungs-Hash für ein Bild.
+
+    Das Bild wird in Graustufen stark verkleinert; bei JPEG-Dateien wird bereits
+    beim Dekodieren verkleinert (draft), was große Fotos erheblich beschleunigt.
+
+    - aHash: Pixel heller als der Mittelwert
+    - dHash: Helligkeitsverlauf zwischen benachbarten Pixeln
+    - pHash: niedrige DCT-Frequenzen über ihrem Median
+
+    Modulweite Funktion, damit sie auch in einem ProcessPoolExecutor ausgeführt werden kann.
+
+    Args:
+        file_path (str): Pfad zur Bilddatei.
+        algorithm (str): "ahash", "dhash" oder "phash".
+        hash_size (int): Kantenlänge des Hashes; der Hash hat hash_size² Bits.
+
+    Returns:
+        int: Wahrnehmungs-Hash.
+    """
+    if not image_similarity_available():
+        raise RuntimeError("Pillow und NumPy werden für Wahrnehmungs-Hashes benötigt")
+    if algorithm not in PERCEPTUAL_ALGORITHMS:
+        raise ValueError(f"Unbekannter Wahrnehmungs-Hash: {algorithm} (erlaubt: {', '.join(PERCEPTUAL_ALGORITHMS)})")
+
+    sample_size = hash_size * 4 if algorithm == "phash" else hash_size + 1
+    with Image.open(file_path) as image:
+        image.draft("L", (sample_size, sample_size))
+        image = image.convert("L")
+        if algorithm == "ahash":
+            pixels = np.asarray(image.resize((hash_size, hash_size), Image.LANCZOS), dtype=np.float64)
+            return _bits_to_int(pixels > pixels.mean())
+        if algorithm == "dhash":
+            pixels = np.asarray(image.resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.float64)
+            return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+        pixels = np.asarray(image.resize((sample_size, sample_size), Image.LANCZOS), dtype=np.float64)
+
+    dct = _dct_matrix(sample_size)
+    low_frequencies = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+    median = np.median(low_frequencies.flatten()[1:])
+    return _bits_to_int(low_frequencies > median)
+
+def hamming_distance(hash1, hash2):
+    """
+    Berechnet die Hamming-Distanz zweier Hashes.
+
+    Args:
+        hash1 (int): Erster Hash.
+        hash2 (int): Zweiter Hash.
+
+    Returns:
+        int: Anzahl unterschiedlicher Bits.
+    """
+    return bin(hash1 ^ hash2).count("1")
+
+class BKTree:
+    """
+    BK-Baum für Abstandsabfragen in einem metrischen Raum (hier: Hamming-Distanz).
+
+    Durch die Dreiecksungleichung müssen bei einer Abfrage mit Radius r nur
+    Teilbäume besucht werden, deren Kantenabstand im Bereich d ± r liegt.
+    """
+    def __init__(self, distance=hamming_distance):
+        """
+        Initialisiert einen leeren BK-Baum.
+
+        Args:
+            distance (callable): Metrik zwischen zwei Schlüsseln.
+        """
+        self.distance = distance
+        self.root = None
+        self.size = 0
+
+    def add(self, key, item):
+        """
+        Fügt einen Eintrag hinzu. Gleiche Schlüssel teilen sich einen Knoten.
+
+        Args:
+            key (int): Schlüssel (z. B. Wahrnehmungs-Hash).
+            item: Zugehöriges Element.
+        """
+        self.size += 1
+        if self.root is None:
+            self.root = [key, [item], {}]
+            return
+
+        node = self.root
+        while True:
+            node_key, items, children = node
+            dist = self.distance(key, node_key)
+            if dist == 0:
+                items.append(item)
+                return
+            if dist not in children:
+                children[dist] = [key, [item], {}]
+                return
+            node = children[dist]
+
+    def query(self, key, radius):
+        """
+        Sucht alle Einträge mit einem Abstand von höchstens radius.
+
+        Args:
+            key (int): Gesuchter Schlüssel.
+            radius (int): Maximaler Abstand.
+
+        Returns:
+            list: (Abstand, Element)-Tupel.
+        """
+        matches = []
+        if self.root is None:
+            return matches
+
+        stack = [self.root]
+        while stack:
+            node_key, items, children = stack.pop()
+            dist = self.distance(key, node_key)
+            if dist <= radius:
+                matches.extend((dist, item) for item in items)
+            for child_dist, child in children.items():
+                if dist - radius <= child_dist <= dist + radius:
+                    stack.append(child)
+        return matches
+
+    def __len__(self):
+        return self.size
+
+class ImageSimilarityFinder:
+    """
+    Findet ähnliche Bilder (verkleinert, neu kodiert) über Wahrnehmungs-Hashes.
+
+    Fingerabdrücke werden in einem Prozesspool berechnet und zwischengespeichert:
+    im Arbeitsspeicher und optional in einem persistenten HashCache.
+    """
+    def __init__(self, algorithm="phash", hash_size=8, max_distance=DEFAULT_MAX_DISTANCE,
+                 hash_cache=None, max_workers=None, chunk_size=64):
+        """
+        Initialisiert den ImageSimilarityFinder.
+
+        Args:
+            algorithm (str): "ahash", "dhash" oder "phash".
+            hash_size (int): Kantenlänge des Hashes.
+            max_distance (int): Maximale Hamming-Distanz für ähnliche Bilder.
+            hash_cache (HashCache, optional): Persistenter Cache für Fingerabdrücke.
+            max_workers (int, optional): Anzahl der Prozesse; 1 rechnet ohne Pool.
+            chunk_size (int): Anzahl der Bilder je Auftrag an einen Prozess.
+        """
+        if algorithm not in PERCEPTUAL_ALGORITHMS:
+            raise ValueError(f"Unbekannter Wahrnehmungs-Hash: {algorithm} (erlaubt: {', '.join(PERCEPTUAL_ALGORITHMS)})")
+
+        self.logger = logger
+        self.algorithm = algorithm
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.hash_cache = hash_cache
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.kind = f"{algorithm}-{hash_size}"
+        self._memory_cache = {}
+
+    def compute_fingerprints(self, files):
+        """
+        Berechnet die Fingerabdrücke mehrerer Bilder.
+
+        Unveränderte Dateien (Gerät, Inode, Größe, mtime_ns) werden aus dem Cache
+        übernommen, die übrigen im Prozesspool berechnet.
+
+        Args:
+            files (list): Pfade der Bilddateien.
+
+        Returns:
+            dict: Zuordnung Pfad (str) -> Fingerabdruck (int).
+        """
+        fingerprints = {}
+        pending = []
+
+        for file_path in files:
+            file_path = str(file_path)
+            try:
+                stat_result = os.stat(file_path)
+            except OSError as e:
+                self.logger.error(f"Fehler beim Lesen der Dateiinformationen von {file_path}: {e}")
+                continue
+
+            key = (file_path, stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+            fingerprint = self._memory_cache.get(key)
+            if fingerprint is None and self.hash_cache is not None:
+                cached = self.hash_cache.get(file_path, self.kind, stat_result)
+                fingerprint = int(cached, 16) if cached is not None else None
+            if fingerprint is None:
+                pending.append((file_path, key, stat_result))
+            else:
+                self._memory_cache[key] = fingerprint
+                fingerprints[file_path] = fingerprint
+
+        paths = [file_path for file_path, _, _ in pending]
+        for (file_path, key, stat_result), fingerprint in zip(pending, self._map_fingerprints(paths)):
+            if fingerprint is None:
+                continue
+            self._memory_cache[key] = fingerprint
+            fingerprints[file_path] = fingerprint
+            if self.hash_cache is not None:
+                self.hash_cache.put(file_path, self.kind, f"{fingerprint:x}", stat_result)
+
+        if self.hash_cache is not None:
+            self.hash_cache.flush()
+
+        self.logger.info(f"Fingerabdrücke: {len(fingerprints)} Bilder, davon {len(pending)} neu berechnet")
+        return fingerprints
+
+    def _map_fingerprints(self, paths):
+        """
+        Berechnet Fingerabdrücke seriell oder im Prozesspool.
+
+        Args:
+            paths (list): Pfade der Bilddateien.
+
+        Returns:
+            list: Fingerabdruck je Pfad, None bei Fehlern.
+        """
+        jobs = [(path, self.algorithm, self.hash_size) for path in paths]
+        if self.max_workers == 1 or len(jobs) < self.chunk_size:
+            return [_fingerprint_job(job) for job in jobs]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(_fingerprint_job, jobs, chunksize=self.chunk_size))
+
+    def find_similar_groups(self, files, max_distance=None):
+        """
+        Gruppiert ähnliche Bilder.
+
+        Args:
+            files (list): Pfade der Bilddateien.
+            max_distance (int, optional): Maximale Hamming-Distanz; Standard aus dem Konstruktor.
+
+        Returns:
+            list: Gruppen mit "fingerprint", "max_distance" und "files", größte zuerst.
+        """
+        return self.group_fingerprints(self.compute_fingerprints(files), max_distance)
+
+    def group_fingerprints(self, fingerprints, max_distance=None):
+        """
+        Gruppiert Bilder nach ihren Fingerabdrücken (vollständige Verknüpfung).
+
+        Alle Fingerabdrücke werden in einen BK-Baum eingefügt; für jeden eindeutigen
+        Fingerabdruck liefert eine Radiusabfrage die ähnlichen Bilder. Fingerabdrücke
+        mit den meisten ähnlichen Bildern werden zuerst zum Zentrum einer Gruppe. Ein
+        Nachbar des Zentrums wird nur aufgenommen, wenn er höchstens max_distance von
+        allen bisherigen Mitgliedern entfernt ist, sodass unähnliche Bilder nicht über
+        Zwischenglieder in eine gemeinsame Gruppe geraten.
+
+        Args:
+            fingerprints (dict): Zuordnung Pfad -> Fingerabdruck (int).
+            max_distance (int, optional): Maximale Hamming-Distanz; Standard aus dem Konstruktor.
+
+        Returns:
+            list: Gruppen mit "fingerprint" (Zentrum), "max_distance" (größte paarweise
+                Distanz) und "files", größte zuerst.
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+
+        # Identische Fingerabdrücke teilen sich einen Eintrag im Baum
+        by_fingerprint = {}
+        for file_path, fingerprint in fingerprints.items():
+            by_fingerprint.setdefault(fingerprint, []).append(file_path)
+
+        tree = BKTree()
+        for fingerprint in by_fingerprint:
+            tree.add(fingerprint, fingerprint)
+
+        neighbours = {}
+        for fingerprint in by_fingerprint:
+            neighbours[fingerprint] = sorted(tree.query(fingerprint, max_distance))
+
+        def density(fingerprint):
+            return sum(len(by_fingerprint[other]) for _, other in neighbours[fingerprint])
+
+        assigned = set()
+        groups = []
+        for center in sorted(by_fingerprint, key=lambda fingerprint: (-density(fingerprint), fingerprint)):
+            if center in assigned:
+                continue
+
+            # Nachbarn nach Abstand zum Zentrum; jedes Mitglied muss allen anderen ähnlich sein
+            members = []
+            diameter = 0
+            for _, candidate in neighbours[center]:
+                if candidate in assigned:
+                    continue
+                distances = [hamming_distance(candidate, member) for member in members]
+                if distances and max(distances) > max_distance:
+                    continue
+                diameter = max([diameter] + distances)
+                members.append(candidate)
+            assigned.update(members)
+
+            paths = [file_path for member in members for file_path in by_fingerprint[member]]
+            if len(paths) > 1:
+                groups.append({
+                    "fingerprint": f"{center:0{self.hash_size * self.hash_size // 4}x}",
+                    "max_distance": diameter,
+                    "files": sorted(paths)
+                })
+
+        groups.sort(key=lambda group: len(group["files"]), reverse=True)
+        return groups
+
+def _fingerprint_job(job):
+    """
+    Berechnet einen Fingerabdruck für den Prozesspool und fängt Fehler ab.
+
+    Args:
+        job (tuple): (Pfad, Algorithmus, Hash-Größe).
+
+    Returns:
+        int: Fingerabdruck oder None bei Fehlern.
+    """
+    file_path, algorithm, hash_size = job
+    try:
+        return compute_perceptual_hash(file_path, algorithm, hash_size)
+    except Exception as e:
+        logger.error(f"Fehler beim Berechnen des Wahrnehmungs-Hashes für {file_path}: {e}")
+        return None
+
+# Beispiel für die Verwendung
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        directory = sys.argv[1]
+        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp')
+        images = [
+            entry.path for entry in DirectoryScanner().iter_files(directory)
+            if entry.name.lower().endswith(image_extensions)
+        ]
+
+        finder = ImageSimilarityFinder()
+        groups = finder.find_similar_groups(images)
+
+        print(f"Ähnliche Bildgruppen: {len(groups)}")
+        for group in groups:
+            print(f"\nFingerabdruck {group['fingerprint']} (Distanz bis {group['max_distance']}):")
+            for file_path in group["files"]:
+                print(f"  {file_path}")
+    else:
+        print("Bitte geben Sie ein Verzeichnis als Argument an.")
@@ -0,0 +1,271 @@
+import os
+import sys
+import ctypes
+import logging
+import platform
+import threading
+import time
+
+from src.hashing import set_read_throttle
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("io_throttle")
+
+# Lese-Latenz in Sekunden, ab der der adaptive Modus die Bandbreite senkt
+DEFAULT_TARGET_LATENCY = 0.05
+
+# Untergrenze der Bandbreite im adaptiven Modus in Bytes pro Sekunde
+MIN_ADAPTIVE_RATE = 1024 * 1024
+
+# Gewicht neuer Messwerte im gleitenden Mittel der Latenz und des Durchsatzes
+LATENCY_SMOOTHING = 0.2
+
+# E/A-Prioritätsklassen von ioprio_set (Linux)
+IO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+# Systemaufrufnummern von ioprio_set je Architektur (Linux)
+IOPRIO_SET_SYSCALLS = {"x86_64": 251, "aarch64": 30, "i386": 289, "i686": 289}
+
+class TokenBucket:
+    """
+    Token-Bucket zur Begrenzung einer Rate (z. B. Bytes oder Lesevorgänge pro Sekunde).
+
+    Anfragen, die größer als der Vorrat sind, werden nicht abgelehnt, sondern
+    erzeugen eine Schuld, die durch entsprechend langes Warten abgetragen wird.
+    Der Bucket ist threadsicher.
+    """
+    def __init__(self, rate, capacity=None):
+        """
+        Initialisiert den Token-Bucket.
+
+        Args:
+            rate (float): Nachgefüllte Tokens pro Sekunde.
+            capacity (float, optional): Maximaler Vorrat (Burst); standardmäßig eine Sekunde.
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        """
+        Entnimmt Tokens und wartet, bis die Rate eingehalten ist.
+
+        Args:
+            amount (float): Anzahl der Tokens.
+
+        Returns:
+            float: Gewartete Zeit in Sekunden.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class IOThrottle:
+    """
+    Begrenzt Bandbreite und Lesevorgänge pro Sekunde beim Hashen.
+
+    Im adaptiven Modus wird die Bandbreite halbiert, sobald die gemittelte
+    Lese-Latenz target_latency überschreitet, und schrittweise wieder erhöht,
+    solange sie deutlich darunter liegt. Ohne festes Limit beginnt der
+    adaptive Modus unbegrenzt und setzt erst bei steigender Latenz ein Limit.
+    """
+    def __init__(self, max_mb_per_second=None, max_iops=None, adaptive=False,
+                 target_latency=DEFAULT_TARGET_LATENCY):
+        """
+        Initialisiert die Drosselung.
+
+        Args:
+            max_mb_per_second (float, optional): Maximale Lesebandbreite in MB/s.
+            max_iops (float, optional): Maximale Anzahl von Lesevorgängen pro Sekunde.
+            adaptive (bool): Ob die Bandbreite bei steigender Latenz gesenkt wird.
+            target_latency (float): Lese-Latenz in Sekunden, ab der gedrosselt wird.
+        """
+        self.logger = logger
+        self.max_mb_per_second = max_mb_per_second
+        self.max_iops = max_iops
+        self.adaptive = adaptive
+        self.target_latency = target_latency
+
+        self.max_rate = max_mb_per_second * 1024 * 1024 if max_mb_per_second else None
+        self.bandwidth = TokenBucket(self.max_rate) if self.max_rate else None
+        self.iops = TokenBucket(max_iops) if max_iops else None
+
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.bytes_read = 0
+        self.throttled_seconds = 0.0
+        self.backoffs = 0
+        self.latency = None
+        self.read_rate = None
+
+    def __reduce__(self):
+        # Für Prozesspools wird nur die Konfiguration übertragen, nicht der Zustand
+        return (IOThrottle, (self.max_mb_per_second, self.max_iops, self.adaptive, self.target_latency))
+
+    def scaled(self, factor):
+        """
+        Erstellt eine Drosselung mit anteiligen Limits, z. B. für einen von mehreren Prozessen.
+
+        Args:
+            factor (float): Anteil der Limits (z. B. 1 / Anzahl der Prozesse).
+
+        Returns:
+            IOThrottle: Neue Drosselung mit skalierten Limits.
+        """
+        return IOThrottle(
+            self.max_mb_per_second * factor if self.max_mb_per_second else None,
+            self.max_iops * factor if self.max_iops else None,
+            self.adaptive,
+            self.target_latency
+        )
+
+    def acquire(self, nbytes):
+        """
+        Verbucht einen Lesevorgang mit nbytes Bytes und wartet, bis die Limits eingehalten sind.
+
+        Aufgerufen wird nach dem Lesen mit der tatsächlich gelesenen Menge, damit
+        kurze Lesevorgänge am Dateiende nicht mit der vollen Puffergröße zählen.
+
+        Args:
+            nbytes (int): Anzahl der gelesenen Bytes.
+        """
+        waited = 0.0
+        if self.iops is not None:
+            waited += self.iops.consume(1)
+        bandwidth = self.bandwidth
+        if bandwidth is not None:
+            waited += bandwidth.consume(nbytes)
+        if waited:
+            with self.lock:
+                self.throttled_seconds += waited
+
+    def record(self, nbytes, latency):
+        """
+        Erfasst einen abgeschlossenen Lesevorgang und passt im adaptiven Modus die Bandbreite an.
+
+        Args:
+            nbytes (int): Gelesene Bytes.
+            latency (float): Dauer des Lesevorgangs in Sekunden.
+        """
+        with self.lock:
+            self.reads += 1
+            self.bytes_read += nbytes
+            if not self.adaptive:
+                return
+
+            self.latency = latency if self.latency is None else (
+                LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+            )
+            if latency > 0:
+                rate = nbytes / latency
+                self.read_rate = rate if self.read_rate is None else (
+                    LATENCY_SMOOTHING * rate + (1 - LATENCY_SMOOTHING) * self.read_rate
+                )
+
+            current = self.bandwidth.rate if self.bandwidth is not None else None
+            if self.latency > self.target_latency:
+                base = current if current is not None else (self.read_rate or self.max_rate or MIN_ADAPTIVE_RATE)
+                self._set_rate(max(MIN_ADAPTIVE_RATE, base / 2))
+                self.backoffs += 1
+                self.latency = None
+            elif current is not None and self.latency < self.target_latency / 2:
+                # Um 10 % erhöhen, bis zum festen Limit oder bis die Drosselung entfällt
+                rate = current * 1.1
+                if self.max_rate is not None:
+                    self._set_rate(min(rate, self.max_rate))
+                elif self.read_rate is not None and rate > 2 * self.read_rate:
+                    self.bandwidth = None
+                else:
+                    self._set_rate(rate)
+
+    def _set_rate(self, rate):
+        """
+        Setzt die aktuelle Bandbreite in Bytes pro Sekunde.
+
+        Args:
+            rate (float): Neue Rate.
+        """
+        if self.bandwidth is None:
+            self.bandwidth = TokenBucket(rate)
+        else:
+            self.bandwidth.rate = rate
+
+    def snapshot(self):
+        """
+        Liefert Limits und Zähler der Drosselung.
+
+        Returns:
+            dict: Konfigurierte und aktuelle Limits, Lesevorgänge und gewartete Zeit.
+        """
+        with self.lock:
+            bandwidth = self.bandwidth
+            return {
+                "limit_mb_per_second": self.max_mb_per_second,
+                "limit_iops": self.max_iops,
+                "current_mb_per_second": bandwidth.rate / (1024 * 1024) if bandwidth is not None else None,
+                "reads": self.reads,
+                "throttled_seconds": self.throttled_seconds,
+                "backoffs": self.backoffs
+            }
+
+def lower_priority(nice_increment=None, io_class=None, io_level=7):
+    """
+    Senkt CPU- und E/A-Priorität des aufrufenden Threads.
+
+    Unter Linux gelten nice (setpriority) und ioprio_set für den einzelnen Thread;
+    auf anderen Systemen wird die E/A-Priorität nicht verändert.
+
+    Args:
+        nice_increment (int, optional): Erhöhung des nice-Werts (1-19).
+        io_class (str, optional): "idle", "best-effort" oder "realtime".
+        io_level (int): Priorität innerhalb der Klasse (0 = höchste, 7 = niedrigste).
+    """
+    if nice_increment:
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, 0)
+            os.setpriority(os.PRIO_PROCESS, 0, current + nice_increment)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"nice-Wert konnte nicht gesetzt werden: {e}")
+
+    if io_class:
+        if io_class not in IO_CLASSES:
+            raise ValueError(f"Unbekannte E/A-Klasse: {io_class} (erlaubt: {', '.join(IO_CLASSES)})")
+        syscall_number = IOPRIO_SET_SYSCALLS.get(platform.machine())
+        if not sys.platform.startswith("linux") or syscall_number is None:
+            logger.warning("E/A-Priorität wird nur unter Linux unterstützt")
+            return
+        # IOPRIO_WHO_PROCESS mit who=0 betrifft den aufrufenden Thread
+        libc = ctypes.CDLL(None, use_errno=True)
+        value = (IO_CLASSES[io_class] << 13) | io_level
+        if libc.syscall(syscall_number, 1, 0, value) != 0:
+            logger.warning(f"E/A-Priorität konnte nicht gesetzt werden: {os.strerror(ctypes.get_errno())}")
+
+def configure_worker(throttle=None, nice_increment=None, io_class=None):
+    """
+    Initialisiert einen Worker-Thread oder -Prozess eines Pools für das Hashen im Hintergrund.
+
+    Args:
+        throttle (IOThrottle, optional): Drosselung für Lesevorgänge dieses Worker-Threads.
+        nice_increment (int, optional): Erhöhung des nice-Werts.
+        io_class (str, optional): E/A-Prioritätsklasse.
+    """
+    if throttle is not None:
+        set_read_throttle(throttle)
+    lower_priority(nice_increment, io_class)
@@ -0,0 +1,540 @@
+import os
+import sys
+import copy
+import stat
+import time
+import queue
+import logging
+import threading
+from pathlib import Path
+
+from src.directory_snapshot import DirectorySnapshot
+from src.scanner import DirectoryScanner, ScanEntry
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("live_index")
+
+# Optionale Abhängigkeit für Dateisystem-Ereignisse (inotify, FSEvents, ReadDirectoryChangesW)
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# Standardpfad des Katalogs im Benutzerverzeichnis
+DEFAULT_CATALOG_PATH = Path.home() / ".file_organizer" / "live_index.sqlite3"
+
+# Ruhezeit in Sekunden, nach der ein Schub von Ereignissen verarbeitet wird
+DEFAULT_DEBOUNCE = 0.5
+
+# Maximale Verzögerung eines Schubs als Vielfaches der Ruhezeit bei ununterbrochenen Ereignissen
+MAX_DELAY_FACTOR = 10
+
+# Maximale Anzahl wartender Ereignisse; bei Überlauf werden die betroffenen Verzeichnisse neu gelesen
+DEFAULT_MAX_QUEUE = 100000
+
+# Maximale Anzahl bei Überlauf vorgemerkter Verzeichnisse; darüber hinaus werden die Wurzeln neu geladen
+DEFAULT_MAX_OVERFLOW_DIRECTORIES = 10000
+
+def live_index_available():
+    """
+    Prüft, ob watchdog für Dateisystem-Ereignisse installiert ist.
+
+    Returns:
+        bool: True, wenn der Live-Index Ereignisse abonnieren kann.
+    """
+    return Observer is not None
+
+class _EventHandler(FileSystemEventHandler):
+    """
+    Leitet watchdog-Ereignisse an den Live-Index weiter.
+    """
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    def on_any_event(self, event):
+        if event.event_type in ("created", "deleted", "modified", "moved", "closed"):
+            self.index.notify(event.event_type, event.src_path, getattr(event, "dest_path", None),
+                              event.is_directory)
+
+class LiveFileIndex:
+    """
+    Dateikatalog, der über Dateisystem-Ereignisse aktuell gehalten wird.
+
+    Alle Verzeichnisse liegen mit ihren Dateien im Arbeitsspeicher. Der Katalog ist
+    ein DirectorySnapshot: Beim Laden werden Verzeichnisse mit unveränderter mtime
+    aus dem Katalog übernommen statt neu gelesen (die Dateien werden dabei wie beim
+    Scanner nur mit verify_files per stat() geprüft). Ereignisse werden gesammelt,
+    bis für debounce Sekunden keine neuen eintreffen, und pro Pfad zusammengefasst;
+    danach wird nur der betroffene Pfad erneut abgefragt (eine Datei per stat(), ein
+    Verzeichnis per Scan seines Teilbaums). Geänderte Dateien machen den Eintrag
+    ihres Verzeichnisses im Katalog ungültig, da sich dessen mtime dabei nicht ändert.
+
+    Läuft die Warteschlange über, werden die Verzeichnisse der verlorenen Ereignisse
+    vorgemerkt und anschließend neu gelesen, Dateiereignisse ohne Unterverzeichnisse.
+    Erst wenn auch diese Liste max_overflow_directories übersteigt, werden die
+    Wurzeln neu geladen, wobei wiederum nur geänderte Verzeichnisse gelesen werden.
+
+    Der Index bietet dieselbe Schnittstelle wie DirectoryScanner (walk, iter_files) und
+    kann daher den Engines als scanner übergeben werden, z. B.
+    FileOrganizer(scanner=index); Abfragen innerhalb der Wurzeln werden dann ohne
+    Zugriff auf die Festplatte beantwortet.
+    """
+    def __init__(self, roots, catalog_path=None, scanner=None, debounce=DEFAULT_DEBOUNCE,
+                 max_queue=DEFAULT_MAX_QUEUE, max_overflow_directories=DEFAULT_MAX_OVERFLOW_DIRECTORIES):
+        """
+        Initialisiert den Live-Index.
+
+        Args:
+            roots (str | list): Zu überwachende Verzeichnisse.
+            catalog_path (str, optional): Pfad zum Katalog (SQLite). Standardmäßig
+                ~/.file_organizer/live_index.sqlite3.
+            scanner (DirectoryScanner, optional): Vorlage des Scanners für den ersten und für
+                erneute Scans; der Index verwendet eine Kopie mit dem Katalog als Snapshot.
+                Mit verify_files=False werden unveränderte Verzeichnisse beim Laden ganz
+                ohne Festplattenzugriff übernommen.
+            debounce (float): Ruhezeit in Sekunden, nach der gesammelte Ereignisse verarbeitet werden.
+            max_queue (int): Maximale Anzahl wartender Ereignisse.
+            max_overflow_directories (int): Maximale Anzahl bei Überlauf vorgemerkter Verzeichnisse.
+        """
+        if isinstance(roots, (str, os.PathLike)):
+            roots = [roots]
+
+        self.logger = logger
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.catalog_path = Path(catalog_path) if catalog_path else DEFAULT_CATALOG_PATH
+        self.catalog = DirectorySnapshot(self.catalog_path)
+        # Tabelle früherer Versionen, die jede Datei einzeln speicherte
+        self.catalog.connection.execute("DROP TABLE IF EXISTS files")
+        self.scanner = copy.copy(scanner or DirectoryScanner())
+        self.scanner.snapshot = self.catalog
+        self.catalog.prepare(self.scanner.symlinks)
+        self.debounce = debounce
+        self.max_overflow_directories = max_overflow_directories
+
+        self.tree = {}
+        self.lock = threading.RLock()
+        self.events = queue.Queue(maxsize=max_queue)
+        self.overflow = threading.Event()
+        self.overflow_lock = threading.Lock()
+        self.overflow_directories = {}
+        self.stopped = threading.Event()
+        self.observer = None
+        self.worker = None
+        self.stats = {"events": 0, "batches": 0, "rescans": 0, "reloads": 0}
+
+    def load(self):
+        """
+        Lädt alle Wurzeln in den Arbeitsspeicher; unveränderte Verzeichnisse stammen aus dem Katalog.
+        """
+        with self.lock:
+            for root in self.roots:
+                self._rescan_directory(root)
+            self.catalog.flush()
+        self.logger.info(
+            f"Live-Index geladen: {len(self.tree)} Verzeichnisse "
+            f"({self.catalog.reused_directories} aus dem Katalog übernommen)"
+        )
+
+    def start(self):
+        """
+        Lädt den Index, abonniert Dateisystem-Ereignisse und startet die Verarbeitung.
+
+        Raises:
+            RuntimeError: Wenn watchdog nicht installiert ist.
+        """
+        if not live_index_available():
+            raise RuntimeError("watchdog wird für den Live-Index benötigt")
+
+        self.stopped.clear()
+        self.observer = Observer()
+        handler = _EventHandler(self)
+        for root in self.roots:
+            self.observer.schedule(handler, root, recursive=True)
+        # Erst abonnieren, dann scannen, damit keine Änderung dazwischen verloren geht
+        self.observer.start()
+        self.load()
+
+        self.worker = threading.Thread(target=self._run, name="live-index", daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        """
+        Beendet Abonnement und Verarbeitung und schreibt den Katalog.
+        """
+        self.stopped.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+        self.flush_events()
+
+    def close(self):
+        """
+        Beendet den Index und schließt den Katalog.
+        """
+        self.stop()
+        with self.lock:
+            self.catalog.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def notify(self, event_type, src_path, dest_path=None, is_directory=False):
+        """
+        Nimmt ein Dateisystem-Ereignis entgegen.
+
+        Args:
+            event_type (str): "created", "deleted", "modified", "moved" oder "closed".
+            src_path (str): Betroffener Pfad.
+            dest_path (str, optional): Ziel einer Verschiebung.
+            is_directory (bool): Ob der Pfad ein Verzeichnis ist.
+        """
+        src_path = os.fsdecode(src_path)
+        dest_path = os.fsdecode(dest_path) if dest_path else None
+        try:
+            self.events.put_nowait((event_type, src_path, dest_path, is_directory))
+        except queue.Full:
+            self._remember_overflow(event_type, src_path, dest_path, is_directory)
+            self.overflow.set()
+
+    def _remember_overflow(self, event_type, src_path, dest_path, is_directory):
+        """
+        Merkt die Verzeichnisse eines verlorenen Ereignisses zum erneuten Lesen vor.
+
+        Verzeichnisereignisse betreffen den ganzen Teilbaum, Dateiereignisse nur das
+        Verzeichnis der Datei. Übersteigt die Liste max_overflow_directories, wird sie
+        verworfen (None) und die Wurzeln werden neu geladen.
+
+        Args:
+            event_type (str): Art des Ereignisses.
+            src_path (str): Betroffener Pfad.
+            dest_path (str): Ziel einer Verschiebung oder None.
+            is_directory (bool): Ob der Pfad ein Verzeichnis ist.
+        """
+        if is_directory and event_type == "modified":
+            return
+        with self.overflow_lock:
+            if self.overflow_directories is None:
+                return
+            for path in (src_path, dest_path):
+                if not path:
+                    continue
+                directory = path if is_directory else os.path.dirname(path)
+                self.overflow_directories[directory] = self.overflow_directories.get(directory, False) or is_directory
+            if len(self.overflow_directories) > self.max_overflow_directories:
+                self.overflow_directories = None
+
+    def flush_events(self):
+        """
+        Verarbeitet alle wartenden Ereignisse sofort.
+        """
+        batch = []
+        while True:
+            try:
+                batch.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        if batch or self.overflow.is_set():
+            self._process(batch)
+
+    def walk(self, root, recursive=True, with_skipped=False):
+        """
+        Durchläuft einen Verzeichnisbaum aus dem Index wie DirectoryScanner.walk.
+
+        Liegt root außerhalb der überwachten Wurzeln, wird der Baum mit dem Scanner gelesen.
+
+        Args:
+            root (str | Path): Wurzelverzeichnis.
+            recursive (bool): Ob Unterverzeichnisse durchsucht werden sollen.
+            with_skipped (bool): Ob zusätzlich die Namen der übersprungenen Einträge
+                geliefert werden (siehe DirectoryScanner.walk).
+
+        Yields:
+            tuple: (Verzeichnispfad, Namen der Unterverzeichnisse, Liste von ScanEntry),
+                mit with_skipped ergänzt um die Liste der übersprungenen Namen.
+        """
+        directory = os.path.abspath(root)
+        with self.lock:
+            if directory not in self.tree:
+                listing = None
+            else:
+                listing = []
+                stack = [directory]
+                while stack:
+                    directory = stack.pop()
+                    subdirectories, files, skipped = self.tree[directory]
+                    item = (directory, sorted(subdirectories), list(files.values()))
+                    listing.append(item + (sorted(skipped),) if with_skipped else item)
+                    if recursive:
+                        stack.extend(
+                            path for path in (os.path.join(directory, name) for name in sorted(subdirectories, reverse=True))
+                            if path in self.tree
+                        )
+
+        if listing is None:
+            yield from self.scanner.walk(root, recursive, with_skipped)
+        else:
+            yield from listing
+
+    def iter_files(self, roots, recursive=True):
+        """
+        Liefert alle Dateien eines oder mehrerer Verzeichnisbäume aus dem Index.
+
+        Args:
+            roots (str | Path | list): Wurzelverzeichnis oder Liste von Wurzelverzeichnissen.
+            recursive (bool): Ob Unterverzeichnisse durchsucht werden sollen.
+
+        Yields:
+            ScanEntry: Datei.
+        """
+        if isinstance(roots, (str, os.PathLike)):
+            roots = [roots]
+        for root in roots:
+            for _, _, files in self.walk(root, recursive):
+                yield from files
+
+    def _run(self):
+        """
+        Verarbeitet Ereignisse in Schüben, bis der Index beendet wird.
+        """
+        while not self.stopped.is_set():
+            try:
+                batch = [self.events.get(timeout=self.debounce)]
+            except queue.Empty:
+                if self.overflow.is_set():
+                    self._process([])
+                continue
+
+            # Sammeln, bis debounce Sekunden Ruhe herrscht, höchstens MAX_DELAY_FACTOR-mal so lange
+            deadline = time.monotonic() + self.debounce * MAX_DELAY_FACTOR
+            while time.monotonic() < deadline:
+                try:
+                    batch.append(self.events.get(timeout=self.debounce))
+                except queue.Empty:
+                    break
+            try:
+                self._process(batch)
+            except Exception as e:
+                self.logger.error(f"Fehler beim Aktualisieren des Live-Index: {e}")
+
+    def _process(self, batch):
+        """
+        Fasst einen Schub von Ereignissen zusammen und aktualisiert Index und Katalog.
+
+        Args:
+            batch (list): (Art, Pfad, Zielpfad, Verzeichnis)-Tupel.
+        """
+        with self.lock:
+            dirty_directories = set()
+            listed_directories = set()
+            if self.overflow.is_set():
+                # Verlorene Ereignisse werden durch ihre vorgemerkten Verzeichnisse ersetzt
+                self.overflow.clear()
+                with self.overflow_lock:
+                    overflow_directories, self.overflow_directories = self.overflow_directories, {}
+                while True:
+                    try:
+                        batch.append(self.events.get_nowait())
+                    except queue.Empty:
+                        break
+                self.stats["rescans"] += 1
+                if overflow_directories is None:
+                    self.logger.warning("Ereigniswarteschlange übergelaufen, lade Wurzeln neu")
+                    self.stats["reloads"] += 1
+                    self.load()
+                    return
+                self.logger.warning(
+                    f"Ereigniswarteschlange übergelaufen, lese {len(overflow_directories)} Verzeichnisse neu"
+                )
+                for directory, recursive in overflow_directories.items():
+                    (dirty_directories if recursive else listed_directories).add(directory)
+
+            # Je Pfad zählt nur der aktuelle Zustand auf der Festplatte
+            dirty_files = set()
+            for event_type, src_path, dest_path, is_directory in batch:
+                paths = [path for path in (src_path, dest_path) if path]
+                if is_directory:
+                    if event_type != "modified":
+                        dirty_directories.update(paths)
+                else:
+                    dirty_files.update(paths)
+
+            # Verschachtelte Verzeichnisse werden mit ihrem obersten betroffenen Verzeichnis gescannt
+            rescanned = []
+            for directory in sorted(dirty_directories, key=len):
+                if not any(self._is_within(directory, parent) for parent in rescanned):
+                    rescanned.append(directory)
+                    self._rescan_directory(directory)
+            for directory in listed_directories:
+                if not any(self._is_within(directory, parent) for parent in rescanned):
+                    self._relist_directory(directory)
+            for file_path in dirty_files:
+                if not any(self._is_within(file_path, parent) for parent in rescanned):
+                    self._refresh_file(file_path)
+
+            self.catalog.flush()
+            self.stats["events"] += len(batch)
+            self.stats["batches"] += 1
+
+    def _rescan_directory(self, directory):
+        """
+        Entfernt einen Teilbaum aus dem Index und scannt ihn erneut, sofern er noch existiert.
+
+        Args:
+            directory (str): Verzeichnis.
+        """
+        with self.lock:
+            self._remove_subtree(directory)
+
+            parent, name = os.path.split(directory)
+            is_root = directory in self.roots
+            if not is_root and parent not in self.tree:
+                return
+            excluded = (not is_root and self.scanner.directory_filter is not None
+                        and not self.scanner.directory_filter(directory))
+            if excluded or not os.path.isdir(directory) or (
+                    os.path.islink(directory) and self.scanner.symlinks != "follow"):
+                self.catalog.prune(directory, set())
+                if not is_root:
+                    self.tree[parent][0].discard(name)
+                    if not excluded:
+                        # An die Stelle des Verzeichnisses kann eine Datei oder ein Link getreten sein
+                        self._refresh_file(directory)
+                return
+
+            # Unveränderte Verzeichnisse des Teilbaums werden aus dem Katalog übernommen
+            for path, subdirectories, files, skipped in self.scanner.walk(directory, with_skipped=True):
+                self.tree[path] = (set(subdirectories), {entry.name: entry for entry in files}, set(skipped))
+            if not is_root:
+                self.tree[parent][0].add(name)
+                self.tree[parent][1].pop(name, None)
+                self.tree[parent][2].discard(name)
+
+    def _relist_directory(self, directory):
+        """
+        Liest ein einzelnes Verzeichnis ohne seine Unterverzeichnisse neu.
+
+        Neue Unterverzeichnisse werden vollständig gescannt, verschwundene entfernt.
+
+        Args:
+            directory (str): Verzeichnis.
+        """
+        with self.lock:
+            node = self.tree.get(directory)
+            if node is None or not os.path.isdir(directory):
+                self._rescan_directory(directory)
+                return
+
+            self.catalog.invalidate(directory)
+            listing = next(iter(self.scanner.walk(directory, recursive=False, with_skipped=True)), None)
+            if listing is None:
+                self._rescan_directory(directory)
+                return
+            _, subdirectories, files, skipped = listing
+            self.tree[directory] = (set(subdirectories), {entry.name: entry for entry in files}, set(skipped))
+            for name in node[0] - set(subdirectories):
+                self._remove_subtree(os.path.join(directory, name))
+                self.catalog.prune(os.path.join(directory, name), set())
+            for name in set(subdirectories) - node[0]:
+                self._rescan_directory(os.path.join(directory, name))
+
+    def _remove_subtree(self, directory):
+        """
+        Entfernt ein Verzeichnis und alle darunter liegenden aus dem Arbeitsspeicher.
+
+        Der Teilbaum wird über die gespeicherten Unterverzeichnisse durchlaufen, sodass
+        der Aufwand nur von seiner Größe abhängt und nicht von der des ganzen Index.
+
+        Args:
+            directory (str): Verzeichnis.
+        """
+        stack = [directory]
+        while stack:
+            path = stack.pop()
+            node = self.tree.pop(path, None)
+            if node is not None:
+                stack.extend(os.path.join(path, name) for name in node[0])
+
+    def _refresh_file(self, file_path):
+        """
+        Fragt eine einzelne Datei erneut ab und aktualisiert Index und Katalog.
+
+        Args:
+            file_path (str): Pfad zur Datei.
+        """
+        directory, name = os.path.split(file_path)
+        node = self.tree.get(directory)
+        if node is None:
+            return
+
+        entry = None
+        exists = os.path.lexists(file_path)
+        try:
+            if exists and not (os.path.islink(file_path) and self.scanner.symlinks == "skip"):
+                stat_result = os.stat(file_path)
+                if stat.S_ISREG(stat_result.st_mode):
+                    entry = ScanEntry(file_path, name, stat_result.st_size, stat_result.st_mtime,
+                                      stat_result.st_dev, stat_result.st_ino)
+        except OSError:
+            pass
+        if entry is not None and self.scanner.file_filter is not None and not self.scanner.file_filter(entry):
+            entry = None
+
+        if entry is None:
+            node[1].pop(name, None)
+            # Vorhandene Einträge, die keine Dateien des Index sind, zählen als übersprungen
+            if exists and name not in node[0]:
+                node[2].add(name)
+            else:
+                node[2].discard(name)
+        else:
+            node[1][name] = entry
+            node[2].discard(name)
+        # Der Katalog beschreibt das Verzeichnis nicht mehr; es wird beim nächsten Laden neu gelesen
+        self.catalog.invalidate(directory)
+
+    def _is_within(self, path, directory):
+        """
+        Prüft, ob ein Pfad gleich einem Verzeichnis ist oder darin liegt.
+
+        Args:
+            path (str): Zu prüfender Pfad.
+            directory (str): Verzeichnis.
+
+        Returns:
+            bool: True, wenn path in directory liegt.
+        """
+        return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+# Beispiel für die Verwendung
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with LiveFileIndex(sys.argv[1]) as index:
+            index.start()
+            print("Live-Index aktiv, Abbruch mit Strg+C")
+            try:
+                while True:
+                    time.sleep(5)
+                    file_count = sum(1 for _ in index.iter_files(index.roots))
+                    print(f"{file_count} Dateien, {index.stats['batches']} Aktualisierungen")
+            except KeyboardInterrupt:
+                pass
+    else:
+        print("Bitte geben Sie ein Verzeichnis als Argument an.")
@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import logging
+from pathlib import Path
+
+from src.hash_cache import HashCache
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("scan_checkpoint")
+
+# Standardpfad des Checkpoints im Benutzerverzeichnis
+DEFAULT_CHECKPOINT_PATH = Path.home() / ".file_organizer" / "scan_checkpoint.sqlite3"
+
+# Anzahl der Kandidatengruppen, die gemeinsam aus dem Checkpoint gelesen werden
+PAGE_SIZE = 1000
+
+# Version des gespeicherten Formats; ältere Checkpoints werden nicht fortgesetzt
+CHECKPOINT_FORMAT = 2
+
+class ScanCheckpoint:
+    """
+    Zustand einer laufenden Duplikatsuche, der nach einem Abbruch fortgesetzt werden kann.
+
+    Gespeichert werden die Parameter der Suche, die Kandidatengruppen gleicher
+    Größe, ein Cursor auf die nächste unbearbeitete Gruppe, die bereits ausgegebenen
+    Duplikatgruppen und die Statistik. Bereits berechnete Hashes liegen in einem
+    HashCache in derselben Datenbank, sodass auch ein halb fertiger Stapel nicht
+    erneut gelesen werden muss. Die Pfade der Kandidatengruppen werden als Bytes
+    (os.fsencode, durch Nullbytes getrennt) gespeichert, damit auch Dateinamen ohne
+    gültiges UTF-8 erhalten bleiben.
+    """
+    def __init__(self, checkpoint_path=None):
+        """
+        Öffnet oder erstellt einen Checkpoint.
+
+        Args:
+            checkpoint_path (str, optional): Pfad zur Checkpoint-Datei (SQLite).
+                Standardmäßig ~/.file_organizer/scan_checkpoint.sqlite3.
+        """
+        self.logger = logger
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else DEFAULT_CHECKPOINT_PATH
+
+        # Hash-Cache und Checkpoint teilen sich eine Verbindung und damit eine Transaktion
+        self.hash_cache = HashCache(self.checkpoint_path)
+        self.connection = self.hash_cache.connection
+        self.connection.execute("CREATE TABLE IF NOT EXISTS scan_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS size_groups (seq INTEGER PRIMARY KEY, size INTEGER NOT NULL, files BLOB NOT NULL)"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS completed_groups (seq INTEGER PRIMARY KEY, grp TEXT NOT NULL)")
+        self.connection.commit()
+
+    def _get_state(self, key, default=None):
+        row = self.connection.execute("SELECT value FROM scan_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def _set_state(self, key, value):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO scan_state (key, value) VALUES (?, ?)", (key, json.dumps(value))
+        )
+
+    def matches(self, parameters):
+        """
+        Prüft, ob der Checkpoint zu einer Suche mit diesen Parametern gehört.
+
+        Args:
+            parameters (dict): JSON-serialisierbare Parameter der Suche.
+
+        Returns:
+            bool: True, wenn die Kandidatengruppen gespeichert sind und die Parameter übereinstimmen.
+        """
+        return (
+            self._get_state("format") == CHECKPOINT_FORMAT
+            and self._get_state("parameters") == parameters
+            and self._get_state("cursor") is not None
+        )
+
+    def start(self, parameters, size_groups, stats=None):
+        """
+        Beginnt eine neue Suche und speichert ihre Kandidatengruppen.
+
+        Ein vorhandener Suchzustand wird verworfen; bereits berechnete Hashes bleiben erhalten.
+
+        Args:
+            parameters (dict): JSON-serialisierbare Parameter der Suche.
+            size_groups (iterable): (Größe, Dateiliste)-Tupel der Kandidatengruppen.
+            stats (dict, optional): Statistik der Suche. Sie wird erst nach dem Speichern
+                der Gruppen geschrieben, sodass beim Gruppieren ergänzte Werte
+                (Hardlink-Gruppen, Sortierläufe) auch ohne erledigten Stapel erhalten bleiben.
+        """
+        self.connection.execute("DELETE FROM scan_state")
+        self.connection.execute("DELETE FROM size_groups")
+        self.connection.execute("DELETE FROM completed_groups")
+        self.connection.executemany(
+            "INSERT INTO size_groups (seq, size, files) VALUES (?, ?, ?)",
+            (
+                (seq, size, b"\0".join(os.fsencode(file_path) for file_path in files))
+                for seq, (size, files) in enumerate(size_groups)
+            )
+        )
+        self._set_state("format", CHECKPOINT_FORMAT)
+        self._set_state("parameters", parameters)
+        self._set_state("cursor", 0)
+        if stats is not None:
+            self._set_state("stats", stats)
+        self.connection.commit()
+
+    def iter_pending_groups(self):
+        """
+        Liefert die noch nicht bearbeiteten Kandidatengruppen.
+
+        Yields:
+            tuple: (Größe, Liste der Dateipfade als Path).
+        """
+        # Seitenweise lesen, damit auch sehr viele Gruppen nicht gleichzeitig im Speicher liegen
+        seq = self._get_state("cursor", 0)
+        while True:
+            rows = self.connection.execute(
+                "SELECT seq, size, files FROM size_groups WHERE seq >= ? ORDER BY seq LIMIT ?",
+                (seq, PAGE_SIZE)
+            ).fetchall()
+            if not rows:
+                return
+            for seq, size, files in rows:
+                yield size, [Path(os.fsdecode(file_path)) for file_path in files.split(b"\0")]
+            seq += 1
+
+    def iter_completed_groups(self):
+        """
+        Liefert die vor dem Abbruch bereits ausgegebenen Duplikatgruppen.
+
+        Yields:
+            dict: Duplikatgruppe.
+        """
+        for (group,) in self.connection.execute("SELECT grp FROM completed_groups ORDER BY seq"):
+            yield json.loads(group)
+
+    def load_stats(self):
+        """
+        Liefert die Statistik zum Zeitpunkt des letzten Checkpoints.
+
+        Returns:
+            dict: Statistik oder None, wenn keine gespeichert ist.
+        """
+        return self._get_state("stats")
+
+    def complete_batch(self, group_count, duplicate_groups, stats):
+        """
+        Markiert einen Stapel als erledigt und schreibt den Checkpoint.
+
+        Args:
+            group_count (int): Anzahl der Kandidatengruppen im Stapel.
+            duplicate_groups (list): Im Stapel ausgegebene Duplikatgruppen.
+            stats (dict): Aktuelle Statistik der Suche.
+        """
+        next_seq = self.connection.execute("SELECT COUNT(*) FROM completed_groups").fetchone()[0]
+        self.connection.executemany(
+            "INSERT INTO completed_groups (seq, grp) VALUES (?, ?)",
+            ((next_seq + index, json.dumps(group)) for index, group in enumerate(duplicate_groups))
+        )
+        self._set_state("cursor", self._get_state("cursor", 0) + group_count)
+        self._set_state("stats", stats)
+        self.connection.commit()
+        self.hash_cache.flush()
+
+    def discard(self):
+        """
+        Verwirft den Suchzustand, z. B. nach unvollständig gespeicherten Kandidatengruppen.
+
+        Bereits berechnete Hashes bleiben erhalten.
+        """
+        self.connection.execute("DELETE FROM scan_state")
+        self.connection.execute("DELETE FROM size_groups")
+        self.connection.execute("DELETE FROM completed_groups")
+        self.connection.commit()
+
+    def close(self):
+        """
+        Schreibt ausstehende Einträge und schließt den Checkpoint.
+        """
+        self.hash_cache.close()
+
+    def remove(self):
+        """
+        Schließt den Checkpoint und löscht die Checkpoint-Datei nach einer abgeschlossenen Suche.
+        """
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            path = str(self.checkpoint_path) + suffix
+            if os.path.exists(path):
+                os.unlink(path)
+        self.logger.info(f"Checkpoint entfernt: {self.checkpoint_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
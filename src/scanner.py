@@ -0,0 +1,584 @@
+import os
+import sys
+import time
+import queue
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Konfiguration des Logging-Systems
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger("scanner")
+
+# Umgang mit symbolischen Links: überspringen, nur Links auf Dateien aufnehmen
+# (wie Path.glob) oder auch Links auf Verzeichnisse folgen
+SYMLINK_POLICIES = ("skip", "files", "follow")
+
+# Standardanzahl paralleler Threads für das Auflisten von Verzeichnissen
+DEFAULT_WALK_WORKERS = 16
+
+# Standardanzahl vorab gelesener, noch nicht ausgegebener Verzeichnisse je Thread
+DEFAULT_PREFETCH_PER_WORKER = 4
+
+class ScanEntry:
+    """
+    Eine beim Durchsuchen gefundene Datei mit den Daten eines einzigen stat()-Aufrufs.
+    """
+    __slots__ = ("path", "name", "size", "mtime", "device", "inode")
+
+    def __init__(self, path, name, size, mtime, device, inode):
+        """
+        Initialisiert den Eintrag.
+
+        Args:
+            path (str): Pfad zur Datei.
+            name (str): Dateiname.
+            size (int): Dateigröße in Bytes.
+            mtime (float): Zeitpunkt der letzten Änderung.
+            device (int): Gerätenummer (st_dev).
+            inode (int): Inode-Nummer (st_ino); 0, wenn das Dateisystem keine liefert.
+        """
+        self.path = path
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        self.device = device
+        self.inode = inode
+
+    @property
+    def file_path(self):
+        """Pfad zur Datei als Path."""
+        return Path(self.path)
+
+    def __repr__(self):
+        return f"ScanEntry({self.path!r}, size={self.size})"
+
+class _SnapshotDirectory:
+    """
+    Unterverzeichnis aus einem Snapshot mit der von os.DirEntry genutzten Schnittstelle.
+    """
+    __slots__ = ("path", "name")
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+
+    def stat(self):
+        return os.stat(self.path)
+
+class DirectoryScanner:
+    """
+    Durchsucht Verzeichnisbäume mit os.scandir.
+
+    Der Dateityp stammt aus dem Verzeichniseintrag selbst, sodass je Datei nur ein
+    stat()-Aufruf für Größe, Änderungszeit und Inode nötig ist und Verzeichnisse
+    gar nicht zusätzlich abgefragt werden (außer beim Folgen symbolischer Links
+    zur Erkennung von Schleifen). Verzeichnisse werden in Vorordnung durchlaufen,
+    die Einträge eines Verzeichnisses in der Reihenfolge von os.scandir.
+    """
+    def __init__(self, max_depth=None, symlinks="files", file_filter=None, directory_filter=None,
+                 snapshot=None, verify_files=True):
+        """
+        Initialisiert den Scanner.
+
+        Args:
+            max_depth (int, optional): Maximale Tiefe unterhalb der Wurzel (0 = nur die
+                Wurzel selbst); standardmäßig unbegrenzt.
+            symlinks (str): "skip", "files" (Links auf Dateien aufnehmen, Links auf
+                Verzeichnissen nicht folgen) oder "follow".
+            file_filter (callable, optional): Erhält einen ScanEntry; nur Einträge, für die
+                True zurückgegeben wird, werden geliefert.
+            directory_filter (callable, optional): Erhält den Pfad eines Unterverzeichnisses;
+                nur bei True wird es durchsucht.
+            snapshot (DirectorySnapshot, optional): Snapshot für inkrementelle Scans. Verzeichnisse
+                mit unveränderter mtime werden nicht erneut gelesen.
+            verify_files (bool): Ob die Dateien unveränderter Verzeichnisse weiterhin per stat()
+                geprüft werden. Nur dann entspricht das Ergebnis exakt einem vollständigen
+                Scan; ohne Prüfung bleiben Änderungen am Inhalt bestehender Dateien unbemerkt.
+        """
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Unbekannte Link-Behandlung: {symlinks} (erlaubt: {', '.join(SYMLINK_POLICIES)})")
+
+        self.logger = logger
+        self.max_depth = max_depth
+        self.symlinks = symlinks
+        self.file_filter = file_filter
+        self.directory_filter = directory_filter
+        self.snapshot = snapshot
+        self.verify_files = verify_files
+        if snapshot is not None:
+            snapshot.prepare(symlinks)
+
+    def walk(self, root, recursive=True, with_skipped=False):
+        """
+        Durchläuft einen Verzeichnisbaum ähnlich wie os.walk.
+
+        Args:
+            root (str | Path): Wurzelverzeichnis.
+            recursive (bool): Ob Unterverzeichnisse durchsucht werden sollen.
+            with_skipped (bool): Ob zusätzlich die Namen der übersprungenen Einträge
+                (Links je nach Link-Behandlung, Sonderdateien, vom Dateifilter
+                abgelehnte Dateien) geliefert werden, z. B. um leere Verzeichnisse
+                ohne erneutes Auflisten zu erkennen.
+
+        Yields:
+            tuple: (Verzeichnispfad, Namen der Unterverzeichnisse, Liste von ScanEntry),
+                mit with_skipped ergänzt um die Liste der übersprungenen Namen.
+        """
+        max_depth = self.max_depth if recursive else 0
+        root = os.fspath(root)
+        visited = self._start_visited(root)
+        if visited is None:
+            return
+
+        seen = set()
+        stack = [(root, 0)]
+        while stack:
+            directory, depth = stack.pop()
+            listing = self._scan_directory(directory)
+            if listing is None:
+                continue
+            subdirectories, files, skipped = listing
+            seen.add(directory)
+
+            yield self._walk_item(directory, subdirectories, files, skipped, with_skipped)
+
+            if max_depth is None or depth < max_depth:
+                children = self._select_subdirectories(subdirectories, visited)
+                stack.extend((path, depth + 1) for path in reversed(children))
+
+        self._finish_snapshot(root, seen, max_depth)
+
+    def _walk_item(self, directory, subdirectories, files, skipped, with_skipped):
+        """
+        Erstellt das von walk() gelieferte Tupel eines Verzeichnisses.
+
+        Args:
+            directory (str): Verzeichnispfad.
+            subdirectories (list): Unterverzeichnisse mit path und name.
+            files (list): ScanEntry der Dateien.
+            skipped (list): Namen der übersprungenen Einträge.
+            with_skipped (bool): Ob die übersprungenen Namen angehängt werden.
+
+        Returns:
+            tuple: Eintrag von walk().
+        """
+        names = [entry.name for entry in subdirectories]
+        if with_skipped:
+            return directory, names, files, skipped
+        return directory, names, files
+
+    def iter_files(self, roots, recursive=True):
+        """
+        Liefert alle Dateien eines oder mehrerer Verzeichnisbäume.
+
+        Args:
+            roots (str | Path | list): Wurzelverzeichnis oder Liste von Wurzelverzeichnissen.
+            recursive (bool): Ob Unterverzeichnisse durchsucht werden sollen.
+
+        Yields:
+            ScanEntry: Gefundene Datei.
+        """
+        if isinstance(roots, (str, os.PathLike)):
+            roots = [roots]
+        for root in roots:
+            for _, _, files in self.walk(root, recursive):
+                yield from files
+
+    def _start_visited(self, root):
+        """
+        Erstellt die Menge besuchter Verzeichnisse für die Erkennung von Link-Schleifen.
+
+        Args:
+            root (str): Wurzelverzeichnis.
+
+        Returns:
+            set: (Gerät, Inode) der Wurzel beim Folgen von Links, sonst leer;
+                None, wenn die Wurzel nicht gelesen werden kann.
+        """
+        visited = set()
+        if self.symlinks == "follow":
+            try:
+                stat_result = os.stat(root)
+            except OSError as e:
+                self.logger.error(f"Fehler beim Lesen von {root}: {e}")
+                return None
+            visited.add((stat_result.st_dev, stat_result.st_ino))
+        return visited
+
+    def _select_subdirectories(self, subdirectories, visited):
+        """
+        Wählt die zu durchsuchenden Unterverzeichnisse aus.
+
+        Args:
+            subdirectories (list): os.DirEntry der Unterverzeichnisse.
+            visited (set): Bereits besuchte Verzeichnisse; wird beim Folgen von Links ergänzt.
+
+        Returns:
+            list: Pfade der zu durchsuchenden Unterverzeichnisse in Verzeichnisreihenfolge.
+        """
+        children = []
+        for entry in subdirectories:
+            if self.directory_filter is not None and not self.directory_filter(entry.path):
+                continue
+            if self.symlinks == "follow":
+                try:
+                    stat_result = entry.stat()
+                except OSError as e:
+                    self.logger.error(f"Fehler beim Lesen von {entry.path}: {e}")
+                    continue
+                key = (stat_result.st_dev, stat_result.st_ino)
+                if stat_result.st_ino and key in visited:
+                    continue
+                visited.add(key)
+            children.append(entry.path)
+        return children
+
+    def _finish_snapshot(self, root, seen, max_depth):
+        """
+        Entfernt nach einem vollständigen Scan verschwundene Verzeichnisse aus dem Snapshot.
+
+        Nach einem durch Tiefe oder Filter begrenzten Scan bleibt der Snapshot unverändert,
+        da nicht besuchte Verzeichnisse nicht verschwunden sein müssen.
+
+        Args:
+            root (str): Wurzelverzeichnis.
+            seen (set): Gelesene Verzeichnisse.
+            max_depth (int): Maximale Tiefe des Scans oder None.
+        """
+        if self.snapshot is None:
+            return
+        if max_depth is None and self.directory_filter is None:
+            self.snapshot.prune(root, seen)
+        self.snapshot.flush()
+        self.logger.info(
+            f"Snapshot: {self.snapshot.reused_directories} Verzeichnisse übernommen, "
+            f"{self.snapshot.scanned_directories} neu gelesen"
+        )
+
+    def _scan_directory(self, directory):
+        """
+        Liest ein Verzeichnis und teilt seine Einträge in Unterverzeichnisse und Dateien.
+
+        Mit Snapshot wird ein Verzeichnis mit unveränderter mtime aus dem Snapshot
+        übernommen, sonst gelesen und im Snapshot gespeichert.
+
+        Args:
+            directory (str): Zu lesendes Verzeichnis.
+
+        Returns:
+            tuple: (Liste der Unterverzeichnisse mit path und name, Liste von ScanEntry,
+                Namen der übersprungenen Einträge) oder None, wenn das Verzeichnis nicht
+                gelesen werden kann.
+        """
+        if self.snapshot is None:
+            listing = self._list_directory(directory)
+        else:
+            listing = self._list_with_snapshot(directory)
+        if listing is None or self.file_filter is None:
+            return listing
+        subdirectories, files, skipped = listing
+        accepted = []
+        for entry in files:
+            if self.file_filter(entry):
+                accepted.append(entry)
+            else:
+                skipped.append(entry.name)
+        return subdirectories, accepted, skipped
+
+    def _list_with_snapshot(self, directory):
+        """
+        Liefert den Inhalt eines Verzeichnisses aus dem Snapshot oder liest ihn neu.
+
+        Args:
+            directory (str): Zu lesendes Verzeichnis.
+
+        Returns:
+            tuple: (Unterverzeichnisse, Liste von ScanEntry, Namen der übersprungenen
+                Einträge) oder None bei Fehlern.
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError as e:
+            self.logger.error(f"Fehler beim Lesen des Verzeichnisses {directory}: {e}")
+            return None
+
+        cached = self.snapshot.get(directory, mtime_ns)
+        if cached is not None:
+            subdirectory_names, file_rows, skipped = cached
+            subdirectories = [
+                _SnapshotDirectory(os.path.join(directory, name), name) for name in subdirectory_names
+            ]
+            files = []
+            for name, size, mtime, device, inode in file_rows:
+                path = os.path.join(directory, name)
+                if self.verify_files:
+                    try:
+                        stat_result = os.stat(path)
+                    except OSError as e:
+                        self.logger.error(f"Fehler beim Lesen von {path}: {e}")
+                        skipped.append(name)
+                        continue
+                    size, mtime = stat_result.st_size, stat_result.st_mtime
+                    device, inode = stat_result.st_dev, stat_result.st_ino
+                files.append(ScanEntry(path, name, size, mtime, device, inode))
+            return subdirectories, files, skipped
+
+        scanned_ns = time.time_ns()
+        listing = self._list_directory(directory)
+        if listing is not None:
+            subdirectories, files, skipped = listing
+            self.snapshot.put(
+                directory, mtime_ns, scanned_ns, [entry.name for entry in subdirectories],
+                [(entry.name, entry.size, entry.mtime, entry.device, entry.inode) for entry in files],
+                skipped
+            )
+        return listing
+
+    def _list_directory(self, directory):
+        """
+        Liest ein Verzeichnis mit os.scandir.
+
+        Args:
+            directory (str): Zu lesendes Verzeichnis.
+
+        Returns:
+            tuple: (Liste von os.DirEntry der Unterverzeichnisse, Liste von ScanEntry ohne
+                Anwendung des Dateifilters, Namen der übersprungenen Einträge) oder None,
+                wenn das Verzeichnis nicht gelesen werden kann.
+        """
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError as e:
+            self.logger.error(f"Fehler beim Lesen des Verzeichnisses {directory}: {e}")
+            return None
+
+        subdirectories = []
+        files = []
+        skipped = []
+        for entry in entries:
+            try:
+                if entry.is_symlink():
+                    if self.symlinks == "skip":
+                        skipped.append(entry.name)
+                        continue
+                    if entry.is_dir():
+                        if self.symlinks == "follow":
+                            subdirectories.append(entry)
+                        else:
+                            skipped.append(entry.name)
+                        continue
+                    if not entry.is_file():
+                        skipped.append(entry.name)
+                        continue
+                elif entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry)
+                    continue
+                elif not entry.is_file(follow_symlinks=False):
+                    skipped.append(entry.name)
+                    continue
+
+                stat_result = entry.stat()
+            except OSError as e:
+                self.logger.error(f"Fehler beim Lesen von {entry.path}: {e}")
+                skipped.append(entry.name)
+                continue
+
+            files.append(ScanEntry(
+                entry.path, entry.name, stat_result.st_size, stat_result.st_mtime,
+                stat_result.st_dev, stat_result.st_ino
+            ))
+
+        return subdirectories, files, skipped
+
+class ParallelDirectoryScanner(DirectoryScanner):
+    """
+    Verzeichnis-Scanner, der mehrere Verzeichnisse gleichzeitig auflistet.
+
+    Auf Netzwerk- und parallelen Dateisystemen dominiert die Latenz je Verzeichnis;
+    ein Thread-Pool arbeitet daher eine gemeinsame Warteschlange von Verzeichnissen
+    ab, und jedes gelesene Verzeichnis reiht seine Unterverzeichnisse sofort ein.
+    Geordnet entspricht die Ausgabe exakt der des seriellen Scanners (die Verzeichnisse
+    werden vorab gelesen und in Vorordnung ausgegeben); ungeordnet wird jedes
+    Verzeichnis ausgegeben, sobald es gelesen ist. Filter werden in den Worker-Threads
+    aufgerufen.
+
+    Höchstens prefetch Verzeichnisse sind gleichzeitig in Arbeit oder gelesen, aber
+    noch nicht ausgegeben; weitere werden erst eingereiht, wenn der Aufrufer
+    Verzeichnisse abgenommen hat. Der Speicherbedarf für Verzeichnisinhalte bleibt
+    so auch bei langsamen Aufrufern und sehr großen Bäumen begrenzt; wartende
+    Verzeichnisse belegen nur ihren Pfad.
+    """
+    def __init__(self, workers=DEFAULT_WALK_WORKERS, ordered=True, prefetch=None, **kwargs):
+        """
+        Initialisiert den Scanner.
+
+        Args:
+            workers (int): Anzahl paralleler Threads.
+            ordered (bool): Ob die Reihenfolge des seriellen Scanners eingehalten wird.
+            prefetch (int, optional): Maximale Anzahl gleichzeitig eingereihter oder gelesener,
+                noch nicht ausgegebener Verzeichnisse; standardmäßig
+                workers * DEFAULT_PREFETCH_PER_WORKER.
+            **kwargs: Optionen von DirectoryScanner (max_depth, symlinks, Filter).
+        """
+        super().__init__(**kwargs)
+        self.workers = workers
+        self.ordered = ordered
+        self.prefetch = max(1, prefetch if prefetch is not None else workers * DEFAULT_PREFETCH_PER_WORKER)
+
+    def walk(self, root, recursive=True, with_skipped=False):
+        """
+        Durchläuft einen Verzeichnisbaum parallel.
+
+        Args:
+            root (str | Path): Wurzelverzeichnis.
+            recursive (bool): Ob Unterverzeichnisse durchsucht werden sollen.
+            with_skipped (bool): Ob zusätzlich die Namen der übersprungenen Einträge
+                geliefert werden (siehe DirectoryScanner.walk).
+
+        Yields:
+            tuple: (Verzeichnispfad, Namen der Unterverzeichnisse, Liste von ScanEntry),
+                mit with_skipped ergänzt um die Liste der übersprungenen Namen.
+        """
+        max_depth = self.max_depth if recursive else 0
+        root = os.fspath(root)
+        visited = self._start_visited(root)
+        if visited is None:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            if self.ordered:
+                yield from self._walk_ordered(executor, root, max_depth, visited, with_skipped)
+            else:
+                yield from self._walk_unordered(executor, root, max_depth, visited, with_skipped)
+        finally:
+            executor.shutdown(wait=True)
+
+    def _walk_ordered(self, executor, root, max_depth, visited, with_skipped=False):
+        """
+        Liefert die Verzeichnisse in Vorordnung und liest die nächsten vorab.
+
+        Der Stapel enthält wie beim seriellen Scanner alle noch zu besuchenden
+        Verzeichnisse; gelesen werden vorab nur die obersten, also die als Nächstes
+        ausgegebenen, bis höchstens prefetch Verzeichnisse eingereiht sind.
+
+        Args:
+            executor (ThreadPoolExecutor): Pool für das Auflisten.
+            root (str): Wurzelverzeichnis.
+            max_depth (int): Maximale Tiefe oder None.
+            visited (set): Besuchte Verzeichnisse beim Folgen von Links.
+            with_skipped (bool): Ob die Namen der übersprungenen Einträge angehängt werden.
+
+        Yields:
+            tuple: Eintrag von walk().
+        """
+        seen = set()
+        # Einträge [Future oder None, Pfad, Tiefe]; None steht für noch nicht eingereiht
+        stack = [[None, root, 0]]
+        submitted = 0
+        try:
+            while stack:
+                # Die obersten Verzeichnisse vorab einreihen, bis das Limit erreicht ist
+                for item in reversed(stack):
+                    if submitted >= self.prefetch:
+                        break
+                    if item[0] is None:
+                        item[0] = executor.submit(self._scan_directory, item[1])
+                        submitted += 1
+                # Das nächste Verzeichnis wird auch bei erreichtem Limit gelesen
+                if stack[-1][0] is None:
+                    stack[-1][0] = executor.submit(self._scan_directory, stack[-1][1])
+                    submitted += 1
+
+                future, directory, depth = stack.pop()
+                submitted -= 1
+                listing = future.result()
+                if listing is None:
+                    continue
+                subdirectories, files, skipped = listing
+                seen.add(directory)
+
+                yield self._walk_item(directory, subdirectories, files, skipped, with_skipped)
+
+                if max_depth is None or depth < max_depth:
+                    children = self._select_subdirectories(subdirectories, visited)
+                    stack.extend([None, path, depth + 1] for path in reversed(children))
+            self._finish_snapshot(root, seen, max_depth)
+        finally:
+            # Bei vorzeitigem Abbruch noch nicht begonnene Verzeichnisse verwerfen
+            for future, _, _ in stack:
+                if future is not None:
+                    future.cancel()
+
+    def _walk_unordered(self, executor, root, max_depth, visited, with_skipped=False):
+        """
+        Liefert die Verzeichnisse in der Reihenfolge, in der sie fertig gelesen sind.
+
+        Args:
+            executor (ThreadPoolExecutor): Pool für das Auflisten.
+            root (str): Wurzelverzeichnis.
+            max_depth (int): Maximale Tiefe oder None.
+            visited (set): Besuchte Verzeichnisse beim Folgen von Links.
+            with_skipped (bool): Ob die Namen der übersprungenen Einträge angehängt werden.
+
+        Yields:
+            tuple: Eintrag von walk().
+        """
+        completed = queue.Queue()
+        pending = set()
+        waiting = [(root, 0)]
+
+        def submit(path, depth):
+            future = executor.submit(self._scan_directory, path)
+            pending.add(future)
+            future.add_done_callback(lambda done: completed.put((done, path, depth)))
+
+        seen = set()
+        try:
+            while True:
+                # Gelesene, noch nicht ausgegebene Verzeichnisse zählen zum Limit
+                while waiting and len(pending) < self.prefetch:
+                    submit(*waiting.pop())
+                if not pending:
+                    break
+                future, directory, depth = completed.get()
+                pending.discard(future)
+                listing = future.result()
+                if listing is None:
+                    continue
+                subdirectories, files, skipped = listing
+                seen.add(directory)
+
+                yield self._walk_item(directory, subdirectories, files, skipped, with_skipped)
+
+                if max_depth is None or depth < max_depth:
+                    waiting.extend((path, depth + 1) for path in self._select_subdirectories(subdirectories, visited))
+            self._finish_snapshot(root, seen, max_depth)
+        finally:
+            # Bei vorzeitigem Abbruch noch nicht begonnene Verzeichnisse verwerfen
+            for future in pending:
+                future.cancel()
+
+# Beispiel für die Verwendung
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        for scanner in (DirectoryScanner(), ParallelDirectoryScanner(ordered=False)):
+            start_time = time.perf_counter()
+            file_count = 0
+            total_size = 0
+            for scan_entry in scanner.iter_files(sys.argv[1]):
+                file_count += 1
+                total_size += scan_entry.size
+            elapsed = time.perf_counter() - start_time
+            print(f"{type(scanner).__name__}: {file_count} Dateien, {total_size} Bytes in {elapsed:.2f} s")
+    else:
+        print("Bitte geben Sie ein Verzeichnis als Argument an.")
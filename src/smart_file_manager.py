@@ -1,4 +1,3 @@
-import os
 import sys
 import logging
 from pathlib import Path
@@ -8,6 +7,10 @@ from collections import defaultdict
 import re
 from datetime import datetime
 
+from src.hash_cache import HashCache
+from src.image_similarity import ImageSimilarityFinder, image_similarity_available
+from src.scanner import DirectoryScanner
+
 # Konfiguration des Logging-Systems
 logging.basicConfig(
     level=logging.INFO,
@@ -24,11 +27,21 @@ class SmartFileManager:
     Klasse für intelligentes Dateimanagement mit automatischer Gruppierung,
     Aufräumvorschlägen und Ähnlichkeitserkennung.
     """
-    def __init__(self):
+    def __init__(self, scanner=None, hash_cache=None):
         """
         Initialisiert den SmartFileManager.
+        
+        Args:
+            scanner (DirectoryScanner, optional): Scanner für Verzeichnisbäume, z. B. parallel
+                oder mit Snapshot für inkrementelle Scans. Standardmäßig werden symbolische
+                Links bei allen Analysen übersprungen.
+            hash_cache (HashCache, optional): Persistenter Cache für die Fingerabdrücke von
+                Bildern. Standardmäßig wird beim ersten Bildvergleich der Standard-Cache geöffnet.
         """
         self.logger = logger
+        self.hash_cache = hash_cache
+        self.image_finder = None
+        self.scanner = scanner or DirectoryScanner(symlinks="skip")
     
     def analyze_directory_structure(self, directory_path):
         """
@@ -61,30 +74,25 @@ class SmartFileManager:
                 return result
             
             # Durchlaufe alle Dateien und Verzeichnisse
-            for root, dirs, files in os.walk(directory):
+            for root, dirs, files, skipped in self.scanner.walk(directory, with_skipped=True):
                 root_path = Path(root)
                 
                 # Zähle Verzeichnisse
                 result["total_directories"] += len(dirs)
                 
-                # Prüfe auf leere Verzeichnisse
-                if not dirs and not files:
+                # Prüfe auf leere Verzeichnisse (auch ohne übersprungene Links)
+                if not dirs and not files and not skipped:
                     result["empty_directories"].append(str(root_path))
                 
                 # Sammle Informationen über Dateien
                 dir_size = 0
-                for file in files:
-                    file_path = root_path / file
-                    
-                    # Überspringe symbolische Links
-                    if file_path.is_symlink():
-                        continue
-                    
+                for entry in files:
+                    file_path = entry.file_path
                     result["total_files"] += 1
                     
                     try:
                         # Dateigröße
-                        file_size = file_path.stat().st_size
+                        file_size = entry.size
                         dir_size += file_size
                         
                         # Dateityp
@@ -113,7 +121,7 @@ class SmartFileManager:
                             })
                         
                         # Datumsverteilung
-                        mod_time = file_path.stat().st_mtime
+                        mod_time = entry.mtime
                         mod_date = datetime.fromtimestamp(mod_time)
                         year_month = mod_date.strftime("%Y-%m")
                         result["date_distribution"][year_month] += 1
@@ -186,23 +194,14 @@ class SmartFileManager:
             temp_extensions = ['.tmp', '.temp', '.bak', '.cache', '.log']
             temp_patterns = [r'~\$.*', r'.*\.swp', r'.*\.swo', r'Thumbs\.db', r'\.DS_Store']
             
-            directory = Path(directory_path)
-            for root, _, files in os.walk(directory):
-                root_path = Path(root)
-                for file in files:
-                    file_path = root_path / file
-                    
-                    # Überspringe symbolische Links
-                    if file_path.is_symlink():
-                        continue
-                    
-                    # Prüfe auf temporäre Dateierweiterungen
-                    if any(file.lower().endswith(ext) for ext in temp_extensions):
-                        result["temp_files"].append(str(file_path))
-                    
-                    # Prüfe auf temporäre Dateimuster
-                    if any(re.match(pattern, file) for pattern in temp_patterns):
-                        result["temp_files"].append(str(file_path))
+            for entry in self.scanner.iter_files(directory_path):
+                # Prüfe auf temporäre Dateierweiterungen
+                if any(entry.name.lower().endswith(ext) for ext in temp_extensions):
+                    result["temp_files"].append(entry.path)
+                
+                # Prüfe auf temporäre Dateimuster
+                if any(re.match(pattern, entry.name) for pattern in temp_patterns):
+                    result["temp_files"].append(entry.path)
             
             # Organisationsvorschläge basierend auf Dateitypen
             file_types = analysis["file_types"]
@@ -242,6 +241,10 @@ class SmartFileManager:
         """
         Gruppiert Dateien nach Ähnlichkeit.
         
+        Bildgruppen haben immer die Form {"fingerprint", "max_distance", "files"} des
+        ImageSimilarityFinder. Ohne Pillow/NumPy bleibt "similar_image_files" leer und
+        "image_similarity_available" ist False.
+        
         Args:
             directory_path (str): Pfad zum zu analysierenden Verzeichnis.
             similarity_threshold (float): Schwellenwert für die Ähnlichkeit (0.0 bis 1.0).
@@ -255,7 +258,8 @@ class SmartFileManager:
         result = {
             "similar_text_files": [],
             "similar_image_files": [],
-            "similar_names": []
+            "similar_names": [],
+            "image_similarity_available": image_similarity_available()
         }
         
         try:
@@ -272,28 +276,18 @@ class SmartFileManager:
             text_extensions = ['.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.csv']
             image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg']
             
-            for root, _, files in os.walk(directory):
-                root_path = Path(root)
-                for file in files:
-                    file_path = root_path / file
-                    
-                    # Überspringe symbolische Links
-                    if file_path.is_symlink():
-                        continue
-                    
-                    all_files.append(file_path)
-                    
-                    # Kategorisiere Dateien
-                    ext = file_path.suffix.lower()
-                    if ext in text_extensions:
-                        text_files.append(file_path)
-                    elif ext in image_extensions:
-                        image_files.append(file_path)
-                    
-                    # Begrenze die Anzahl der Dateien
-                    if len(all_files) >= max_files:
-                        break
+            for entry in self.scanner.iter_files(directory):
+                file_path = entry.file_path
+                all_files.append(file_path)
                 
+                # Kategorisiere Dateien
+                ext = file_path.suffix.lower()
+                if ext in text_extensions:
+                    text_files.append(file_path)
+                elif ext in image_extensions:
+                    image_files.append(file_path)
+                
+                # Begrenze die Anzahl der Dateien
                 if len(all_files) >= max_files:
                     break
             
@@ -302,12 +296,12 @@ class SmartFileManager:
                 text_groups = self._group_text_files_by_content(text_files, similarity_threshold)
                 result["similar_text_files"] = text_groups
             
-            # Gruppiere Bilddateien nach Inhalt
-            # In einer vollständigen Implementierung würde hier eine Bildähnlichkeitsanalyse durchgeführt werden
-            # Für dieses Beispiel gruppieren wir nach Dateigröße als einfache Annäherung
+            # Gruppiere Bilddateien nach Wahrnehmungs-Hash
             if image_files:
-                image_groups = self._group_files_by_size(image_files)
-                result["similar_image_files"] = image_groups
+                if result["image_similarity_available"]:
+                    result["similar_image_files"] = self._get_image_finder().find_similar_groups(image_files)
+                else:
+                    self.logger.warning("Pillow/NumPy nicht verfügbar, Bilder werden nicht verglichen")
             
             # Gruppiere Dateien nach Namensähnlichkeit
             name_groups = self._group_files_by_name_similarity(all_files, similarity_threshold)
@@ -320,6 +314,26 @@ class SmartFileManager:
             self.logger.error(f"Fehler bei der Ähnlichkeitsgruppierung: {e}")
             return result
     
+    def _get_image_finder(self):
+        """
+        Liefert den ImageSimilarityFinder und erstellt ihn bei Bedarf.
+
+        Der Finder bleibt erhalten, damit bereits berechnete Fingerabdrücke
+        bei weiteren Aufrufen wiederverwendet werden. Über den HashCache bleiben
+        sie auch über Programmstarts hinweg erhalten.
+
+        Returns:
+            ImageSimilarityFinder: Finder für ähnliche Bilder.
+        """
+        if self.image_finder is None:
+            if self.hash_cache is None:
+                try:
+                    self.hash_cache = HashCache()
+                except Exception as e:
+                    self.logger.error(f"Hash-Cache konnte nicht geöffnet werden: {e}")
+            self.image_finder = ImageSimilarityFinder(hash_cache=self.hash_cache)
+        return self.image_finder
+    
     def _group_text_files_by_content(self, files, similarity_threshold):
         """
         Gruppiert Textdateien nach Inhaltsähnlichkeit.
@@ -426,46 +440,6 @@ class SmartFileManager:
         
         return intersection / union
     
-    def _group_files_by_size(self, files):
-        """
-        Gruppiert Dateien nach Größe.
-        
-        Args:
-            files (list): Liste von Dateipfaden.
-            
-        Returns:
-            list: Gruppen von Dateien mit ähnlicher Größe.
-        """
-        groups = []
-        
-        try:
-            # Gruppiere Dateien nach Größe
-            size_groups = defaultdict(list)
-            
-            for file_path in files:
-                try:
-                    size = file_path.stat().st_size
-                    size_groups[size].append(str(file_path))
-                except Exception as e:
-                    self.logger.error(f"Fehler beim Lesen der Größe von {file_path}: {e}")
-            
-            # Erstelle Gruppen mit mehr als einer Datei
-            for size, paths in size_groups.items():
-                if len(paths) > 1:
-                    groups.append({
-                        "size": size,
-                        "files": paths
-                    })
-            
-            # Sortiere Gruppen nach Größe
-            groups = sorted(groups, key=lambda x: x["size"], reverse=True)
-            
-            return groups
-            
-        except Exception as e:
-            self.logger.error(f"Fehler bei der Dateigruppierung nach Größe: {e}")
-            return groups
-    
     def _group_files_by_name_similarity(self, files, similarity_threshold):
         """
         Gruppiert Dateien nach Namensähnlichkeit.
@@ -1,4 +1,3 @@
-import hashlib
 import logging
 import sys
 import os
@@ -13,6 +12,8 @@ from PyQt6.QtCore import Qt, QDir, QSize, QModelIndex, QThread, pyqtSignal
 from PyQt6.QtGui import QIcon, QAction, QFont
 from src.ui.file_organizer import FileOrganizerWidget
 from src.ui.file_preview import FilePreviewWidget
+from src.hash_cache import HashCache
+from src.hashing import DEFAULT_HASH_ALGORITHM, hash_file
 
 class FileOrganizerUI(QMainWindow):
     """
@@ -33,6 +34,9 @@ class FileOrganizerUI(QMainWindow):
         # Hauptlayout
         self.main_layout = QVBoxLayout(self.central_widget)
 
+        # Persistenter Hash-Cache für die Duplikatsuche (wird bei Bedarf geöffnet)
+        self.hash_cache = None
+
         # Erstelle UI-Komponenten
         self._create_toolbar()
         self._create_main_view()
@@ -462,11 +466,17 @@ class FileOrganizerUI(QMainWindow):
             duplicates = {}
             total_files = len(all_files)
             hashing_progress = 0
+            hash_cache = self._get_hash_cache()
 
-            # Hash-Berechnung für jede Datei
+            # Hash-Berechnung für jede Datei (unveränderte Dateien aus dem Cache)
             for i, file_path in enumerate(all_files):
                 try:
-                    file_hash = self._calculate_file_hash(file_path)
+                    file_stat = os.stat(file_path)
+                    file_hash = hash_cache.get(file_path, DEFAULT_HASH_ALGORITHM, file_stat) if hash_cache else None
+                    if file_hash is None:
+                        file_hash = self._calculate_file_hash(file_path)
+                        if hash_cache:
+                            hash_cache.put(file_path, DEFAULT_HASH_ALGORITHM, file_hash, file_stat)
                     if file_hash in duplicates:
                         duplicates[file_hash].append(file_path)
                     else:
@@ -480,6 +490,9 @@ class FileOrganizerUI(QMainWindow):
                 except Exception as e:
                     logging.error(f"Fehler bei Verarbeitung von {file_path}: {e}")
 
+            if hash_cache:
+                hash_cache.flush()
+
             # Filtere nur echte Duplikate (mehr als eine Datei pro Hash)
             real_duplicates = {h: files for h, files in duplicates.items() if len(files) > 1}
 
@@ -494,13 +507,18 @@ class FileOrganizerUI(QMainWindow):
         finally:
             self.progress_bar.setVisible(False)
 
-    def _calculate_file_hash(self, file_path, chunk_size=8192):
-        """Berechnet MD5-Hash einer Datei in Chunks."""
-        md5 = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            while chunk := f.read(chunk_size):
-                md5.update(chunk)
-        return md5.hexdigest()
+    def _get_hash_cache(self):
+        """Öffnet den persistenten Hash-Cache beim ersten Zugriff."""
+        if self.hash_cache is None:
+            try:
+                self.hash_cache = HashCache()
+            except Exception as e:
+                logging.error(f"Hash-Cache konnte nicht geöffnet werden: {e}")
+        return self.hash_cache
+
+    def _calculate_file_hash(self, file_path, chunk_size=None, algorithm=DEFAULT_HASH_ALGORITHM):
+        """Berechnet den Hash einer Datei (gleicher Algorithmus und Lesepfad wie der DuplicateDetector)."""
+        return hash_file(file_path, algorithm, chunk_size)
 
     def _show_no_files_message(self, path):
         """Zeigt Meldung wenn keine Dateien gefunden wurden."""
@@ -3,7 +3,12 @@ import os
 import sys
 import tempfile
 import shutil
+import hashlib
+import json
+import zipfile
+import time
 from pathlib import Path
+from unittest import mock
 
 # Füge Projektverzeichnis zum Pfad hinzu
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,6 +17,20 @@ from src.file_analyzer import FileAnalyzer
 from src.duplicate_detector import DuplicateDetector
 from src.file_manager import FileManager
 from src.smart_file_manager import SmartFileManager
+from src.hash_cache import HashCache
+from src.scan_checkpoint import ScanCheckpoint
+from src.io_throttle import IOThrottle, TokenBucket
+from src.chunking import ChunkAnalyzer, iter_chunks
+import src.chunking as chunking
+from src.file_index import FileIndex, benchmark_memory
+from src.scanner import DirectoryScanner, ParallelDirectoryScanner
+from src.directory_snapshot import DirectorySnapshot
+from src.live_index import LiveFileIndex, live_index_available
+from src.file_organizer import FileOrganizer
+from src.file_catalog import FileCatalog, json_default, benchmark_memory as benchmark_catalog_memory
+from src.hashing import available_algorithms
+import src.hashing as hashing
+from src.image_similarity import BKTree, ImageSimilarityFinder, hamming_distance, image_similarity_available
 
 class TestFileAnalyzer(unittest.TestCase):
     """Test-Klasse für den FileAnalyzer."""
@@ -119,6 +138,995 @@ class TestDuplicateDetector(unittest.TestCase):
         self.assertIn(self.file1, group["files"])
         self.assertIn(self.file2, group["files"])
 
+class TestDuplicateDetectorPipeline(unittest.TestCase):
+    """Test-Klasse für die mehrstufige Duplikaterkennung."""
+    
+    def setUp(self):
+        """Richtet die Testumgebung ein."""
+        self.detector = DuplicateDetector(sample_size=1024)
+        self.test_dir = tempfile.mkdtemp()
+        
+        # Zwei identische und eine am Anfang abweichende Datei gleicher Größe
+        content = bytes(range(256)) * 64
+        self.write_file("original.bin", content)
+        self.write_file("kopie.bin", content)
+        self.write_file("anders.bin", b"X" + content[1:])
+    
+    def tearDown(self):
+        """Räumt die Testumgebung auf."""
+        shutil.rmtree(self.test_dir)
+    
+    def write_file(self, name, content):
+        """Schreibt eine Testdatei in das Testverzeichnis."""
+        path = os.path.join(self.test_dir, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+    
+    def test_sample_stage_skips_full_hash(self):
+        """Testet, dass abweichende Stichproben keinen vollständigen Hash auslösen."""
+        result = self.detector.find_duplicates(self.test_dir)
+        
+        self.assertEqual(len(result["duplicate_groups"]), 1)
+        names = sorted(f["name"] for f in result["duplicate_groups"][0]["files"])
+        self.assertEqual(names, ["kopie.bin", "original.bin"])
+        self.assertEqual(result["bytes_read"]["sample_hash"], 3 * 3 * 1024)
+        self.assertEqual(result["bytes_read"]["full_hash"], 2 * 256 * 64)
+    
+    def test_parallel_executors_match_serial(self):
+        """Testet, dass Thread- und Prozess-Pool dieselben Gruppen wie die serielle Suche liefern."""
+        self.write_file("klein1.txt", b"kleiner Inhalt")
+        self.write_file("klein2.txt", b"kleiner Inhalt")
+        serial = self.detector.find_duplicates(self.test_dir)
+        
+        for executor in ("thread", "process"):
+            detector = DuplicateDetector(sample_size=1024, executor=executor, max_workers=2)
+            result = detector.find_duplicates(self.test_dir)
+            self.assertEqual(result["duplicate_groups"], serial["duplicate_groups"])
+            self.assertEqual(result["throughput"]["files_hashed"], serial["throughput"]["files_hashed"])
+    
+    def test_hash_cache_reused_and_invalidated(self):
+        """Testet, dass unveränderte Dateien aus dem Cache kommen und geänderte neu gehasht werden."""
+        with HashCache(os.path.join(self.test_dir, "cache", "hashes.sqlite3")) as cache:
+            detector = DuplicateDetector(sample_size=1024, hash_cache=cache)
+            first = detector.find_duplicates(self.test_dir)
+            second = detector.find_duplicates(self.test_dir)
+            
+            self.assertEqual(second["duplicate_groups"], first["duplicate_groups"])
+            self.assertEqual(second["cache"]["misses"], 0)
+            self.assertEqual(second["bytes_read"]["full_hash"], 0)
+            
+            # Änderung der Datei (neue mtime) macht den Eintrag ungültig
+            path = os.path.join(self.test_dir, "kopie.bin")
+            stat_result = os.stat(path)
+            os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1000))
+            third = detector.find_duplicates(self.test_dir)
+            self.assertEqual(third["cache"]["misses"], 2)
+
+    def test_hash_cache_with_undecodable_names(self):
+        """Testet, dass Dateinamen ohne gültiges UTF-8 die Suche mit Cache nicht abbrechen."""
+        name = os.fsdecode(b"kopie\xff.bin")
+        shutil.copyfile(os.path.join(self.test_dir, "original.bin"), os.path.join(self.test_dir, name))
+
+        with HashCache(os.path.join(self.test_dir, "cache", "hashes.sqlite3")) as cache:
+            detector = DuplicateDetector(sample_size=1024, hash_cache=cache, compare_strategy="hash")
+            first = detector.find_duplicates(self.test_dir)
+            second = detector.find_duplicates(self.test_dir)
+
+            self.assertEqual(len(first["duplicate_groups"][0]["files"]), 3)
+            self.assertIn(os.path.join(self.test_dir, name), [f["path"] for f in first["duplicate_groups"][0]["files"]])
+            self.assertEqual(second["cache"]["misses"], 0)
+            self.assertEqual(cache.prune(), 0)
+
+    def test_hash_algorithms_agree(self):
+        """Testet, dass alle Algorithmen dieselben Gruppen liefern und der Vorfilter bestätigt wird."""
+        reference = self.detector.find_duplicates(self.test_dir)
+        expected = [[f["path"] for f in g["files"]] for g in reference["duplicate_groups"]]
+        
+        for algorithm in available_algorithms():
+            result = self.detector.find_duplicates(self.test_dir, hash_algorithm=algorithm, confirm_algorithm="sha256")
+            self.assertEqual([[f["path"] for f in g["files"]] for g in result["duplicate_groups"]], expected)
+            if algorithm != "sha256":
+                self.assertEqual(result["duplicate_groups"][0]["hash"], reference["duplicate_groups"][0]["hash"])
+                self.assertGreater(result["bytes_read"]["confirm_hash"], 0)
+    
+    def test_hardlinks_are_not_wasted_space(self):
+        """Testet, dass Hardlinks getrennt gemeldet und nicht als Verschwendung gezählt werden."""
+        os.link(os.path.join(self.test_dir, "original.bin"), os.path.join(self.test_dir, "link.bin"))
+        result = self.detector.find_duplicates(self.test_dir)
+        
+        self.assertEqual(len(result["hardlink_groups"]), 1)
+        self.assertEqual(len(result["hardlink_groups"][0]["files"]), 2)
+        self.assertEqual(len(result["duplicate_groups"][0]["files"]), 2)
+        self.assertEqual(result["wasted_space"], 256 * 64)
+        self.assertEqual(result["bytes_read"]["full_hash"], 2 * 256 * 64)
+    
+    def test_iter_duplicates_streams_groups(self):
+        """Testet, dass iter_duplicates Gruppen stapelweise liefert wie find_duplicates."""
+        self.write_file("klein1.txt", b"kleiner Inhalt")
+        self.write_file("klein2.txt", b"kleiner Inhalt")
+        expected = self.detector.find_duplicates(self.test_dir)["duplicate_groups"]
+        
+        detector = DuplicateDetector(sample_size=1024, batch_size=1)
+        groups = detector.iter_duplicates(self.test_dir)
+        first = next(groups)
+        self.assertEqual(first, expected[0])
+        self.assertEqual([first] + list(groups), expected)
+    
+    def test_multiple_roots_with_reference(self):
+        """Testet die gemeinsame Suche über mehrere Wurzeln mit Referenzverzeichnis."""
+        archive = os.path.join(self.test_dir, "archiv")
+        incoming = os.path.join(self.test_dir, "eingang")
+        os.makedirs(archive)
+        os.makedirs(incoming)
+        content = os.urandom(5000)
+        shutil.copy(os.path.join(self.test_dir, "original.bin"), os.path.join(archive, "a.bin"))
+        shutil.copy(os.path.join(self.test_dir, "original.bin"), os.path.join(incoming, "b.bin"))
+        for name in ("c1.bin", "c2.bin"):
+            with open(os.path.join(incoming, name), "wb") as f:
+                f.write(content)
+        
+        # Überlappende Wurzeln werden nur einmal durchsucht
+        result = self.detector.find_duplicates([self.test_dir, incoming, archive])
+        single = self.detector.find_duplicates(self.test_dir)
+        self.assertEqual(result["duplicate_groups"], single["duplicate_groups"])
+        self.assertEqual(result["bytes_read"], single["bytes_read"])
+        
+        result = self.detector.find_duplicates(incoming, reference_paths=[archive])
+        self.assertEqual(len(result["duplicate_groups"]), 1)
+        roles = {f["name"]: f["role"] for f in result["duplicate_groups"][0]["files"]}
+        self.assertEqual(roles, {"a.bin": "reference", "b.bin": "candidate"})
+        self.assertEqual(result["total_duplicates"], 1)
+
+        # Relative und über Symlinks angegebene Referenzen werden wie absolute Pfade zugeordnet
+        link = os.path.join(self.test_dir, "archiv-link")
+        os.symlink(archive, link)
+        expected = self.detector.find_duplicates(self.test_dir, reference_paths=[archive])
+        self.assertEqual(len(expected["duplicate_groups"]), 1)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.test_dir)
+        for reference in ("archiv", link):
+            result = self.detector.find_duplicates(self.test_dir, reference_paths=[reference])
+            self.assertEqual(result["duplicate_groups"], expected["duplicate_groups"])
+
+    def test_lockstep_comparison(self):
+        """Testet, dass der blockweise Vergleich früh abbricht und dieselben Gruppen liefert."""
+        directory = os.path.join(self.test_dir, "gross")
+        os.makedirs(directory)
+        content = bytearray(os.urandom(2 * 1024 * 1024))
+        for name in ("a.bin", "b.bin"):
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(content)
+        content[100 * 1024] ^= 0xFF
+        with open(os.path.join(directory, "c.bin"), "wb") as f:
+            f.write(content)
+        
+        hashed = DuplicateDetector(sample_size=1024, compare_strategy="hash").find_duplicates(directory)
+        lockstep = DuplicateDetector(sample_size=1024, compare_strategy="auto").find_duplicates(directory)
+        
+        self.assertEqual(lockstep["duplicate_groups"], hashed["duplicate_groups"])
+        self.assertEqual(lockstep["bytes_read"]["full_hash"], 0)
+        self.assertLess(lockstep["bytes_read"]["lockstep"], hashed["bytes_read"]["full_hash"])
+
+        # Blockweise verglichene Gruppen behalten ihren Platz in der Reihenfolge des Zeitplans
+        for name in ("k1.bin", "k2.bin"):
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(b"k" * 5000)
+        hashed = DuplicateDetector(sample_size=1024, compare_strategy="hash", schedule="reclaim").find_duplicates(directory)
+        lockstep = DuplicateDetector(sample_size=1024, compare_strategy="auto", schedule="reclaim").find_duplicates(directory)
+        self.assertEqual([g["size"] for g in lockstep["duplicate_groups"]], [len(content), 5000])
+        self.assertEqual(lockstep["duplicate_groups"], hashed["duplicate_groups"])
+
+        # Zu große Gruppen werden auch bei erzwungenem Vergleich gehasht, statt alle Dateien zu öffnen
+        crowd = os.path.join(self.test_dir, "viele")
+        os.makedirs(crowd)
+        for index in range(20):
+            with open(os.path.join(crowd, f"{index}.bin"), "wb") as f:
+                f.write(b"v" * 5000)
+        forced = DuplicateDetector(sample_size=1024, compare_strategy="lockstep").find_duplicates(crowd)
+        self.assertEqual(len(forced["duplicate_groups"][0]["files"]), 20)
+        self.assertEqual(forced["bytes_read"]["lockstep"], 0)
+
+    def test_remove_duplicates_with_hardlinks(self):
+        """Testet das Ersetzen von Duplikaten durch Hardlinks inklusive Prüfung."""
+        result = self.detector.find_duplicates(self.test_dir)
+        groups = result["duplicate_groups"]
+        
+        # Eine manipulierte Gruppe wird bei der Prüfung abgelehnt
+        changed = {"size": groups[0]["size"], "files": [
+            {"path": os.path.join(self.test_dir, "original.bin")},
+            {"path": os.path.join(self.test_dir, "anders.bin")}
+        ]}
+        removal = self.detector.remove_duplicates(groups + [changed], action="hardlink")
+        
+        self.assertEqual(removal["linked_files"], 1)
+        self.assertEqual(removal["freed_space"], 256 * 64)
+        self.assertEqual(len(removal["errors"]), 1)
+        original = os.stat(os.path.join(self.test_dir, "original.bin"))
+        copy = os.stat(os.path.join(self.test_dir, "kopie.bin"))
+        self.assertEqual(original.st_ino, copy.st_ino)
+        self.assertEqual(self.detector.find_duplicates(self.test_dir)["wasted_space"], 0)
+
+    def test_remove_duplicates_rejects_prefix(self):
+        """Testet, dass ein Präfix der behaltenen Datei nie ersetzt wird und Hardlinks keinen Platz freigeben."""
+        original = os.path.join(self.test_dir, "original.bin")
+        prefix = self.write_file("praefix.bin", (bytes(range(256)) * 64)[:8192])
+        prefix_group = {"size": 8192, "files": [{"path": original}, {"path": prefix}]}
+
+        for action, verify in (("hardlink", None), ("delete", False)):
+            removal = self.detector.remove_duplicates([prefix_group], action=action, verify=verify)
+            self.assertEqual(removal["linked_files"] + removal["removed_files"], 0)
+            self.assertIn("weicht", removal["errors"][0])
+        self.assertEqual(os.path.getsize(prefix), 8192)
+
+        # Löschen eines Hardlinks gibt keinen Speicher frei
+        link = os.path.join(self.test_dir, "link.bin")
+        os.link(original, link)
+        removal = self.detector.remove_duplicates([{"files": [{"path": original}, {"path": link}]}])
+        self.assertEqual(removal["removed_files"], 1)
+        self.assertEqual(removal["freed_space"], 0)
+    
+    def test_remove_duplicates_keeps_references(self):
+        """Testet, dass mit Referenzverzeichnis nur Kandidaten entfernt werden."""
+        archive = os.path.join(self.test_dir, "archiv")
+        incoming = os.path.join(self.test_dir, "eingang")
+        os.makedirs(archive)
+        os.makedirs(incoming)
+        content = os.urandom(5000)
+        for directory, name, mtime in ((archive, "a.bin", 2000000000), (archive, "b.bin", 1900000000),
+                                       (incoming, "c.bin", 1000000000)):
+            path = os.path.join(directory, name)
+            with open(path, "wb") as f:
+                f.write(content)
+            os.utime(path, (mtime, mtime))
+        
+        for strategy, kept in (("oldest", "b.bin"), ("newest", "a.bin")):
+            result = self.detector.find_duplicates(incoming, reference_paths=[archive])
+            group = result["duplicate_groups"][0]
+            # Auch ein zuerst aufgeführter Kandidat wird nicht behalten
+            group["files"].sort(key=lambda f: f["role"] != "candidate")
+            removal = self.detector.remove_duplicates([group], keep_strategy=strategy, action="hardlink")
+            self.assertEqual(removal["linked_files"], 1)
+            self.assertEqual(removal["errors"], [])
+            self.assertEqual(os.stat(os.path.join(incoming, "c.bin")).st_ino,
+                             os.stat(os.path.join(archive, kept)).st_ino)
+            os.unlink(os.path.join(incoming, "c.bin"))
+            with open(os.path.join(incoming, "c.bin"), "wb") as f:
+                f.write(content)
+        
+        result = self.detector.find_duplicates(incoming, reference_paths=[archive])
+        removal = self.detector.remove_duplicates(result["duplicate_groups"], keep_strategy="oldest")
+        self.assertEqual(removal["removed_files"], 1)
+        self.assertEqual(sorted(os.listdir(archive)), ["a.bin", "b.bin"])
+        self.assertEqual(os.listdir(incoming), [])
+
+    def test_remove_duplicates_keeps_foreign_temp_files(self):
+        """Testet, dass beim Ersetzen vorhandene Dateien mit ähnlichem Namen unberührt bleiben."""
+        original = os.path.join(self.test_dir, "original.bin")
+        copy = os.path.join(self.test_dir, "kopie.bin")
+        foreign = self.write_file(".kopie.bin.dedup-tmp", b"fremd")
+        group = {"size": 256 * 64, "files": [{"path": original}, {"path": copy}]}
+        
+        # Schlägt das Ersetzen fehl, wird nur die selbst angelegte temporäre Datei entfernt
+        before = set(os.listdir(self.test_dir))
+        with mock.patch("os.replace", side_effect=OSError("Ersetzen fehlgeschlagen")):
+            removal = self.detector.remove_duplicates([group], action="hardlink")
+        self.assertEqual(removal["linked_files"], 0)
+        self.assertEqual(len(removal["errors"]), 1)
+        self.assertEqual(set(os.listdir(self.test_dir)), before)
+        
+        removal = self.detector.remove_duplicates([group], action="hardlink")
+        self.assertEqual(removal["linked_files"], 1)
+        self.assertEqual(os.stat(original).st_ino, os.stat(copy).st_ino)
+        with open(foreign, "rb") as f:
+            self.assertEqual(f.read(), b"fremd")
+        self.assertEqual(set(os.listdir(self.test_dir)), before)
+
+    def test_match_against_manifest(self):
+        """Testet den Abgleich eines neuen Verzeichnisses mit einem gespeicherten Manifest."""
+        incoming_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, incoming_dir)
+        manifest_path = os.path.join(incoming_dir, "archiv.manifest")
+        
+        exported = self.detector.export_manifest(self.test_dir, manifest_path)
+        self.assertEqual(exported["total_files"], 3)
+        
+        content = bytes(range(256)) * 64
+        new_dir = os.path.join(incoming_dir, "neu")
+        os.mkdir(new_dir)
+        for name, data in (("bekannt.bin", content), ("neu.bin", b"Y" + content[1:]), ("klein.txt", b"anders")):
+            with open(os.path.join(new_dir, name), "wb") as f:
+                f.write(data)
+        
+        result = self.detector.match_manifest(new_dir, manifest_path)
+        self.assertEqual(result["total_files"], 3)
+        self.assertEqual(result["unmatched_files"], 2)
+        self.assertEqual([f["name"] for f in result["matched_files"]], ["bekannt.bin"])
+        self.assertEqual(
+            sorted(os.path.basename(path) for path in result["matched_files"][0]["manifest_paths"]),
+            ["kopie.bin", "original.bin"]
+        )
+        # Die kleine Datei hat keine passende Größe im Manifest und wird nicht gehasht
+        self.assertEqual(result["bytes_read"]["full_hash"], 2 * len(content))
+
+        # Ein erneuter Export ersetzt die Einträge gelöschter Dateien; Namen ohne UTF-8 sind erlaubt
+        renamed = os.fsdecode(b"kopie\xff.bin")
+        os.rename(os.path.join(self.test_dir, "kopie.bin"), os.path.join(self.test_dir, renamed))
+        exported = self.detector.export_manifest(self.test_dir, manifest_path)
+        self.assertEqual(exported["total_files"], 3)
+        result = self.detector.match_manifest(new_dir, manifest_path)
+        self.assertEqual(
+            sorted(os.path.basename(path) for path in result["matched_files"][0]["manifest_paths"]),
+            sorted([renamed, "original.bin"])
+        )
+    
+    def test_external_sort_matches_in_memory(self):
+        """Testet, dass die externe Sortierung dieselben Gruppen wie der Speichermodus findet."""
+        for index in range(70):
+            self.write_file(f"datei{index}.txt", b"inhalt" * (index % 7 + 1))
+        os.link(os.path.join(self.test_dir, "original.bin"), os.path.join(self.test_dir, "link.bin"))
+        
+        expected = self.detector.find_duplicates(self.test_dir)
+        detector = DuplicateDetector(sample_size=1024, memory_budget=1)
+        result = detector.find_duplicates(self.test_dir)
+        
+        def normalize(groups):
+            return sorted(sorted(f["path"] for f in group["files"]) for group in groups)
+        
+        self.assertEqual(normalize(result["duplicate_groups"]), normalize(expected["duplicate_groups"]))
+        self.assertEqual(normalize(result["hardlink_groups"]), normalize(expected["hardlink_groups"]))
+        self.assertEqual(result["wasted_space"], expected["wasted_space"])
+        # Jeder Datensatz bildet einen eigenen Lauf, dazu kommen die Läufe der Zwischenstufe
+        self.assertEqual(result["spill"]["records"], 74)
+        self.assertGreater(result["spill"]["runs"], 74)
+    
+    def test_resume_from_checkpoint(self):
+        """Testet, dass eine fortgesetzte Suche dasselbe Ergebnis wie eine ununterbrochene liefert."""
+        for index in range(4):
+            self.write_file(f"a{index}.dat", b"paar" * (index + 1))
+            self.write_file(f"b{index}.dat", b"paar" * (index + 1))
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        checkpoint_path = os.path.join(checkpoint_dir, "scan.sqlite3")
+        detector = DuplicateDetector(sample_size=1024, batch_size=2)
+        expected = detector.find_duplicates(self.test_dir)
+        
+        # Abbruch nach dem ersten abgeschlossenen Stapel
+        checkpoint = ScanCheckpoint(checkpoint_path)
+        groups = detector.iter_duplicates(self.test_dir, checkpoint=checkpoint)
+        next(groups)
+        next(groups)
+        groups.close()
+        checkpoint.close()
+        
+        result = detector.find_duplicates(self.test_dir, checkpoint_path=checkpoint_path, resume=True)
+        self.assertEqual(result["duplicate_groups"], expected["duplicate_groups"])
+        self.assertEqual(result["total_duplicates"], expected["total_duplicates"])
+        self.assertEqual(result["wasted_space"], expected["wasted_space"])
+        self.assertFalse(os.path.exists(checkpoint_path))
+
+    def test_resume_keeps_undecodable_names_and_hardlinks(self):
+        """Testet, dass Namen ohne gültiges UTF-8 und Hardlink-Gruppen einen Abbruch überstehen."""
+        name = os.fsdecode(b"kopie\xff.bin")
+        shutil.copyfile(os.path.join(self.test_dir, "original.bin"), os.path.join(self.test_dir, name))
+        os.link(os.path.join(self.test_dir, "original.bin"), os.path.join(self.test_dir, "link.bin"))
+        self.write_file("a.dat", b"paar")
+        self.write_file("b.dat", b"paar")
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        checkpoint_path = os.path.join(checkpoint_dir, "scan.sqlite3")
+        detector = DuplicateDetector(sample_size=1024, batch_size=1)
+        expected = detector.find_duplicates(self.test_dir)
+
+        # Abbruch, bevor ein Stapel als erledigt gespeichert wurde
+        checkpoint = ScanCheckpoint(checkpoint_path)
+        groups = detector.iter_duplicates(self.test_dir, checkpoint=checkpoint)
+        next(groups)
+        groups.close()
+        checkpoint.close()
+        self.assertIsNone(detector.hash_cache)
+
+        result = detector.find_duplicates(self.test_dir, checkpoint_path=checkpoint_path, resume=True)
+        self.assertEqual(result["duplicate_groups"], expected["duplicate_groups"])
+        self.assertEqual(len(result["hardlink_groups"]), 1)
+        self.assertIn(
+            os.path.join(self.test_dir, name),
+            [f["path"] for group in result["duplicate_groups"] for f in group["files"]]
+        )
+
+    def test_reclaim_schedule_with_time_budget(self):
+        """Testet, dass große Einsparungen zuerst gehasht werden und das Zeitbudget greift."""
+        for index in range(3):
+            self.write_file(f"klein{index}.txt", b"klein")
+        self.write_file("gross1.dat", b"g" * 100000)
+        self.write_file("gross2.dat", b"g" * 100000)
+
+        detector = DuplicateDetector(sample_size=1024, batch_size=1, schedule="reclaim")
+        groups = list(detector.iter_duplicates(self.test_dir))
+        reclaim = [group["size"] * (len(group["files"]) - 1) for group in groups]
+        self.assertEqual(reclaim, sorted(reclaim, reverse=True))
+        self.assertEqual(groups[0]["size"], 100000)
+
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        checkpoint_path = os.path.join(checkpoint_dir, "scan.sqlite3")
+
+        # Ein Budget, das schon im Verzeichnisdurchlauf endet, hinterlässt keine Kandidatengruppen
+        for memory_budget in (None, 1024):
+            detector.memory_budget = memory_budget
+            result = detector.find_duplicates(self.test_dir, checkpoint_path=checkpoint_path, time_budget=0)
+            self.assertTrue(result["time_budget_exhausted"])
+            self.assertEqual(result["duplicate_groups"], [])
+            with ScanCheckpoint(checkpoint_path) as checkpoint:
+                self.assertEqual(list(checkpoint.iter_pending_groups()), [])
+        detector.memory_budget = None
+
+        # Endet das Budget in der Hash-Phase, wird der Checkpoint fortgesetzt
+        group_by_content = detector._group_by_content
+        def slow_group_by_content(*args):
+            time.sleep(0.3)
+            return group_by_content(*args)
+        with mock.patch.object(detector, "_group_by_content", slow_group_by_content):
+            result = detector.find_duplicates(self.test_dir, checkpoint_path=checkpoint_path, time_budget=0.2)
+        self.assertTrue(result["time_budget_exhausted"])
+        self.assertEqual(result["duplicate_groups"], groups[:1])
+
+        resumed = detector.find_duplicates(self.test_dir, checkpoint_path=checkpoint_path, resume=True)
+        self.assertFalse(resumed["time_budget_exhausted"])
+        self.assertEqual(resumed["duplicate_groups"], groups)
+        self.assertFalse(os.path.exists(checkpoint_path))
+
+        # Innerhalb eines Stapels zählt die tatsächliche Einsparung, nicht die der Größengruppe
+        self.write_file("viele1.dat", b"v" * 50000)
+        self.write_file("viele2.dat", b"v" * 50000)
+        for index in range(3):
+            self.write_file(f"einzeln{index}.dat", bytes([index]) * 50000)
+        batch_detector = DuplicateDetector(sample_size=1024, schedule="reclaim")
+        reclaim = [group["size"] * (len(group["files"]) - 1) for group in batch_detector.iter_duplicates(self.test_dir)]
+        self.assertEqual(reclaim, sorted(reclaim, reverse=True))
+        self.assertEqual(reclaim[:2], [100000, 50000])
+
+        with self.assertRaises(ValueError):
+            DuplicateDetector(schedule="zufall")
+
+    def test_file_index(self):
+        """Testet Pfade und Größengruppen des spaltenweisen Index sowie seinen Speicherbedarf."""
+        index = FileIndex()
+        paths = [Path(self.test_dir, "b", "x.dat"), Path(self.test_dir, "a", "ä.dat"), Path(self.test_dir, "b", "y.dat")]
+        for file_path, size in zip(paths, (30, 10, 30)):
+            index.add(file_path, size)
+        index.add(Path(self.test_dir, "leer.dat"), 0)
+        
+        self.assertEqual(len(index.directories), 3)
+        self.assertEqual([file_path for file_path, _ in index][:3], paths)
+        self.assertEqual(list(index.iter_size_groups()), [(30, [0, 2])])
+        self.assertEqual([size for size, _ in index.iter_size_groups(min_count=1, sort_by_size=True)], [10, 30])
+        
+        self.assertGreater(benchmark_memory(file_count=5000)["ratio"], 3)
+    
+    def test_io_throttle(self):
+        """Testet Token-Bucket, adaptive Drosselung und die gedrosselte Duplikatsuche."""
+        bucket = TokenBucket(rate=1000)
+        self.assertEqual(bucket.consume(1000), 0.0)
+        self.assertGreater(bucket.consume(50), 0.0)
+        
+        adaptive = IOThrottle(adaptive=True, target_latency=0.01)
+        adaptive.record(8 * 1024 * 1024, 0.5)
+        self.assertEqual(adaptive.snapshot()["backoffs"], 1)
+        self.assertIsNotNone(adaptive.snapshot()["current_mb_per_second"])
+        
+        expected = self.detector.find_duplicates(self.test_dir)
+        detector = DuplicateDetector(sample_size=1024, io_throttle=IOThrottle(max_mb_per_second=100, max_iops=10000))
+        result = detector.find_duplicates(self.test_dir)
+        self.assertEqual(result["duplicate_groups"], expected["duplicate_groups"])
+        self.assertGreater(result["io"]["reads"], 0)
+        self.assertEqual(result["io"]["limit_mb_per_second"], 100)
+
+    def test_io_throttle_charges_bytes_read(self):
+        """Testet, dass nur tatsächlich gelesene Bytes ohne leeren Lesevorgang berechnet werden."""
+        class CountingThrottle(IOThrottle):
+            calls = 0
+            charged = 0
+
+            def acquire(self, nbytes):
+                self.calls += 1
+                self.charged += nbytes
+
+        for index in range(20):
+            self.write_file(f"gleich{index}.dat", b"z" * 1000)
+        throttle = CountingThrottle()
+        detector = DuplicateDetector(sample_size=1024, io_throttle=throttle, compare_strategy="hash")
+        result = detector.find_duplicates(self.test_dir)
+
+        # Stichproben der drei großen Dateien, dann zwei vollständige Hashes und die 20 kleinen Dateien
+        self.assertEqual(sorted(len(group["files"]) for group in result["duplicate_groups"]), [2, 20])
+        self.assertEqual(throttle.charged, 3 * 3 * 1024 + 2 * 256 * 64 + 20 * 1000)
+        self.assertEqual(throttle.calls, 3 * 3 + 2 + 20)
+        self.assertIsNone(hashing.get_read_throttle())
+
+    def test_identical_directories(self):
+        """Testet die Erkennung identischer Verzeichnisse und das Zusammenfassen ihrer Dateigruppen."""
+        for copy in ("projekt", "projekt_alt"):
+            os.makedirs(os.path.join(self.test_dir, copy, "unterordner"))
+            self.write_file(os.path.join(copy, "notizen.txt"), b"Notizen zum Projekt")
+            self.write_file(os.path.join(copy, "unterordner", "daten.csv"), b"a,b\n1,2\n")
+            self.write_file(os.path.join(copy, "leer.txt"), b"")
+        # Gleiche Dateien, aber ein abweichender Name: kein identisches Verzeichnis
+        os.makedirs(os.path.join(self.test_dir, "anders"))
+        self.write_file(os.path.join("anders", "notiz.txt"), b"Notizen zum Projekt")
+        
+        result = self.detector.find_duplicates(self.test_dir, compare_directories=True)
+        
+        self.assertEqual(len(result["duplicate_directories"]), 1)
+        directories = result["duplicate_directories"][0]
+        self.assertEqual([d["name"] for d in directories["directories"]], ["projekt", "projekt_alt"])
+        self.assertEqual(directories["file_count"], 3)
+        self.assertEqual(result["collapsed_files"], 2)
+        for group in result["duplicate_groups"]:
+            self.assertFalse(any("projekt_alt" in f["path"] for f in group["files"]))
+        self.assertEqual(len(result["duplicate_groups"]), 2)
+    
+    def test_chunk_level_sharing(self):
+        """Testet, dass fast identische Dateien auf Blockebene als gemeinsam erkannt werden."""
+        chunk_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, chunk_dir)
+        content = b"".join(hashlib.sha256(str(i).encode()).digest() for i in range(4096))
+        paths = [os.path.join(chunk_dir, name) for name in ("image.img", "image_neu.img")]
+        with open(paths[0], "wb") as f:
+            f.write(content)
+        with open(paths[1], "wb") as f:
+            f.write(content[:50000] + b"eingefuegt" + content[50000:])
+        
+        chunks = list(iter_chunks(paths[0]))
+        self.assertEqual(sum(length for _, length, _ in chunks), len(content))
+        self.assertEqual([offset for offset, _, _ in chunks], [sum(c[1] for c in chunks[:i]) for i in range(len(chunks))])
+        
+        result = ChunkAnalyzer().analyze(chunk_dir)
+        self.assertEqual(result["total_files"], 2)
+        self.assertEqual(len(result["file_pairs"]), 1)
+        self.assertGreater(result["file_pairs"][0]["shared_ratio"], 0.8)
+        self.assertGreater(result["dedup_ratio"], 1.5)
+        self.assertEqual(result["pair_skipped_chunks"], 0)
+
+        # Mit und ohne NumPy entstehen dieselben Blöcke, auch über Lesepuffer hinweg
+        with mock.patch.object(chunking, "READ_SIZE", 8192):
+            with mock.patch.object(chunking, "np", None):
+                self.assertEqual(list(iter_chunks(paths[0])), chunks)
+                small = list(iter_chunks(paths[1], 64, 256, 1024))
+            self.assertEqual(list(iter_chunks(paths[1], 64, 256, 1024)), small)
+        with self.assertRaises(ValueError):
+            list(iter_chunks(paths[0], min_size=32))
+
+        # Blöcke in zu vielen Dateien gehen nicht in die Paarauswertung ein
+        with mock.patch.object(chunking, "MAX_PAIR_FANOUT", 1):
+            limited = ChunkAnalyzer().analyze(chunk_dir)
+        self.assertEqual(limited["file_pairs"], [])
+        self.assertGreater(limited["pair_skipped_chunks"], 0)
+        self.assertEqual(limited["shared_bytes"], result["shared_bytes"])
+    
+    def test_archive_members_matched_by_crc(self):
+        """Testet, dass Mitglieder von ZIP-Archiven ohne vollständiges Entpacken erkannt werden."""
+        content = b"Quartalsbericht " * 100
+        loose = self.write_file("bericht.txt", content)
+        with zipfile.ZipFile(os.path.join(self.test_dir, "archiv.zip"), "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("docs/bericht.txt", content)
+            archive.writestr("docs/anders.txt", b"X" * len(content))
+        
+        result = self.detector.find_duplicates(self.test_dir, scan_archives=True)
+        
+        self.assertEqual(result["archive_members"], 1)
+        group = next(g for g in result["duplicate_groups"] if g["size"] == len(content))
+        self.assertEqual([f["path"] for f in group["files"]][0], loose)
+        self.assertEqual(group["files"][1]["member"], "docs/bericht.txt")
+        self.assertEqual(group["hash"], hashlib.sha256(content).hexdigest())
+        # Nur das kollidierende Mitglied wurde dekomprimiert
+        self.assertEqual(result["bytes_read"]["archive"], len(content))
+        
+        self.assertEqual(result["total_duplicates"], 2)
+        self.assertEqual(result["wasted_space"], 256 * 64 + len(content))
+        
+        # Archivmitglieder werden beim Entfernen nicht angetastet
+        removal = self.detector.remove_duplicates([group])
+        self.assertEqual(removal["removed_files"], 0)
+        self.assertTrue(os.path.exists(loose))
+        
+        # Bereits gruppierte Dateien werden für die CRC nur einmal je Gruppe gelesen
+        self.write_file("bericht-kopie.txt", content)
+        plain = self.detector.find_duplicates(self.test_dir)
+        result = self.detector.find_duplicates(self.test_dir, scan_archives=True)
+        self.assertEqual(result["bytes_read"]["full_hash"] - plain["bytes_read"]["full_hash"], len(content))
+        group = next(g for g in result["duplicate_groups"] if g["size"] == len(content))
+        self.assertEqual(len(group["files"]), 3)
+        self.assertEqual(result["total_duplicates"], 3)
+        self.assertEqual(result["wasted_space"], 256 * 64 + 2 * len(content))
+        
+        # Mit Referenzverzeichnis erhalten auch neue Gruppen und Mitglieder Rollen
+        archive = os.path.join(self.test_dir, "referenz")
+        incoming = os.path.join(self.test_dir, "eingang")
+        os.makedirs(archive)
+        os.makedirs(incoming)
+        os.rename(os.path.join(self.test_dir, "archiv.zip"), os.path.join(archive, "archiv.zip"))
+        with open(os.path.join(incoming, "neu.txt"), "wb") as f:
+            f.write(content)
+        result = self.detector.find_duplicates(incoming, reference_paths=[archive], scan_archives=True)
+        self.assertEqual(len(result["duplicate_groups"]), 1)
+        roles = {f["name"]: f["role"] for f in result["duplicate_groups"][0]["files"]}
+        self.assertEqual(roles, {"neu.txt": "candidate", "bericht.txt": "reference"})
+        self.assertEqual(result["total_duplicates"], 1)
+        self.assertEqual(result["wasted_space"], len(content))
+    
+    def test_zero_copy_hash_matches_hashlib(self):
+        """Testet, dass readinto- und mmap-Pfad denselben Hash wie hashlib liefern."""
+        path = self.write_file("gross.bin", os.urandom(300 * 1024))
+        with open(path, "rb") as f:
+            expected = hashlib.sha256(f.read()).hexdigest()
+        
+        self.assertEqual(hashing.hash_file(path), expected)
+        self.assertEqual(hashing.hash_file(path, chunk_size=4096), expected)
+        
+        threshold = hashing.MMAP_THRESHOLD
+        hashing.MMAP_THRESHOLD = 1024
+        try:
+            self.assertEqual(hashing.hash_file(path), expected)
+        finally:
+            hashing.MMAP_THRESHOLD = threshold
+
+class TestDirectoryScanner(unittest.TestCase):
+    """Test-Klasse für den gemeinsamen Verzeichnis-Scanner."""
+    
+    def setUp(self):
+        """Richtet einen Baum mit Unterverzeichnissen und symbolischen Links ein."""
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "a", "b"))
+        for name, content in (("wurzel.txt", b"1"), ("a/mitte.txt", b"22"), ("a/b/tief.log", b"333")):
+            with open(os.path.join(self.test_dir, name), "wb") as f:
+                f.write(content)
+        os.symlink(os.path.join(self.test_dir, "wurzel.txt"), os.path.join(self.test_dir, "a", "link.txt"))
+        os.symlink(self.test_dir, os.path.join(self.test_dir, "a", "b", "schleife"))
+    
+    def tearDown(self):
+        """Räumt die Testumgebung auf."""
+        shutil.rmtree(self.test_dir)
+    
+    def names(self, scanner, **kwargs):
+        """Liefert die sortierten Dateinamen eines Scans."""
+        return sorted(entry.name for entry in scanner.iter_files(self.test_dir, **kwargs))
+    
+    def test_depth_symlinks_and_filters(self):
+        """Testet Tiefenbegrenzung, Link-Behandlung und Filter."""
+        self.assertEqual(self.names(DirectoryScanner()), ["link.txt", "mitte.txt", "tief.log", "wurzel.txt"])
+        self.assertEqual(self.names(DirectoryScanner(symlinks="skip")), ["mitte.txt", "tief.log", "wurzel.txt"])
+        self.assertEqual(self.names(DirectoryScanner(max_depth=1)), ["link.txt", "mitte.txt", "wurzel.txt"])
+        self.assertEqual(self.names(DirectoryScanner(), recursive=False), ["wurzel.txt"])
+        
+        # Die Schleife über den Link auf die Wurzel wird nur einmal durchlaufen
+        self.assertEqual(len(self.names(DirectoryScanner(symlinks="follow"))), 4)
+        
+        scanner = DirectoryScanner(file_filter=lambda entry: entry.size >= 2,
+                                   directory_filter=lambda path: not path.endswith("b"))
+        self.assertEqual(self.names(scanner), ["mitte.txt"])
+        
+        entry = next(e for e in DirectoryScanner().iter_files(self.test_dir) if e.name == "tief.log")
+        self.assertEqual(entry.size, 3)
+        self.assertEqual(entry.inode, os.stat(entry.path).st_ino)
+        
+        with self.assertRaises(ValueError):
+            DirectoryScanner(symlinks="immer")
+    
+    def test_parallel_walk(self):
+        """Testet, dass der parallele Scanner geordnet exakt und ungeordnet vollständig scannt."""
+        for index in range(20):
+            path = os.path.join(self.test_dir, f"ordner{index % 5}", f"unter{index % 3}")
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, f"datei{index}.txt"), "wb") as f:
+                f.write(b"x" * index)
+        serial = [entry.path for entry in DirectoryScanner(symlinks="follow").iter_files(self.test_dir)]
+        
+        ordered = ParallelDirectoryScanner(workers=4, symlinks="follow")
+        self.assertEqual([entry.path for entry in ordered.iter_files(self.test_dir)], serial)
+        unordered = ParallelDirectoryScanner(workers=4, ordered=False, symlinks="follow")
+        self.assertEqual(sorted(entry.path for entry in unordered.iter_files(self.test_dir)), sorted(serial))
+        
+        # Bei langsamem Aufrufer werden höchstens prefetch Verzeichnisse (und das nächste) vorab gelesen
+        for ordered in (True, False):
+            scanner = ParallelDirectoryScanner(workers=2, ordered=ordered, prefetch=2, symlinks="follow")
+            scanned = []
+            scan_directory = scanner._scan_directory
+            scanner._scan_directory = lambda directory: scanned.append(directory) or scan_directory(directory)
+            paths = []
+            for yielded, (_, _, files) in enumerate(scanner.walk(self.test_dir), 1):
+                time.sleep(0.01)
+                self.assertLessEqual(len(scanned) - yielded, 3)
+                paths.extend(entry.path for entry in files)
+            self.assertEqual(paths if ordered else sorted(paths), serial if ordered else sorted(serial))
+            self.assertEqual(len(scanned), len(list(DirectoryScanner(symlinks="follow").walk(self.test_dir))))
+        
+        detector = DuplicateDetector(sample_size=1024)
+        expected = detector.find_duplicates(self.test_dir)
+        detector.scanner = ParallelDirectoryScanner(workers=4)
+        self.assertEqual(detector.find_duplicates(self.test_dir)["duplicate_groups"], expected["duplicate_groups"])
+
+    def test_incremental_scan_with_snapshot(self):
+        """Testet, dass ein Scan mit Snapshot unveränderte Verzeichnisse übernimmt und exakt bleibt."""
+        os.makedirs(os.path.join(self.test_dir, "weg", "unten"))
+        
+        def age_directories():
+            # Verzeichnisse außerhalb des Zeitfensters gleicher mtime datieren
+            past = os.stat(self.test_dir).st_mtime_ns - 3600 * 10 ** 9
+            for root, _, _ in os.walk(self.test_dir):
+                os.utime(root, ns=(past, past))
+        
+        def scan(scanner):
+            return [(entry.path, entry.size) for entry in scanner.iter_files(self.test_dir)]
+        
+        age_directories()
+        snapshot_path = os.path.join(tempfile.mkdtemp(), "snapshot.sqlite3")
+        self.addCleanup(shutil.rmtree, os.path.dirname(snapshot_path))
+        with DirectorySnapshot(snapshot_path) as snapshot:
+            scanner = DirectoryScanner(snapshot=snapshot)
+            self.assertEqual(scan(scanner), scan(DirectoryScanner()))
+            self.assertEqual(len(snapshot), 5)
+        
+        # Neue Datei, geänderter Inhalt in unverändertem Verzeichnis, gelöschter Teilbaum
+        with open(os.path.join(self.test_dir, "a", "neu.txt"), "wb") as f:
+            f.write(b"neu")
+        with open(os.path.join(self.test_dir, "a", "b", "tief.log"), "ab") as f:
+            f.write(b"mehr")
+        shutil.rmtree(os.path.join(self.test_dir, "weg"))
+        
+        with DirectorySnapshot(snapshot_path) as snapshot:
+            scanner = ParallelDirectoryScanner(workers=2, snapshot=snapshot)
+            self.assertEqual(scan(scanner), scan(DirectoryScanner()))
+            self.assertEqual(snapshot.reused_directories, 1)
+            self.assertEqual(snapshot.scanned_directories, 2)
+            self.assertEqual(len(snapshot), 3)
+
+        # Verzeichnis- und Dateinamen ohne gültiges UTF-8
+        directory = os.path.join(self.test_dir, os.fsdecode(b"sub\xff"))
+        os.makedirs(directory)
+        with open(os.path.join(directory, os.fsdecode(b"datei\xfe.txt")), "wb") as f:
+            f.write(b"roh")
+        age_directories()
+        for expected_reused in (0, 4):
+            with DirectorySnapshot(snapshot_path) as snapshot:
+                self.assertEqual(scan(DirectoryScanner(snapshot=snapshot)), scan(DirectoryScanner()))
+                self.assertEqual(snapshot.reused_directories, expected_reused)
+                self.assertEqual(len(snapshot), 4)
+
+    def test_live_index_events(self):
+        """Testet, dass der Live-Index Ereignisse zusammenfasst und bei Überlauf neu scannt."""
+        catalog_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, catalog_dir)
+        
+        def scan(scanner):
+            return sorted((entry.path, entry.size) for entry in scanner.iter_files(self.test_dir))
+        
+        with LiveFileIndex(self.test_dir, os.path.join(catalog_dir, "katalog.sqlite3"), max_queue=4) as index:
+            index.load()
+            self.assertEqual(scan(index), scan(DirectoryScanner()))
+            
+            # Mehrere Ereignisse je Pfad ergeben einen Eintrag mit dem Zustand auf der Festplatte
+            new_file = os.path.join(self.test_dir, "a", "neu.txt")
+            with open(new_file, "wb") as f:
+                f.write(b"neu")
+            index.notify("created", new_file)
+            index.notify("modified", new_file)
+            os.makedirs(os.path.join(self.test_dir, "c"))
+            with open(os.path.join(self.test_dir, "c", "innen.txt"), "wb") as f:
+                f.write(b"innen")
+            index.notify("created", os.path.join(self.test_dir, "c"), is_directory=True)
+            shutil.rmtree(os.path.join(self.test_dir, "a", "b"))
+            index.notify("deleted", os.path.join(self.test_dir, "a", "b"), is_directory=True)
+            index.flush_events()
+            self.assertEqual(scan(index), scan(DirectoryScanner()))
+            self.assertEqual(index.stats["batches"], 1)
+            
+            organizer = FileOrganizer(scanner=index)
+            result = organizer.analyze_directory(self.test_dir)
+            self.assertEqual(result["total_files"], 5)
+            
+            # Überlauf der Warteschlange: nur die Verzeichnisse verlorener Ereignisse werden neu gelesen
+            for number in range(6):
+                with open(os.path.join(self.test_dir, f"schub{number}.txt"), "wb") as f:
+                    f.write(b"x")
+                index.notify("created", os.path.join(self.test_dir, f"schub{number}.txt"))
+            index.flush_events()
+            self.assertEqual(index.stats["rescans"], 1)
+            self.assertEqual(index.stats["reloads"], 0)
+            self.assertEqual(scan(index), scan(DirectoryScanner()))
+            
+            # Geänderter Inhalt ändert die mtime des Verzeichnisses nicht
+            with open(os.path.join(self.test_dir, "c", "innen.txt"), "ab") as f:
+                f.write(b" mehr")
+            index.notify("modified", os.path.join(self.test_dir, "c", "innen.txt"))
+            index.flush_events()
+            self.assertEqual(scan(index), scan(DirectoryScanner()))
+        
+        # Entfernte Teilbäume werden ohne Durchlauf des ganzen Index gelöscht
+        class NoIterationTree(dict):
+            def __iter__(self):
+                raise AssertionError("Durchlauf des ganzen Index")
+        deep = os.path.join(self.test_dir, "tief")
+        os.makedirs(os.path.join(deep, "x", "y"))
+        with open(os.path.join(deep, "x", "y", "datei.txt"), "wb") as f:
+            f.write(b"tief")
+        with LiveFileIndex(self.test_dir, os.path.join(catalog_dir, "katalog.sqlite3")) as index:
+            index.load()
+            self.assertIn(os.path.join(deep, "x", "y"), index.tree)
+            index.tree = NoIterationTree(index.tree)
+            shutil.rmtree(deep)
+            index.notify("deleted", deep, is_directory=True)
+            index.flush_events()
+            self.assertEqual(scan(index), scan(DirectoryScanner()))
+            self.assertEqual(sorted(dict.keys(index.tree)), sorted(
+                os.path.join(self.test_dir, name) if name else self.test_dir for name in ("", "a", "c")
+            ))
+        
+        # Ein neuer Index übernimmt unveränderte Verzeichnisse aus dem Katalog, auch ohne stat()
+        past = os.stat(self.test_dir).st_mtime_ns - 3600 * 10 ** 9
+        for root, _, _ in os.walk(self.test_dir):
+            os.utime(root, ns=(past, past))
+        for expected_reused in (0, 3):
+            with LiveFileIndex(self.test_dir, os.path.join(catalog_dir, "katalog.sqlite3"),
+                               scanner=DirectoryScanner(verify_files=False)) as index:
+                index.load()
+                self.assertEqual(scan(index), scan(DirectoryScanner()))
+                self.assertEqual(index.catalog.reused_directories, expected_reused)
+        
+        # Zu viele verlorene Verzeichnisse führen zum erneuten Laden der Wurzeln
+        with LiveFileIndex(self.test_dir, os.path.join(catalog_dir, "katalog.sqlite3"), max_queue=1,
+                           max_overflow_directories=1) as index:
+            index.load()
+            for name in ("a", "c", "a"):
+                index.notify("created", os.path.join(self.test_dir, name, "fehlt.txt"))
+            index.flush_events()
+            self.assertEqual(index.stats["reloads"], 1)
+            self.assertEqual(scan(index), scan(DirectoryScanner()))
+    
+    @unittest.skipUnless(live_index_available(), "watchdog ist nicht installiert")
+    def test_live_index_with_watchdog(self):
+        """Testet den Live-Index mit echten Dateisystem-Ereignissen."""
+        catalog_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, catalog_dir)
+        
+        def scan(scanner):
+            return sorted((entry.path, entry.size) for entry in scanner.iter_files(self.test_dir))
+        
+        def wait_until_current(index):
+            deadline = time.monotonic() + 10
+            while scan(index) != scan(DirectoryScanner()) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(scan(index), scan(DirectoryScanner()))
+        
+        with LiveFileIndex(self.test_dir, os.path.join(catalog_dir, "katalog.sqlite3"), debounce=0.05) as index:
+            index.start()
+            wait_until_current(index)
+            
+            with open(os.path.join(self.test_dir, "a", "neu.txt"), "wb") as f:
+                f.write(b"neu")
+            wait_until_current(index)
+            
+            with open(os.path.join(self.test_dir, "a", "neu.txt"), "ab") as f:
+                f.write(b" und mehr")
+            os.rename(os.path.join(self.test_dir, "a", "b"), os.path.join(self.test_dir, "verschoben"))
+            wait_until_current(index)
+            
+            os.unlink(os.path.join(self.test_dir, "a", "neu.txt"))
+            os.makedirs(os.path.join(self.test_dir, "verschoben", "tiefer"))
+            with open(os.path.join(self.test_dir, "verschoben", "tiefer", "x.txt"), "wb") as f:
+                f.write(b"x")
+            wait_until_current(index)
+            self.assertGreater(index.stats["batches"], 0)
+
+class TestFileCatalog(unittest.TestCase):
+    """Test-Klasse für den spaltenweisen Dateikatalog von FileOrganizer."""
+    
+    def setUp(self):
+        """Richtet Dateien unterschiedlicher Typen und Größen ein."""
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "unter"))
+        for name, content in (("a.txt", b"12"), ("B.JPG", b"123"), ("unter/c.txt", b"12"),
+                              ("unter/d.csv", b"1234"), ("unter/.env", b"x"), ("e.", b"")):
+            with open(os.path.join(self.test_dir, name), "wb") as f:
+                f.write(content)
+        self.organizer = FileOrganizer()
+    
+    def tearDown(self):
+        """Räumt die Testumgebung auf."""
+        shutil.rmtree(self.test_dir)
+    
+    def test_catalog_matches_records(self):
+        """Testet Kompatibilitätsansicht, Gruppierung und Filter des Katalogs."""
+        result = self.organizer.analyze_directory(self.test_dir)
+        catalog = result["files"]
+        self.assertIsInstance(catalog, FileCatalog)
+        
+        expected = [self.organizer._analyze_file(Path(record["path"])) for record in catalog]
+        self.assertEqual(catalog.to_records(), expected)
+        self.assertEqual(list(catalog), expected)
+        self.assertEqual(catalog[-1], expected[-1])
+        self.assertEqual(catalog[1:3], expected[1:3])
+        self.assertEqual(catalog[::-2], expected[::-2])
+        self.assertTrue(catalog == expected)
+        self.assertEqual(catalog, catalog.take(range(len(catalog))))
+        self.assertNotEqual(catalog, expected[:-1])
+        self.assertEqual(catalog.take([1, 2]).to_records(), expected[1:3])
+        self.assertEqual(json.loads(json.dumps(result, default=json_default))["files"], expected)
+        self.assertEqual(result["total_files"], 6)
+        
+        type_counts = {}
+        for record in expected:
+            type_counts[record["type"]] = type_counts.get(record["type"], 0) + 1
+        self.assertEqual(result["file_types"], type_counts)
+        
+        by_size = {size: [catalog.path(i) for i in indices] for size, indices in catalog.group_by("size")}
+        self.assertEqual(sorted(by_size), [0, 1, 2, 3, 4])
+        self.assertEqual(len(by_size[2]), 2)
+        
+        texts = catalog.filter(file_types="text", min_size=2)
+        self.assertEqual(sorted(record["name"] for record in texts), ["a.txt", "c.txt"])
+        self.assertEqual(list(catalog.filter(extensions=[".jpg", ".gibtsnicht"]).column("size")), [3])
+        self.assertEqual(len(catalog.filter(file_types="video")), 0)
+        self.assertEqual(len(FileCatalog().filter(min_size=1)), 0)
+        
+        duplicates = self.organizer.find_duplicates(self.test_dir)
+        self.assertEqual(duplicates["total_duplicates"], 1)
+        self.assertEqual(sorted(f["name"] for f in duplicates["duplicate_groups"][0]["files"]), ["a.txt", "c.txt"])
+        
+        organized = self.organizer.organize_files(self.test_dir)
+        self.assertEqual(organized["organized_files"] + organized["skipped_files"], 6)
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, "data", "d.csv")))
+        
+        self.assertGreater(benchmark_catalog_memory(file_count=2000)["ratio"], 2)
+
+class TestImageSimilarity(unittest.TestCase):
+    """Test-Klasse für Wahrnehmungs-Hashes und den BK-Baum."""
+    
+    def test_bk_tree_query(self):
+        """Testet Radiusabfragen im BK-Baum gegen eine lineare Suche."""
+        keys = [0b0000, 0b0001, 0b0011, 0b0111, 0b1111, 0b1000, 0b0001]
+        tree = BKTree()
+        for index, key in enumerate(keys):
+            tree.add(key, index)
+        
+        self.assertEqual(len(tree), len(keys))
+        for radius in range(5):
+            expected = sorted(i for i, key in enumerate(keys) if hamming_distance(0b0001, key) <= radius)
+            self.assertEqual(sorted(item for _, item in tree.query(0b0001, radius)), expected)
+    
+    @unittest.skipUnless(image_similarity_available(), "Pillow/NumPy nicht installiert")
+    def test_similar_images_grouped(self):
+        """Testet, dass verkleinerte Kopien eines Bildes gruppiert werden."""
+        from PIL import Image
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir)
+        
+        image = Image.new("L", (256, 256))
+        image.putdata([(x * y) % 256 for y in range(256) for x in range(256)])
+        original = os.path.join(test_dir, "original.png")
+        small = os.path.join(test_dir, "klein.jpg")
+        other = os.path.join(test_dir, "anders.png")
+        image.save(original)
+        image.resize((128, 128)).save(small, quality=80)
+        checkerboard = Image.new("L", (256, 256))
+        checkerboard.putdata([255 * ((x // 32 + y // 32) % 2) for y in range(256) for x in range(256)])
+        checkerboard.save(other)
+        
+        finder = ImageSimilarityFinder(max_workers=1)
+        groups = finder.find_similar_groups([original, small, other])
+        self.assertEqual([group["files"] for group in groups], [sorted([original, small])])
+
+    def test_groups_do_not_chain(self):
+        """Testet, dass eine Kette ähnlicher Fingerabdrücke nicht zu einer Gruppe verschmilzt."""
+        chain = {"a": 0b0, "b": 0b11, "c": 0b1111, "c2": 0b1111, "d": 0b111111, "e": 0b11111111}
+        groups = ImageSimilarityFinder().group_fingerprints(chain, max_distance=2)
+
+        for group in groups:
+            distances = [hamming_distance(chain[x], chain[y]) for x in group["files"] for y in group["files"]]
+            self.assertLessEqual(max(distances), 2)
+            self.assertEqual(group["max_distance"], max(distances))
+        self.assertEqual([group["files"] for group in groups], [["c", "c2", "d"], ["a", "b"]])
+
 class TestSmartFileManager(unittest.TestCase):
     """Test-Klasse für den SmartFileManager."""
     
@@ -156,6 +1164,65 @@ class TestSmartFileManager(unittest.TestCase):
         self.assertEqual(analysis["total_directories"], 0)
         self.assertEqual(len(analysis["file_types"]), 3)
     
+    def test_empty_directories_without_relisting(self):
+        """Testet, dass leere Verzeichnisse ohne erneutes Auflisten erkannt werden."""
+        for name in ("leer", "link", "fifo", "gefiltert"):
+            os.makedirs(os.path.join(self.test_dir, name))
+        os.symlink(self.text_file, os.path.join(self.test_dir, "link", "verweis.txt"))
+        os.mkfifo(os.path.join(self.test_dir, "fifo", "rohr"))
+        with open(os.path.join(self.test_dir, "gefiltert", "datei.tmp"), "w") as f:
+            f.write("x")
+        expected = [os.path.join(self.test_dir, "leer")]
+        # Ältere mtimes, damit der Snapshot die Verzeichnisse übernehmen darf
+        for name in ("leer", "link", "fifo", "gefiltert", ""):
+            os.utime(os.path.join(self.test_dir, name), (time.time() - 60, time.time() - 60))
+        file_filter = lambda entry: not entry.name.endswith(".tmp")
+        
+        catalog_path = os.path.join(self.target_dir, "katalog.sqlite3")
+        snapshot = DirectorySnapshot(os.path.join(self.target_dir, "snapshot.sqlite3"))
+        self.addCleanup(snapshot.close)
+        index = LiveFileIndex(self.test_dir, catalog_path,
+                              scanner=DirectoryScanner(symlinks="skip", file_filter=file_filter))
+        self.addCleanup(index.close)
+        index.load()
+        scanners = [
+            DirectoryScanner(symlinks="skip", file_filter=file_filter),
+            ParallelDirectoryScanner(workers=2, symlinks="skip", file_filter=file_filter),
+            DirectoryScanner(symlinks="skip", file_filter=file_filter, snapshot=snapshot),
+            DirectoryScanner(symlinks="skip", file_filter=file_filter, snapshot=snapshot),
+            index
+        ]
+        with mock.patch("os.listdir", side_effect=AssertionError("erneutes Auflisten")):
+            for scanner in scanners:
+                self.manager.scanner = scanner
+                analysis = self.manager.analyze_directory_structure(self.test_dir)
+                self.assertEqual(analysis["empty_directories"], expected)
+        self.assertGreater(snapshot.reused_directories, 0)
+        
+        # Der Live-Index führt übersprungene Einträge bei Ereignissen nach
+        os.unlink(os.path.join(self.test_dir, "fifo", "rohr"))
+        index.notify("deleted", os.path.join(self.test_dir, "fifo", "rohr"))
+        os.unlink(os.path.join(self.test_dir, "link", "verweis.txt"))
+        os.mkdir(os.path.join(self.test_dir, "link", "verweis.txt"))
+        index.notify("created", os.path.join(self.test_dir, "link", "verweis.txt"), is_directory=True)
+        index.flush_events()
+        analysis = self.manager.analyze_directory_structure(self.test_dir)
+        self.assertEqual(sorted(analysis["empty_directories"]), sorted(
+            expected + [os.path.join(self.test_dir, "fifo"), os.path.join(self.test_dir, "link", "verweis.txt")]
+        ))
+    
+    def test_image_groups_share_schema(self):
+        """Testet, dass Bildgruppen mit und ohne Pillow/NumPy dieselbe Form haben."""
+        shutil.copyfile(self.image_file, os.path.join(self.test_dir, "image2.jpg"))
+        with HashCache(os.path.join(self.target_dir, "hashes.sqlite3")) as cache:
+            result = SmartFileManager(hash_cache=cache).group_files_by_similarity(self.test_dir)
+
+        self.assertEqual(result["image_similarity_available"], image_similarity_available())
+        if not image_similarity_available():
+            self.assertEqual(result["similar_image_files"], [])
+        for group in result["similar_image_files"]:
+            self.assertEqual(set(group), {"fingerprint", "max_distance", "files"})
+    
     def test_generate_cleanup_suggestions(self):
         """Testet die generate_cleanup_suggestions-Methode."""
         suggestions = self.manager.generate_cleanup_suggestions(self.test_dir)